@@ -0,0 +1,106 @@
+"""
+Memo acotado de los movimientos (afterstates) de cada tablero.
+
+Los agentes vuelven a mover el mismo tablero en varias ramas del árbol y en
+turnos consecutivos (el subárbol del turno anterior se repite desplazado un
+nivel). La memo guarda, por tablero, el resultado de las 4 direcciones:
+tablero resultante, si cambió, puntaje de las combinaciones y la clave
+Zobrist del resultado, así que un tablero ya expandido no se vuelve a mover
+ni a hashear.
+
+Las 4 direcciones se calculan juntas (Bitboard.expand_afterstates) y ocupan
+una sola entrada. Con la capacidad llena se descarta la entrada más vieja
+(FIFO).
+"""
+from collections import deque
+
+import numpy as np
+
+import Bitboard
+
+
+class AfterstateCache:
+    """
+    Memo (tablero, dirección) -> (tablero resultante, cambió, puntaje).
+    - hits / misses: consultas que encontraron (o no) el tablero
+    - evictions: entradas descartadas por falta de lugar
+    """
+
+    def __init__(self, capacity: int = 1 << 16):
+        """
+        Args:
+            capacity: Cantidad máxima de tableros guardados
+        """
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.clear()
+
+    def clear(self) -> None:
+        """Descarta todas las entradas (los contadores se mantienen)"""
+        self._entries = {}
+        self._order = deque()
+
+    def __getstate__(self) -> dict:
+        # Se serializa vacía (p. ej. al copiar el agente a otro proceso)
+        return {'capacity': self.capacity}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['capacity'])
+
+    def expand(self, bits: np.uint64) -> tuple:
+        """
+        Resultado de mover el tablero en las 4 direcciones.
+
+        Args:
+            bits: Bitboard del tablero (GameBoard.bits)
+
+        Returns:
+            (máscara de movimientos legales, hijos, puntajes, claves Zobrist):
+            hijos[d] es el bitboard (np.uint64) luego de mover en la dirección
+            d, puntajes[d] lo ganado por las combinaciones y claves[d] la clave
+            Zobrist del hijo (0 si el movimiento no es legal)
+        """
+        key = int(bits)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        results = np.empty((3, 4), dtype=np.uint64)  # Hijos, puntajes y claves
+        mask = Bitboard.expand_afterstates(bits, Bitboard.ROW_TABLES, Bitboard.ZOBRIST_ROWS,
+                                           results[0], results[1], results[2])
+        entry = (mask, tuple(results[0]), tuple(results[1].tolist()), tuple(results[2]))
+        if len(self._order) >= self.capacity:
+            del self._entries[self._order.popleft()]
+            self.evictions += 1
+        self._entries[key] = entry
+        self._order.append(key)
+        return entry
+
+    def get(self, bits: np.uint64, direction: int) -> tuple[int, bool, int]:
+        """
+        Resultado de mover el tablero en una dirección.
+
+        Returns:
+            (clave del tablero resultante (ver GameBoard.key), cambió, puntaje)
+        """
+        mask, children, scores, _ = self.expand(bits)
+        return int(children[direction]), bool(mask >> direction & 1), scores[direction]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Contadores de uso de la memo"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,565 @@
+"""
+Representación bitboard del tablero de 2048.
+
+El tablero completo se guarda en un único entero de 64 bits: 16 nibbles
+(4 bits cada uno) con el exponente log2 de cada ficha (0 = celda vacía).
+La celda (i, j) ocupa el nibble 4*i + j, por lo que la fila i está en los
+bits [16*i, 16*i + 16) y la columna j = 0 es el nibble más bajo de la fila.
+
+Todas las operaciones (movimiento, transposición, celdas vacías, ficha
+máxima y aparición de fichas) son operaciones de bits compiladas con numba.
+Los movimientos usan tablas precalculadas por fila (ROW_TABLES): una fila
+tiene solo 65536 estados posibles, así que mover el tablero completo son
+cuatro lecturas de tabla. Las tablas se guardan en row_tables.npy junto a
+este módulo y se cargan con memory-map, de modo que los procesos que
+importan el módulo arrancan al instante y comparten las mismas páginas.
+El exponente máximo representable es MAX_EXPONENT = 15 (ficha 32768): un
+nibble no tiene lugar para 65536, así que dos fichas de 32768 no se combinan
+y from_grid rechaza (ValueError) las fichas mayores a 2**MAX_EXPONENT en vez
+de pisar el nibble de la celda vecina. Todos los backends de GameBoard pasan
+por estas tablas, así que el tope vale para cualquier partida.
+
+Las claves Zobrist (ZOBRIST_CELLS, ZOBRIST_ROWS) dan un hash de 64 bits bien
+distribuido para las tablas de transposición, que se actualiza con XOR al
+cambiar celdas. canonical() lleva el tablero al menor de sus 8 simétricos,
+para que las tablas compartan una entrada entre tableros simétricos.
+
+Los bitboards se pasan a las funciones como np.uint64 (numba no acepta
+enteros de Python mayores a 2**63), y los resultados vuelven como int.
+"""
+import os
+import tempfile
+
+import numpy as np
+from numba import njit
+
+dirs = [UP, DOWN, LEFT, RIGHT] = range(4)
+
+ROW_MASK = np.uint64(0xFFFF)
+NIBBLE_MASK = np.uint64(0xF)
+MAX_EXPONENT = 15  # Ficha máxima: 2**MAX_EXPONENT = 32768
+MAX_TILE = 1 << MAX_EXPONENT
+
+ROW_TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'row_tables.npy')
+# Filas de ROW_TABLES
+ROW_LEFT, ROW_RIGHT, ROW_SCORE = range(3)
+
+
+# ============================================================
+# CONVERSIONES
+# ============================================================
+
+@njit(cache=True)
+def from_grid(grid) -> np.uint64:
+    """
+    Convierte una grilla 4x4 de valores (0, 2, 4, ...) a bitboard.
+    Lanza ValueError si alguna ficha supera MAX_TILE.
+    """
+    board = np.uint64(0)
+    for i in range(4):
+        for j in range(4):
+            value = grid[i, j]
+            if value != 0:
+                exponent = np.uint64(0)
+                while value > 1:
+                    value = value // 2
+                    exponent += np.uint64(1)
+                if exponent > MAX_EXPONENT:
+                    raise ValueError("Ficha mayor a 2**MAX_EXPONENT: no entra en un nibble")
+                board |= exponent << np.uint64(4 * (4 * i + j))
+    return board
+
+
+@njit(cache=True)
+def to_grid(board: np.uint64, out) -> None:
+    """Escribe en `out` (4x4) los valores de las fichas del bitboard."""
+    for i in range(4):
+        for j in range(4):
+            exponent = (board >> np.uint64(4 * (4 * i + j))) & NIBBLE_MASK
+            out[i, j] = 0 if exponent == 0 else 1 << exponent
+
+
+@njit(cache=True)
+def get_exponent(board: np.uint64, i: int, j: int) -> int:
+    """Devuelve el exponente de la celda (i, j)."""
+    return np.int64((board >> np.uint64(4 * (4 * i + j))) & NIBBLE_MASK)
+
+
+@njit(cache=True)
+def set_exponent(board: np.uint64, i: int, j: int, exponent: int) -> np.uint64:
+    """Devuelve el bitboard con el exponente de la celda (i, j) reemplazado."""
+    shift = np.uint64(4 * (4 * i + j))
+    board &= ~(NIBBLE_MASK << shift)
+    return board | (np.uint64(exponent) << shift)
+
+
+# ============================================================
+# OPERACIONES DE BITS
+# ============================================================
+
+@njit(cache=True)
+def transpose(board: np.uint64) -> np.uint64:
+    """Transpone el tablero (la celda (i, j) pasa a (j, i))."""
+    a1 = board & np.uint64(0xF0F00F0FF0F00F0F)
+    a2 = board & np.uint64(0x0000F0F00000F0F0)
+    a3 = board & np.uint64(0x0F0F00000F0F0000)
+    a = a1 | (a2 << np.uint64(12)) | (a3 >> np.uint64(12))
+    b1 = a & np.uint64(0xFF00FF0000FF00FF)
+    b2 = a & np.uint64(0x00FF00FF00000000)
+    b3 = a & np.uint64(0x00000000FF00FF00)
+    return b1 | (b2 >> np.uint64(24)) | (b3 << np.uint64(24))
+
+
+@njit(cache=True)
+def empty_mask(board: np.uint64) -> np.uint64:
+    """Devuelve un bitboard con 1 en el bit bajo de cada nibble vacío."""
+    x = board
+    x |= (x >> np.uint64(2)) & np.uint64(0x3333333333333333)
+    x |= x >> np.uint64(1)
+    return ~x & np.uint64(0x1111111111111111)
+
+
+@njit(cache=True)
+def count_empty(board: np.uint64) -> int:
+    """Cantidad de celdas vacías."""
+    if board == 0:
+        return 16
+    # La multiplicación acumula los 16 flags en el nibble más alto
+    return np.int64((empty_mask(board) * np.uint64(0x1111111111111111)) >> np.uint64(60))
+
+
+@njit(cache=True)
+def max_exponent(board: np.uint64) -> int:
+    """Exponente de la ficha más grande del tablero."""
+    best = np.uint64(0)
+    while board != 0:
+        exponent = board & NIBBLE_MASK
+        if exponent > best:
+            best = exponent
+        board >>= np.uint64(4)
+    return np.int64(best)
+
+
+@njit(cache=True)
+def tile_sum(board: np.uint64) -> int:
+    """Suma de los valores de todas las fichas del tablero."""
+    total = 0
+    while board != 0:
+        exponent = board & NIBBLE_MASK
+        if exponent != 0:
+            total += 1 << exponent
+        board >>= np.uint64(4)
+    return total
+
+
+@njit(cache=True)
+def reverse_row(row: np.uint64) -> np.uint64:
+    """Invierte el orden de los 4 nibbles de una fila de 16 bits."""
+    return (((row >> np.uint64(12)) & NIBBLE_MASK) |
+            ((row >> np.uint64(4)) & np.uint64(0x00F0)) |
+            ((row << np.uint64(4)) & np.uint64(0x0F00)) |
+            ((row << np.uint64(12)) & np.uint64(0xF000)))
+
+
+@njit(cache=True)
+def move_row_left(row: np.uint64):
+    """
+    Desliza y combina una fila de 16 bits hacia la izquierda (nibble 0).
+
+    Returns:
+        (fila resultante, puntaje ganado por las combinaciones)
+    """
+    out = np.uint64(0)
+    score = 0
+    pos = np.uint64(0)
+    pending = np.uint64(0)
+    for j in range(4):
+        exponent = (row >> np.uint64(4 * j)) & NIBBLE_MASK
+        if exponent == 0:
+            continue
+        if pending == exponent and exponent < MAX_EXPONENT:
+            merged = exponent + np.uint64(1)
+            out |= merged << pos
+            score += 1 << merged
+            pos += np.uint64(4)
+            pending = np.uint64(0)
+        else:
+            if pending != 0:
+                out |= pending << pos
+                pos += np.uint64(4)
+            pending = exponent
+    if pending != 0:
+        out |= pending << pos
+    return out, score
+
+
+@njit(cache=True)
+def move(board: np.uint64, direction: int, tables):
+    """
+    Ejecuta un movimiento sobre el bitboard con cuatro lecturas de tabla.
+
+    Args:
+        board: Bitboard a mover
+        direction: UP, DOWN, LEFT o RIGHT
+        tables: ROW_TABLES
+
+    Returns:
+        (bitboard resultante, puntaje ganado por las combinaciones)
+    """
+    vertical = direction == UP or direction == DOWN
+    if vertical:
+        board = transpose(board)
+    side = ROW_LEFT if direction == UP or direction == LEFT else ROW_RIGHT
+
+    result = np.uint64(0)
+    score = 0
+    for i in range(4):
+        shift = np.uint64(16 * i)
+        row = (board >> shift) & ROW_MASK
+        result |= np.uint64(tables[side, row]) << shift
+        score += tables[ROW_SCORE, row]
+
+    if vertical:
+        result = transpose(result)
+    return result, score
+
+
+@njit(cache=True)
+def move_mask(board: np.uint64, tables) -> int:
+    """
+    Máscara de 4 bits con los movimientos legales (bit d = dirección d),
+    calculada con lecturas de tabla sin construir los tableros resultantes.
+    """
+    mask = 0
+    transposed = transpose(board)
+    for i in range(4):
+        shift = np.uint64(16 * i)
+        row = (board >> shift) & ROW_MASK
+        if tables[ROW_LEFT, row] != row:
+            mask |= 1 << LEFT
+        if tables[ROW_RIGHT, row] != row:
+            mask |= 1 << RIGHT
+        column = (transposed >> shift) & ROW_MASK
+        if tables[ROW_LEFT, column] != column:
+            mask |= 1 << UP
+        if tables[ROW_RIGHT, column] != column:
+            mask |= 1 << DOWN
+    return mask
+
+
+@njit(cache=True)
+def expand(board: np.uint64, tables, children) -> int:
+    """
+    Mueve el tablero en las 4 direcciones en una sola pasada.
+
+    Args:
+        board: Bitboard a expandir
+        tables: ROW_TABLES
+        children: Array uint64 de 4 posiciones donde se escribe el
+            resultado de cada dirección
+
+    Returns:
+        Máscara de 4 bits con los movimientos legales
+    """
+    mask = 0
+    for direction in range(4):
+        moved, _ = move(board, direction, tables)
+        children[direction] = moved
+        if moved != board:
+            mask |= 1 << direction
+    return mask
+
+
+@njit(cache=True)
+def expand_afterstates(board: np.uint64, tables, rows, children, scores, keys) -> int:
+    """
+    expand() que además devuelve el puntaje de cada movimiento y la clave
+    Zobrist de cada hijo legal (ver AfterstateCache.py).
+
+    Args:
+        board: Bitboard a expandir
+        tables: ROW_TABLES
+        rows: ZOBRIST_ROWS
+        children, scores, keys: Arrays de 4 posiciones donde se escriben el
+            hijo, el puntaje y la clave Zobrist de cada dirección
+
+    Returns:
+        Máscara de 4 bits con los movimientos legales
+    """
+    mask = 0
+    for direction in range(4):
+        moved, score = move(board, direction, tables)
+        children[direction] = moved
+        scores[direction] = score
+        keys[direction] = 0
+        if moved != board:
+            mask |= 1 << direction
+            keys[direction] = zobrist(moved, rows)
+    return mask
+
+
+@njit(cache=True)
+def expand_all(boards, tables, children, masks) -> None:
+    """
+    expand() sobre un array de bitboards.
+
+    Args:
+        boards: Array (K,) uint64
+        tables: ROW_TABLES
+        children: Array (K, 4) uint64 donde se escriben los hijos
+        masks: Array (K,) donde se escriben las máscaras de movimientos legales
+    """
+    for k in range(boards.shape[0]):
+        masks[k] = expand(boards[k], tables, children[k])
+
+
+@njit(cache=True)
+def spawn(board: np.uint64, index: int, exponent: int) -> np.uint64:
+    """
+    Coloca una ficha con el exponente dado en la `index`-ésima celda vacía
+    (en orden fila por fila, igual que GameBoard.get_available_cells).
+    """
+    empty = empty_mask(board)
+    for _ in range(index):
+        empty &= empty - np.uint64(1)  # Apaga el flag vacío más bajo
+    lowest = empty & (~empty + np.uint64(1))
+    if lowest == 0:
+        return board
+    return board | (lowest * np.uint64(exponent))
+
+
+# ============================================================
+# HASHING ZOBRIST
+# ============================================================
+
+@njit(cache=True)
+def zobrist(board: np.uint64, rows) -> np.uint64:
+    """Clave Zobrist del tablero: XOR de las claves de sus 4 filas."""
+    key = np.uint64(0)
+    for i in range(4):
+        key ^= rows[i, (board >> np.uint64(16 * i)) & ROW_MASK]
+    return key
+
+
+@njit(cache=True)
+def zobrist_update(key: np.uint64, old: np.uint64, new: np.uint64, rows) -> np.uint64:
+    """
+    Actualiza la clave Zobrist de `old` para obtener la de `new`, tocando
+    solo las filas que cambiaron.
+    """
+    for i in range(4):
+        shift = np.uint64(16 * i)
+        old_row = (old >> shift) & ROW_MASK
+        new_row = (new >> shift) & ROW_MASK
+        if old_row != new_row:
+            key ^= rows[i, old_row] ^ rows[i, new_row]
+    return key
+
+
+def _build_zobrist_tables(seed: int = 2048) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Genera las claves Zobrist: un valor de 64 bits al azar por celda y
+    exponente (0 para la celda vacía), y su XOR precalculado por fila.
+
+    Returns:
+        (cells, rows): arrays (16, 16) y (4, 65536) uint64
+    """
+    rng = np.random.default_rng(seed)
+    cells = rng.integers(0, 2**64, size=(16, 16), dtype=np.uint64, endpoint=False)
+    cells[:, 0] = 0
+    index = np.arange(65536)
+    rows = np.zeros((4, 65536), dtype=np.uint64)
+    for i in range(4):
+        for j in range(4):
+            rows[i] ^= cells[4 * i + j, (index >> (4 * j)) & 0xF]
+    return cells, rows
+
+
+# ZOBRIST_CELLS[4*i + j, e]: clave de la celda (i, j) con exponente e
+ZOBRIST_CELLS, ZOBRIST_ROWS = _build_zobrist_tables()
+
+
+# ============================================================
+# SIMETRÍAS
+# ============================================================
+# El tablero tiene 8 simetrías (grupo diedral del cuadrado). Cada una se
+# indica con un número de 3 bits que se aplican en este orden:
+#   4: transponer, 1: espejo horizontal (j -> 3 - j), 2: espejo vertical (i -> 3 - i)
+
+@njit(cache=True)
+def mirror(board: np.uint64) -> np.uint64:
+    """Espejo horizontal: la celda (i, j) pasa a (i, 3 - j)."""
+    result = np.uint64(0)
+    for i in range(4):
+        shift = np.uint64(16 * i)
+        result |= reverse_row((board >> shift) & ROW_MASK) << shift
+    return result
+
+
+@njit(cache=True)
+def flip(board: np.uint64) -> np.uint64:
+    """Espejo vertical: la celda (i, j) pasa a (3 - i, j)."""
+    return (((board >> np.uint64(48)) & ROW_MASK) |
+            ((board >> np.uint64(16)) & np.uint64(0x00000000FFFF0000)) |
+            ((board << np.uint64(16)) & np.uint64(0x0000FFFF00000000)) |
+            (board << np.uint64(48)))
+
+
+@njit(cache=True)
+def symmetry(board: np.uint64, sym: int) -> np.uint64:
+    """Aplica la simetría sym (0..7) al tablero."""
+    if sym & 4:
+        board = transpose(board)
+    if sym & 1:
+        board = mirror(board)
+    if sym & 2:
+        board = flip(board)
+    return board
+
+
+@njit(cache=True)
+def canonical(board: np.uint64):
+    """
+    Representante canónico del tablero: el menor de sus 8 simétricos.
+
+    Returns:
+        (tablero canónico, simetría que lleva el tablero al canónico)
+    """
+    best = board
+    best_sym = 0
+    for sym in range(1, 8):
+        candidate = symmetry(board, sym)
+        if candidate < best:
+            best = candidate
+            best_sym = sym
+    return best, best_sym
+
+
+@njit(cache=True)
+def canonical_zobrist(board: np.uint64, rows):
+    """
+    Clave Zobrist del representante canónico del tablero.
+
+    Returns:
+        (clave, simetría que lleva el tablero al canónico)
+    """
+    best, best_sym = canonical(board)
+    return zobrist(best, rows), best_sym
+
+
+def _build_symmetry_maps() -> tuple[list, list]:
+    """
+    SYMMETRY_MOVES[sym][d]: dirección en el tablero transformado equivalente
+    a la dirección d en el original. SYMMETRY_CELLS[sym][4*i + j]: celda del
+    tablero transformado que corresponde a la celda (i, j) del original.
+    """
+    moves = []
+    cells = []
+    for sym in range(8):
+        move_map = list(dirs)
+        cell_map = []
+        for i in range(4):
+            for j in range(4):
+                ti, tj = i, j
+                if sym & 4:
+                    ti, tj = tj, ti
+                if sym & 1:
+                    tj = 3 - tj
+                if sym & 2:
+                    ti = 3 - ti
+                cell_map.append(4 * ti + tj)
+        if sym & 4:
+            move_map = [{UP: LEFT, DOWN: RIGHT, LEFT: UP, RIGHT: DOWN}[d] for d in move_map]
+        if sym & 1:
+            move_map = [{LEFT: RIGHT, RIGHT: LEFT}.get(d, d) for d in move_map]
+        if sym & 2:
+            move_map = [{UP: DOWN, DOWN: UP}.get(d, d) for d in move_map]
+        moves.append(move_map)
+        cells.append(cell_map)
+    return moves, cells
+
+
+SYMMETRY_MOVES, SYMMETRY_CELLS = _build_symmetry_maps()
+# Inversas: del tablero transformado al original
+SYMMETRY_MOVES_INV = [[row.index(d) for d in range(4)] for row in SYMMETRY_MOVES]
+SYMMETRY_CELLS_INV = [[row.index(k) for k in range(16)] for row in SYMMETRY_CELLS]
+
+
+# ============================================================
+# TABLAS DE FILAS
+# ============================================================
+
+# Filas (o líneas) que se recalculan para validar una tabla guardada: una
+# muestra de todo el rango más casos borde, como dos fichas de 32768 (0x00FF)
+CHECK_LINES = np.array(sorted(set(range(0, 65536, 257)) |
+                              {0x00FF, 0xFF00, 0x0FF0, 0xFFFF, 0x1111, 0x2211, 0xEEFF}),
+                       dtype=np.int64)
+
+
+@njit(cache=True)
+def _build_row_tables(tables, rows) -> None:
+    """Escribe en la columna k de tables el resultado de la fila rows[k]."""
+    for k in range(rows.shape[0]):
+        row_bits = np.uint64(rows[k])
+        left, score = move_row_left(row_bits)
+        right, _ = move_row_left(reverse_row(row_bits))
+        tables[ROW_LEFT, k] = left
+        tables[ROW_RIGHT, k] = reverse_row(right)
+        tables[ROW_SCORE, k] = score
+
+
+def load_cached_table(path: str, build, shape: tuple, dtype, check=None) -> np.ndarray:
+    """
+    Carga con memory-map una tabla guardada en `path`. Si no existe, la
+    genera con build() y la guarda primero (escritura atómica, así varios
+    procesos pueden generarla a la vez sin dejar archivos a medio escribir).
+
+    Una tabla guardada se reutiliza solo si tiene la forma y el tipo
+    esperados y check(tabla) da True (p. ej. recalcular algunas entradas con
+    el código actual); si no, es de una versión anterior del generador y se
+    vuelve a generar.
+    """
+    if os.path.exists(path):
+        try:
+            table = np.asarray(np.load(path, mmap_mode='r'))
+        except (OSError, ValueError):
+            table = None  # Archivo dañado o con otro formato
+        if (table is not None and table.shape == shape and table.dtype == dtype and
+                (check is None or check(table))):
+            return table
+        del table
+
+    table = build()
+    try:
+        fd, tmp_path = tempfile.mkstemp(suffix='.npy', dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, table)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except OSError:
+        return table  # Directorio de solo lectura: se usa en memoria
+    return np.asarray(np.load(path, mmap_mode='r'))
+
+
+def load_row_tables(path: str = ROW_TABLES_PATH) -> np.ndarray:
+    """
+    Carga las tablas de movimiento por fila, generándolas la primera vez
+    (o si las guardadas no coinciden con el código actual).
+
+    Returns:
+        Array (3, 65536) uint32 con filas ROW_LEFT, ROW_RIGHT y ROW_SCORE
+    """
+    def build():
+        tables = np.zeros((3, 65536), dtype=np.uint32)
+        _build_row_tables(tables, np.arange(65536))
+        return tables
+
+    def check(tables):
+        expected = np.zeros((3, CHECK_LINES.size), dtype=np.uint32)
+        _build_row_tables(expected, CHECK_LINES)
+        return np.array_equal(tables[:, CHECK_LINES], expected)
+
+    return load_cached_table(path, build, (3, 65536), np.uint32, check)
+
+
+ROW_TABLES = load_row_tables()
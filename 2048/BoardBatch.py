@@ -0,0 +1,225 @@
+"""
+Simulación vectorizada de muchas partidas de 2048 en paralelo.
+
+BoardBatch guarda N tableros como un array contiguo de N bitboards uint64
+(ver Bitboard.py) y aplica movimientos, aparición de fichas, máscaras de
+movimientos legales y detección de fin de juego a todos a la vez con
+kernels de numba, sin un loop de Python por tablero.
+"""
+import numpy as np
+from numba import njit
+
+import Bitboard
+from GameBoard import GameBoard
+
+
+# ============================================================
+# KERNELS
+# ============================================================
+
+@njit(cache=True)
+def _move_all(boards, moves, tables, changed, scores) -> None:
+    for k in range(boards.shape[0]):
+        moved, score = Bitboard.move(boards[k], moves[k], tables)
+        changed[k] = moved != boards[k]
+        scores[k] = score
+        boards[k] = moved
+
+
+@njit(cache=True)
+def _spawn_all(boards, active, cell_draws, value_draws) -> None:
+    for k in range(boards.shape[0]):
+        if not active[k]:
+            continue
+        num_empty = Bitboard.count_empty(boards[k])
+        if num_empty == 0:
+            continue
+        index = min(int(cell_draws[k] * num_empty), num_empty - 1)
+        exponent = 1 if value_draws[k] < 0.9 else 2
+        boards[k] = Bitboard.spawn(boards[k], index, exponent)
+
+
+@njit(cache=True)
+def _greedy_moves(boards, tables, draws, out) -> None:
+    for k in range(boards.shape[0]):
+        best = -1.0
+        out[k] = 0
+        for direction in range(4):
+            moved, score = Bitboard.move(boards[k], direction, tables)
+            if moved == boards[k]:
+                continue
+            value = score + draws[k, direction]  # draws en [0, 1): solo desempata
+            if value > best:
+                best = value
+                out[k] = direction
+
+
+@njit(cache=True)
+def _move_masks(boards, tables, masks) -> None:
+    for k in range(boards.shape[0]):
+        masks[k] = Bitboard.move_mask(boards[k], tables)
+
+
+@njit(cache=True)
+def _max_exponents(boards, out) -> None:
+    for k in range(boards.shape[0]):
+        out[k] = Bitboard.max_exponent(boards[k])
+
+
+@njit(cache=True)
+def _count_empty(boards, out) -> None:
+    for k in range(boards.shape[0]):
+        out[k] = Bitboard.count_empty(boards[k])
+
+
+@njit(cache=True)
+def _tile_sums(boards, out) -> None:
+    for k in range(boards.shape[0]):
+        out[k] = Bitboard.tile_sum(boards[k])
+
+
+# ============================================================
+# BATCH DE TABLEROS
+# ============================================================
+
+class BoardBatch:
+    """
+    N tableros que avanzan en paralelo.
+    - boards: array (N,) uint64 con un bitboard por partida
+    """
+
+    def __init__(self, boards: np.ndarray):
+        """
+        Args:
+            boards: Array de bitboards (se convierte a uint64 contiguo)
+        """
+        self.boards = np.ascontiguousarray(boards, dtype=np.uint64)
+
+    @classmethod
+    def new_games(cls, n: int, rng: np.random.Generator = None) -> 'BoardBatch':
+        """Crea N partidas nuevas, cada una con dos fichas al azar"""
+        rng = rng if rng is not None else np.random.default_rng()
+        batch = cls(np.zeros(n, dtype=np.uint64))
+        batch.spawn(rng)
+        batch.spawn(rng)
+        return batch
+
+    @classmethod
+    def from_boards(cls, boards: list[GameBoard]) -> 'BoardBatch':
+        """Crea un batch a partir de una lista de GameBoard"""
+        return cls(np.array([board.bits for board in boards], dtype=np.uint64))
+
+    def to_boards(self, backend: str = 'array') -> list[GameBoard]:
+        """Devuelve los tableros del batch como GameBoard"""
+        return [GameBoard.from_bits(bits, backend) for bits in self.boards]
+
+    def __len__(self) -> int:
+        return self.boards.shape[0]
+
+    def copy(self) -> 'BoardBatch':
+        """Devuelve otro batch igual"""
+        return BoardBatch(self.boards.copy())
+
+    def move(self, moves: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Mueve cada tablero en su dirección (in-place).
+
+        Args:
+            moves: Array (N,) con la dirección de cada tablero
+
+        Returns:
+            (changed, scores): si el tablero cambió y el puntaje de las
+            combinaciones de cada tablero
+        """
+        moves = np.ascontiguousarray(moves, dtype=np.int64)
+        changed = np.empty(len(self), dtype=np.bool_)
+        scores = np.empty(len(self), dtype=np.int64)
+        _move_all(self.boards, moves, Bitboard.ROW_TABLES, changed, scores)
+        return changed, scores
+
+    def spawn(self, rng: np.random.Generator, active: np.ndarray = None) -> None:
+        """
+        Agrega una ficha al azar (2 con 90%, 4 con 10%) en una celda vacía
+        de cada tablero activo.
+
+        Args:
+            rng: Generador de números aleatorios
+            active: Máscara booleana (N,) de tableros a los que agregar ficha
+                (todos si es None)
+        """
+        if active is None:
+            active = np.ones(len(self), dtype=np.bool_)
+        cell_draws = rng.random(len(self))
+        value_draws = rng.random(len(self))
+        _spawn_all(self.boards, active, cell_draws, value_draws)
+
+    def play(self, moves: np.ndarray, rng: np.random.Generator,
+             active: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Equivalente a GameBoard.play para todo el batch: mueve, agrega una
+        ficha y detecta fin de juego. Los tableros inactivos no se modifican.
+
+        Returns:
+            (done, scores): fin de juego y puntaje de combinaciones por tablero
+        """
+        if active is None:
+            active = np.ones(len(self), dtype=np.bool_)
+        previous = self.boards.copy()
+        _, scores = self.move(moves)
+        self.boards[~active] = previous[~active]
+        scores[~active] = 0
+        self.spawn(rng, active)
+        return self.terminal(), scores
+
+    def move_masks(self) -> np.ndarray:
+        """Máscara de 4 bits de movimientos legales de cada tablero"""
+        masks = np.empty(len(self), dtype=np.uint8)
+        _move_masks(self.boards, Bitboard.ROW_TABLES, masks)
+        return masks
+
+    def terminal(self) -> np.ndarray:
+        """Array booleano con los tableros sin movimientos legales"""
+        return self.move_masks() == 0
+
+    def max_tiles(self) -> np.ndarray:
+        """Valor de la ficha más grande de cada tablero"""
+        exponents = np.empty(len(self), dtype=np.int64)
+        _max_exponents(self.boards, exponents)
+        return np.where(exponents > 0, 1 << exponents, 0)
+
+    def count_empty(self) -> np.ndarray:
+        """Cantidad de celdas vacías de cada tablero"""
+        out = np.empty(len(self), dtype=np.int64)
+        _count_empty(self.boards, out)
+        return out
+
+    def tile_sums(self) -> np.ndarray:
+        """Suma de todas las fichas de cada tablero"""
+        out = np.empty(len(self), dtype=np.int64)
+        _tile_sums(self.boards, out)
+        return out
+
+
+def random_legal_moves(masks: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Elige al azar un movimiento legal por tablero a partir de las máscaras
+    (devuelve 0 para los tableros sin movimientos).
+    """
+    # Puntaje aleatorio por dirección, -1 para las ilegales; gana el mayor
+    legal = (masks[:, None] >> np.arange(4, dtype=np.uint8)) & 1
+    draws = np.where(legal == 1, rng.random((len(masks), 4)), -1.0)
+    return np.argmax(draws, axis=1)
+
+
+def greedy_legal_moves(boards: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Elige por tablero el movimiento legal con mayor puntaje de combinaciones
+    inmediato, desempatando al azar (devuelve 0 para los tableros sin
+    movimientos).
+
+    Args:
+        boards: Array de bitboards (p. ej. BoardBatch.boards)
+    """
+    out = np.empty(boards.shape[0], dtype=np.int64)
+    _greedy_moves(boards, Bitboard.ROW_TABLES, rng.random((boards.shape[0], 4)), out)
+    return out
@@ -3,8 +3,22 @@ Agente que utiliza el algoritmo Expectimax para jugar 2048.
 Expectimax es más adecuado para juegos con elementos aleatorios (estocásticos).
 """
 from Agent import Agent
+from AfterstateCache import AfterstateCache
 from GameBoard import GameBoard
+from Heuristics import (HEURISTIC_BOUNDS, evaluate_batch, evaluate_children,
+                        heuristic_bounds, heuristic_is_symmetric, heuristic_spec)
+from LatencyModel import LatencyModel, board_features
+from NativeSearch import NativeTable
+from ParallelSearch import SearchPool
+from TranspositionTable import MAX_NODE_KEY, TranspositionTable
+import Bitboard
+import NativeSearch
 import numpy as np
+import time
+
+
+class _SearchTimeout(Exception):
+    """Se lanza dentro de la búsqueda cuando se agota time_budget_ms."""
 
 
 class ExpectimaxAgent(Agent):
@@ -14,24 +28,108 @@ class ExpectimaxAgent(Agent):
     - Nodos CHANCE: calcula el valor esperado de las fichas aleatorias
     """
     
-    def __init__(self, depth=4, weights=None, weights_config=None):
+    PRUNING_MODES = (None, 'star1', 'star2')
+    ENGINES = ('python', 'native')
+    
+    def __init__(self, depth=4, weights=None, weights_config=None, time_budget_ms=None,
+                 prob_threshold=None, workers=None, parallel_chance=False,
+                 pruning=None, heuristic_bounds=None, engine='python', target_latency_ms=None,
+                 latency_model=None):
         """
         Args:
             depth: Profundidad máxima de búsqueda
             weights: DEPRECATED - No se usa
             weights_config: DEPRECATED - No se usa
+            time_budget_ms: Tiempo máximo por movimiento. Si se indica, se usa
+                iterative deepening en lugar de la profundidad adaptativa
+            prob_threshold: Si se indica, los nodos de chance son exactos (todas
+                las celdas, fichas 2 y 4) y las ramas cuya probabilidad acumulada
+                es menor al umbral (p. ej. 1e-4) se cortan con la heurística
+            workers: Si es mayor a 1, los movimientos de la raíz se evalúan en
+                paralelo en un pool persistente de procesos (ver ParallelSearch.py).
+                Con time_budget_ms el tiempo se controla entre iteraciones
+            parallel_chance: Con workers, repartir también los hijos del primer
+                nodo de chance (más tareas que movimientos)
+            pruning: None, 'star1' o 'star2' (poda de nodos de chance de Ballard,
+                usando cotas de la heurística). Requiere prob_threshold: con
+                muestreo de celdas el valor de un nodo de chance se escala por
+                celdas vacías / muestreadas y deja de estar dentro de las cotas
+            heuristic_bounds: (cota inferior, cota superior) fija de la heurística.
+                Si es None se toman de Heuristics.HEURISTIC_BOUNDS en cada nodo,
+                según la ficha máxima que pueden alcanzar sus hojas
+            engine: 'python' o 'native' (búsqueda compilada con numba, ver
+                NativeSearch.py; sin pruning ni workers)
+            target_latency_ms: Si se indica, la profundidad adaptativa es la
+                más profunda que latency_model estima que entra en esta latencia
+                por jugada (con los umbrales fijos mientras no tenga datos)
+            latency_model: LatencyModel (p. ej. entrenado con jugadas
+                registradas). Si no se indica y hay target_latency_ms, se crea
+                uno vacío que aprende online
         """
+        if pruning not in self.PRUNING_MODES:
+            raise ValueError(f"Poda '{pruning}' desconocida. Opciones: {self.PRUNING_MODES}")
+        if engine not in self.ENGINES:
+            raise ValueError(f"Motor '{engine}' desconocido. Opciones: {self.ENGINES}")
+        if engine == 'native' and (pruning is not None or (workers is not None and workers > 1)):
+            raise ValueError("El motor 'native' no admite pruning ni workers")
+        if pruning is not None and prob_threshold is None:
+            raise ValueError("La poda Star1/Star2 requiere prob_threshold (nodos de chance exactos)")
         self.depth = depth
+        self.time_budget_ms = time_budget_ms
+        self.prob_threshold = prob_threshold
+        self.workers = workers
+        self.parallel_chance = parallel_chance
+        self.pruning = pruning
+        self.heuristic_bounds = heuristic_bounds
+        self.engine = engine
+        self.target_latency_ms = target_latency_ms
+        if latency_model is None and target_latency_ms is not None:
+            latency_model = LatencyModel()
+        self.latency_model = latency_model  # Aprende de cada jugada con profundidad adaptativa
+        self.native_cache_size = 1 << 20  # Capacidad de la tabla del motor nativo
+        self.max_depth = 20  # Tope de profundidad del iterative deepening
         self.heuristic_func = None  # Se asigna externamente
         
         self.nodes_explored = 0  # Para estadísticas
+        self.pruned_nodes = 0
+        self.slides = 0  # Movimientos de tablero calculados (4 por expansión no memorizada)
+        self.completed_depth = 0  # Profundidad de la última búsqueda completa
         self.use_adaptive_depth = True  # Activar profundidad adaptativa
+        self.use_batch_eval = True  # Evaluar en batch las hojas de los nodos de chance de profundidad 1
+        
+        self._deadline = None
+        self._next_time_check = np.inf  # nodes_explored al que se vuelve a mirar el reloj
+        self._prob_truncated = False  # Hubo un corte por prob_threshold (ver ExpectimaxAgentOptimized)
+        self._pool = None  # Se crea en el primer play() con workers
+        self._bounds = None  # Cotas de la heurística para la poda (se resuelven en play)
+        self.afterstates = AfterstateCache()  # Movimientos ya calculados (entre ramas y turnos)
+        self._native_table = None  # Tabla del motor nativo (se crea en el primer play)
+    
+    def __getstate__(self) -> dict:
+        # El pool y el reloj no se serializan (el agente se copia a los procesos del pool)
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        state['_deadline'] = None
+        state['_next_time_check'] = np.inf
+        return state
+    
+    def close(self) -> None:
+        """Termina el pool de procesos, si hay uno"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
     
     def get_adaptive_depth(self, board: GameBoard) -> int:
         """Ajusta profundidad según número de celdas vacías."""
         if not self.use_adaptive_depth:
             return self.depth
         
+        if self.target_latency_ms is not None:
+            depth = self.latency_model.choose_depth(board, self.target_latency_ms,
+                                                    max_depth=self.max_depth)
+            if depth is not None:
+                return depth
+        
         empty_cells = len(board.get_available_cells())
         
         if empty_cells <= 3:
@@ -45,39 +143,209 @@ class ExpectimaxAgent(Agent):
     
     def play(self, board: GameBoard) -> int:
         """
-        Elige la mejor acción usando Expectimax con profundidad adaptativa.
+        Elige la mejor acción usando Expectimax con profundidad adaptativa,
+        o con iterative deepening si hay time_budget_ms.
         
         Returns:
             Acción a tomar (0=UP, 1=DOWN, 2=LEFT, 3=RIGHT)
         """
         self.nodes_explored = 0
+        self.pruned_nodes = 0
+        self.slides = 0
+        
+        if self.engine == 'native':
+            return self._native_play(board)
+        
+        _, available_moves, children = self._expand_node(board)
+        
+        if not available_moves:
+            return 0  # No hay movimientos válidos
+        
+        if self.pruning is not None:
+            self._bounds = self._resolve_bounds()
+        
+        if self.time_budget_ms is not None:
+            return self._iterative_deepening(children, available_moves)
         
         # Usar profundidad adaptativa
         depth = self.get_adaptive_depth(board)
+        start = time.perf_counter()
+        best_action, _ = self._search_root(children, available_moves, depth)
+        self.completed_depth = depth
+        self._observe_latency(board, depth, start)
+        return best_action
+    
+    def _native_play(self, board: GameBoard) -> int:
+        """
+        play() con la búsqueda compilada: misma profundidad adaptativa (o
+        iterative deepening con time_budget_ms) y mismo criterio de elección
+        en la raíz, con la tabla del motor conservada entre turnos.
+        """
+        moves = board.get_available_moves()
+        if not moves:
+            return 0  # No hay movimientos válidos
         
-        best_action = None
-        best_value = -np.inf
+        if self._native_table is None:
+            self._native_table = NativeTable(self.native_cache_size)
+        self._native_table.new_search()
+        heuristic = NativeSearch.agent_heuristic(self.heuristic_func)
+        threshold = self.prob_threshold if self.prob_threshold is not None else -1.0
+        stats = np.zeros(NativeSearch.NUM_STATS, dtype=np.int64)
+        values = np.empty(4)
         
-        available_moves = board.get_available_moves()
+        def search(depth: int) -> int:
+            NativeSearch.expectimax_root(board.bits, depth, threshold, heuristic,
+                                         self._native_table.arrays(), Bitboard.ROW_TABLES,
+                                         stats, values)
+            best_action = moves[0]
+            for move in moves:
+                if values[move] > values[best_action]:
+                    best_action = move
+            return best_action
         
-        if not available_moves:
-            return 0  # No hay movimientos válidos
+        if self.time_budget_ms is not None:
+            best_action, self.completed_depth = NativeSearch.iterative_deepening(
+                search, self.time_budget_ms, self.max_depth)
+        else:
+            depth = self.get_adaptive_depth(board)
+            start = time.perf_counter()
+            best_action = search(depth)
+            self.completed_depth = depth
+        self.nodes_explored = int(stats[NativeSearch.NODES])
+        self.slides = int(stats[NativeSearch.SLIDES])
+        if self.time_budget_ms is None:
+            self._observe_latency(board, depth, start)
+        return best_action
+    
+    def _observe_latency(self, board: GameBoard, depth: int, start: float) -> None:
+        """Registra en latency_model el tiempo y los nodos de la búsqueda que empezó en start."""
+        if self.latency_model is not None:
+            self.latency_model.observe(board_features(board), depth, time.perf_counter() - start,
+                                       self.nodes_explored, self.target_latency_ms)
+    
+    def _search_root(self, children: list, moves: list, depth: int) -> tuple[int, dict]:
+        """
+        Evalúa los movimientos de la raíz en el orden dado.
+        
+        Returns:
+            (mejor movimiento, valor de cada movimiento)
+        """
+        if self.workers is not None and self.workers > 1:
+            values = self._parallel_root_values(children, moves, depth)
+            best_action = max(moves, key=lambda move: values[move])
+            return best_action, values
+        
+        best_action = None
+        best_value = -np.inf
+        values = {}
         
         # Evaluar cada movimiento posible
-        for move in available_moves:
-            board_copy = board.clone()
-            board_copy.move(move)
-            
-            # Calcular valor esperado del movimiento
-            value = self.expectimax(board_copy, depth - 1, False)
+        for move in moves:
+            # Calcular valor esperado del movimiento (con poda, basta saber si
+            # supera al mejor hasta ahora)
+            if self.pruning is not None:
+                value = self.expectimax(children[move], depth - 1, False, 1.0, best_value, np.inf)
+            else:
+                value = self.expectimax(children[move], depth - 1, False)
+            values[move] = value
             
             if value > best_value:
                 best_value = value
                 best_action = move
         
-        return best_action if best_action is not None else available_moves[0]
+        return (best_action if best_action is not None else moves[0]), values
+    
+    def _parallel_root_values(self, children: list, moves: list, depth: int) -> dict:
+        """
+        Valor de cada movimiento de la raíz calculado en el pool de procesos:
+        una tarea por movimiento o, con parallel_chance, una por cada hijo del
+        nodo de chance que sigue a cada movimiento (el muestreo de celdas y la
+        combinación de valores se hacen acá, igual que en chance_node).
+        """
+        if self._pool is None:
+            self._pool = SearchPool(self, self.workers)
+        
+        if not self.parallel_chance or depth < 2:
+            tasks = [('expectimax', children[move].key(), (depth - 1, False)) for move in moves]
+            results = self._pool.run(tasks)
+            self._add_worker_stats(results)
+            return {move: value for move, (value, _, _, _) in zip(moves, results)}
+        
+        tasks = []
+        plans = []
+        for move in moves:
+            child = children[move]
+            self.nodes_explored += 1  # Nodo de chance de la raíz
+            plan = self._chance_plan(child.get_available_cells(), depth - 1, 1.0)
+            cells_to_evaluate, _, both_tiles, prob_2, prob_4 = plan
+            plans.append(plan)
+            for cell in cells_to_evaluate:
+                for tile, tile_prob in ((2, prob_2), (4, prob_4))[:2 if both_tiles else 1]:
+                    board_copy = child.clone()
+                    board_copy.insert_tile(cell, tile)
+                    tasks.append(('expectimax', board_copy.key(), (depth - 1, True, tile_prob)))
+        
+        results = self._pool.run(tasks)
+        self._add_worker_stats(results)
+        node_values = iter(value for value, _, _, _ in results)
+        
+        values = {}
+        for move, (cells_to_evaluate, weight_per_cell, both_tiles, _, _) in zip(moves, plans):
+            expected_value = 0.0
+            for _ in cells_to_evaluate:
+                value_2 = next(node_values)
+                if both_tiles:
+                    cell_value = 0.9 * value_2 + 0.1 * next(node_values)
+                else:
+                    cell_value = value_2
+                expected_value += cell_value * weight_per_cell
+            values[move] = expected_value / len(cells_to_evaluate)
+        return values
+    
+    def _add_worker_stats(self, results: list) -> None:
+        """Suma a las estadísticas del agente los nodos explorados en el pool"""
+        self.nodes_explored += sum(nodes for _, nodes, _, _ in results)
+        self.pruned_nodes += sum(pruned for _, _, pruned, _ in results)
+        self.slides += sum(slides for _, _, _, slides in results)
+    
+    def _iterative_deepening(self, children: list, moves: list) -> int:
+        """
+        Búsqueda anytime: profundiza d = 1, 2, 3, ... hasta agotar
+        time_budget_ms y devuelve el mejor movimiento de la última iteración
+        completa. Cada iteración evalúa primero los movimientos que mejor
+        resultaron en la anterior.
+        """
+        deadline = time.perf_counter() + self.time_budget_ms / 1000
+        best_action = moves[0]
+        self.completed_depth = 0
+        
+        try:
+            for depth in range(1, self.max_depth + 1):
+                best_action, values = self._search_root(children, moves, depth)
+                self.completed_depth = depth
+                moves = sorted(moves, key=lambda move: values[move], reverse=True)
+                
+                # La primera iteración corre sin reloj: siempre hay una jugada
+                self._deadline = deadline
+                self._next_time_check = self.nodes_explored
+                if time.perf_counter() > deadline:
+                    break
+        except _SearchTimeout:
+            pass  # Se descarta la iteración incompleta
+        finally:
+            self._deadline = None
+            self._next_time_check = np.inf
+        
+        return best_action
+    
+    def _check_time(self) -> None:
+        """Mira el reloj cada 256 nodos y corta la búsqueda si se pasó el tiempo."""
+        self._next_time_check = self.nodes_explored + 256
+        if time.perf_counter() > self._deadline:
+            raise _SearchTimeout
     
-    def expectimax(self, board: GameBoard, depth: int, is_maximizing: bool) -> float:
+    def expectimax(self, board: GameBoard, depth: int, is_maximizing: bool,
+                   prob: float = 1.0, alpha: float = -np.inf, beta: float = np.inf) -> float:
         """
         Algoritmo Expectimax recursivo.
         
@@ -85,56 +353,139 @@ class ExpectimaxAgent(Agent):
             board: Estado actual del tablero
             depth: Profundidad restante
             is_maximizing: True si es turno del jugador (MAX), False si es nodo de chance
+            prob: Probabilidad acumulada de llegar a este nodo (ver prob_threshold)
+            alpha, beta: Ventana de la poda Star1/Star2 (sin poda no se usan)
         
         Returns:
-            Valor del estado
+            Valor del estado (con poda, si queda fuera de la ventana es solo
+            una cota: <= alpha o >= beta)
         """
         self.nodes_explored += 1
+        if self.nodes_explored >= self._next_time_check:
+            self._check_time()
         
-        # Caso base: profundidad 0 o juego terminado
-        if depth == 0 or len(board.get_available_moves()) == 0:
+        # Caso base: profundidad 0 o rama improbable
+        if depth == 0:
+            return self.heuristic_utility(board)
+        if self.prob_threshold is not None and prob < self.prob_threshold:
+            self._prob_truncated = True
             return self.heuristic_utility(board)
         
         if is_maximizing:
-            # Nodo MAX: el jugador elige la mejor acción
-            return self.max_node(board, depth)
+            # Nodo MAX: el jugador elige la mejor acción. La misma expansión
+            # sirve para ver si el juego terminó y para generar los hijos
+            expansion = self._expand_node(board)
+            if expansion[0]:
+                return self.heuristic_utility(board)
+            return self.max_node(board, depth, prob, alpha, beta, expansion)
         else:
-            # Nodo CHANCE: se agrega una ficha aleatoria
-            return self.chance_node(board, depth)
+            # Nodo CHANCE: se agrega una ficha aleatoria. Viene de un
+            # movimiento legal, así que tiene celdas vacías y no es terminal
+            return self.chance_node(board, depth, prob, alpha, beta)
+    
+    def _expand_node(self, board: GameBoard) -> tuple[bool, list, list]:
+        """GameBoard.expand_node con la memo del agente, contando los movimientos calculados."""
+        if self.afterstates is None:
+            self.slides += 4
+            return board.expand_node()
+        misses = self.afterstates.misses
+        expansion = board.expand_node(self.afterstates)
+        self.slides += 4 * (self.afterstates.misses - misses)
+        return expansion
     
-    def max_node(self, board: GameBoard, depth: int) -> float:
+    def max_node(self, board: GameBoard, depth: int, prob: float = 1.0,
+                 alpha: float = -np.inf, beta: float = np.inf, expansion: tuple = None) -> float:
         """
         Nodo maximizador: el jugador elige la mejor acción.
+        expansion es el resultado de _expand_node si ya se calculó.
         """
         max_value = -np.inf
-        available_moves = board.get_available_moves()
+        terminal, _, children = expansion if expansion is not None else self._expand_node(board)
         
-        if not available_moves:
+        if terminal:
             return self.heuristic_utility(board)
         
-        for move in available_moves:
-            board_copy = board.clone()
-            board_copy.move(move)
+        for child in children:
+            if child is None:
+                continue
             
             # Después del movimiento del jugador, viene un nodo de chance
-            value = self.expectimax(board_copy, depth - 1, False)
+            if self.pruning is not None:
+                value = self.expectimax(child, depth - 1, False, prob, max(alpha, max_value), beta)
+            else:
+                value = self.expectimax(child, depth - 1, False, prob)
             max_value = max(max_value, value)
+            
+            if self.pruning is not None and max_value >= beta:
+                self.pruned_nodes += 1
+                break  # Poda Beta
         
         return max_value
     
-    def chance_node(self, board: GameBoard, depth: int) -> float:
+    def chance_node(self, board: GameBoard, depth: int, prob: float = 1.0,
+                    alpha: float = -np.inf, beta: float = np.inf) -> float:
         """
         Nodo de chance: calcula el valor esperado de agregar fichas aleatorias.
-        Optimizado con muestreo adaptativo según profundidad.
+        Optimizado con muestreo adaptativo según profundidad, o exacto con
+        corte por probabilidad si hay prob_threshold. Con pruning se poda
+        con Star1/Star2 (salvo en profundidad 1, que se evalúa en batch).
         """
         available_cells = board.get_available_cells()
         
         if not available_cells:
             return self.heuristic_utility(board)
         
+        cells_to_evaluate, weight_per_cell, both_tiles, prob_2, prob_4 = \
+            self._chance_plan(available_cells, depth, prob)
+        
+        if depth == 1:
+            spec = self._batch_spec()
+            if spec is not None:
+                cut = self.prob_threshold is not None
+                return self._leaf_chance_node(board, cells_to_evaluate, weight_per_cell, spec,
+                                              cut_2=cut and prob_2 < self.prob_threshold,
+                                              cut_4=cut and prob_4 < self.prob_threshold)
+        
+        if self.pruning is not None:
+            return self._star_chance_node(board, depth, alpha, beta, cells_to_evaluate,
+                                          weight_per_cell, both_tiles, prob_2, prob_4)
+        
         expected_value = 0.0
+        
+        # Evaluar cada posible ficha nueva
+        for cell in cells_to_evaluate:
+            board_copy = board.clone()
+            board_copy.insert_tile(cell, 2)
+            value_2 = self.expectimax(board_copy, depth, True, prob_2)
+            
+            if both_tiles:
+                board_copy = board.clone()
+                board_copy.insert_tile(cell, 4)
+                value_4 = self.expectimax(board_copy, depth, True, prob_4)
+                
+                cell_value = 0.9 * value_2 + 0.1 * value_4
+            else:
+                cell_value = value_2
+            
+            expected_value += cell_value * weight_per_cell
+        
+        # Promedio sobre todas las celdas evaluadas
+        return expected_value / len(cells_to_evaluate)
+    
+    def _chance_plan(self, available_cells: list, depth: int, prob: float) -> tuple:
+        """
+        Decide qué hijos evalúa un nodo de chance.
+        
+        Returns:
+            (celdas, peso por celda, si se evalúa también la ficha 4,
+            probabilidad acumulada de los hijos con ficha 2 y con ficha 4)
+        """
         num_empty = len(available_cells)
         
+        if self.prob_threshold is not None:
+            # Exacto: todas las celdas con ficha 2 (90%) y 4 (10%), sin RNG
+            return available_cells, 1.0, True, prob * 0.9 / num_empty, prob * 0.1 / num_empty
+        
         # Muestreo adaptativo según profundidad (OPTIMIZACIÓN CLAVE)
         if depth >= 2:
             max_cells = 3  # Solo 3 celdas en niveles altos
@@ -151,29 +502,162 @@ class ExpectimaxAgent(Agent):
             cells_to_evaluate = available_cells
             weight_per_cell = 1.0
         
-        # Evaluar cada posible ficha nueva
-        for cell in cells_to_evaluate:
-            # Solo evaluar ficha 2 en niveles profundos (simplificación estocástica)
-            if depth >= 2:
-                board_copy = board.clone()
-                board_copy.insert_tile(cell, 2)
-                cell_value = self.expectimax(board_copy, depth, True)
-            else:
-                # Evaluar ambos valores solo cerca de hojas
-                board_copy = board.clone()
-                board_copy.insert_tile(cell, 2)
-                value_2 = self.expectimax(board_copy, depth, True)
-                
+        # Solo evaluar ficha 2 en niveles profundos (simplificación estocástica),
+        # ambos valores solo cerca de hojas
+        return cells_to_evaluate, weight_per_cell, depth < 2, prob, prob
+    
+    def _star_chance_node(self, board: GameBoard, depth: int, alpha: float, beta: float,
+                          cells: list, weight_per_cell: float, both_tiles: bool,
+                          prob_2: float, prob_4: float) -> float:
+        """
+        Nodo de chance con poda Star1 (Ballard, 1983): con las cotas [L, U] de
+        la heurística, la parte todavía no evaluada del valor esperado queda
+        acotada, y el nodo se corta cuando ya no puede quedar dentro de
+        (alpha, beta). Cada hijo se busca con la ventana más chica que todavía
+        puede cambiar el resultado.
+        
+        Star2 agrega una fase de sondeo: de cada hijo (nodo MAX) se busca solo
+        su primer movimiento, lo que da una cota inferior del hijo más ajustada
+        que L (y puede cortar el nodo sin la búsqueda completa). Solo se usa
+        con prob_threshold: los hijos son todos los de un nodo de chance exacto.
+        """
+        lower, upper = self._node_bounds(board, depth)
+        
+        # Hijos: (tablero, probabilidad acumulada, peso en el valor esperado)
+        children = []
+        for cell in cells:
+            board_copy = board.clone()
+            board_copy.insert_tile(cell, 2)
+            weight_2 = 0.9 if both_tiles else 1.0
+            children.append((board_copy, prob_2, weight_2 * weight_per_cell / len(cells)))
+            if both_tiles:
                 board_copy = board.clone()
                 board_copy.insert_tile(cell, 4)
-                value_4 = self.expectimax(board_copy, depth, True)
-                
-                cell_value = 0.9 * value_2 + 0.1 * value_4
+                children.append((board_copy, prob_4, 0.1 * weight_per_cell / len(cells)))
+        
+        child_lower = [lower] * len(children)
+        if self.pruning == 'star2':
+            lower_sum = sum(weight * lower for _, _, weight in children)
+            for k, (child, child_prob, weight) in enumerate(children):
+                terminal, _, grandchildren = self._expand_node(child)
+                if terminal:
+                    continue
+                probe = next(grandchild for grandchild in grandchildren if grandchild is not None)
+                probe_beta = (beta - (lower_sum - weight * child_lower[k])) / weight
+                value = self.expectimax(probe, depth - 1, False, child_prob, -np.inf, probe_beta)
+                if value > child_lower[k]:
+                    lower_sum += weight * (value - child_lower[k])
+                    child_lower[k] = value
+                if lower_sum >= beta:
+                    self.pruned_nodes += 1
+                    return lower_sum  # Corte en el sondeo
+        
+        known = 0.0
+        expected_value = 0.0  # Misma cuenta que chance_node, para el valor sin corte
+        value_2 = 0.0
+        remaining_upper = sum(weight for _, _, weight in children) * upper
+        remaining_lower = sum(weight * bound for (_, _, weight), bound in zip(children, child_lower))
+        for k, (child, child_prob, weight) in enumerate(children):
+            remaining_upper -= weight * upper
+            remaining_lower -= weight * child_lower[k]
+            child_alpha = max(lower, (alpha - known - remaining_upper) / weight)
+            child_beta = min(upper, (beta - known - remaining_lower) / weight)
             
+            value = self.expectimax(child, depth, True, child_prob, child_alpha, child_beta)
+            known += weight * value
+            if not both_tiles:
+                expected_value += value * weight_per_cell
+            elif k & 1:
+                expected_value += (0.9 * value_2 + 0.1 * value) * weight_per_cell
+            else:
+                value_2 = value
+            
+            if k < len(children) - 1:
+                if known + remaining_upper <= alpha:
+                    self.pruned_nodes += 1
+                    return known + remaining_upper  # Ya no puede superar alpha
+                if known + remaining_lower >= beta:
+                    self.pruned_nodes += 1
+                    return known + remaining_lower  # Ya supera beta
+        
+        return expected_value / len(cells)
+    
+    def _resolve_bounds(self) -> tuple:
+        """
+        Cotas de la heurística asignada para la poda Star1/Star2, por
+        exponente de la ficha máxima (ver Heuristics.HEURISTIC_BOUNDS)
+        """
+        if self.heuristic_bounds is not None:
+            return (self.heuristic_bounds,) * (Bitboard.MAX_EXPONENT + 1)
+        if self.heuristic_func is None:
+            return HEURISTIC_BOUNDS['simple'][1]  # Igual al fallback de heuristic_utility
+        bounds = heuristic_bounds(self.heuristic_func)
+        if bounds is None:
+            raise ValueError("No se conocen cotas para la heurística asignada: "
+                             "usar Heuristics.make_heuristic o indicar heuristic_bounds")
+        return bounds
+    
+    def _node_bounds(self, board: GameBoard, depth: int) -> tuple[float, float]:
+        """
+        Cotas [L, U] de las hojas debajo de un nodo de chance de profundidad
+        depth: se agregan a lo sumo depth fichas de 2 o 4, así que ninguna
+        hoja tiene una ficha mayor a la suma de las fichas + 4 * depth.
+        """
+        reachable = Bitboard.tile_sum(board.bits) + 4 * depth
+        return self._bounds[min(reachable.bit_length() - 1, Bitboard.MAX_EXPONENT)]
+    
+    def _leaf_chance_node(self, board: GameBoard, cells: list, weight_per_cell: float,
+                          spec: tuple, cut_2: bool = False, cut_4: bool = False) -> float:
+        """
+        chance_node de profundidad 1 con las hojas evaluadas en batch.
+        Los nodos MAX que cuelgan de este nodo solo tienen hojas, así que se
+        expanden y evalúan todos juntos con un único llamado a
+        Heuristics.evaluate_children. Da el mismo valor (y cuenta los mismos
+        nodos) que la recursión. cut_2 / cut_4 indican que los nodos MAX con
+        esa ficha están bajo prob_threshold y valen su propia heurística.
+        """
+        bits = int(board.bits)
+        spawned = []
+        for i, j in cells:
+            shift = 4 * (4 * i + j)
+            spawned.append(bits | (1 << shift))  # Ficha 2
+            spawned.append(bits | (2 << shift))  # Ficha 4
+        
+        masks, values = evaluate_children(spawned, *spec)
+        self.slides += 4 * len(spawned)
+        if cut_2 or cut_4:
+            self._prob_truncated = True
+            cut_values = evaluate_batch(np.array(spawned, dtype=np.uint64), *spec).tolist()
+        node_values = []
+        for k, (mask, child_values) in enumerate(zip(masks.tolist(), values.tolist())):
+            self.nodes_explored += 1
+            if cut_4 if k & 1 else cut_2:
+                node_values.append(cut_values[k])  # Rama improbable
+                continue
+            if not mask:
+                node_values.append(child_values[0])  # Tablero terminal
+                continue
+            legal_values = [child_values[move] for move in range(4) if mask >> move & 1]
+            self.nodes_explored += len(legal_values)
+            node_values.append(max(legal_values))
+        
+        expected_value = 0.0
+        for k in range(len(cells)):
+            cell_value = 0.9 * node_values[2 * k] + 0.1 * node_values[2 * k + 1]
             expected_value += cell_value * weight_per_cell
         
-        # Promedio sobre todas las celdas evaluadas
-        return expected_value / len(cells_to_evaluate)
+        return expected_value / len(cells)
+    
+    def _batch_spec(self) -> tuple | None:
+        """
+        (nombre, config) de la heurística para evaluate_batch, o None si la
+        heurística asignada no se puede evaluar en batch.
+        """
+        if not self.use_batch_eval:
+            return None
+        if self.heuristic_func is None:
+            return ('simple', 1)  # Igual al fallback de heuristic_utility
+        return heuristic_spec(self.heuristic_func)
     
     def heuristic_utility(self, board: GameBoard) -> float:
         """
@@ -188,32 +672,68 @@ class ExpectimaxAgent(Agent):
 class ExpectimaxAgentOptimized(ExpectimaxAgent):
     """
     Versión optimizada del agente Expectimax con memoización.
-    Cachea estados ya evaluados para evitar recalcularlos.
+    Cachea estados ya evaluados en una tabla de transposición de tamaño fijo
+    que se conserva entre turnos (ver TranspositionTable.py).
     """
     
-    def __init__(self, depth=4, weights=None, weights_config='balanced'):
-        super().__init__(depth, weights, weights_config)
-        self.cache = {}
+    def __init__(self, depth=4, weights=None, weights_config='balanced', cache_size=1 << 20,
+                 time_budget_ms=None, prob_threshold=None, workers=None, parallel_chance=False,
+                 pruning=None, heuristic_bounds=None, symmetry=False, engine='python',
+                 target_latency_ms=None, latency_model=None):
+        """
+        Args:
+            cache_size: Capacidad de la tabla de transposición (entradas,
+                también la de la tabla del motor nativo)
+            symmetry: Si True, los 8 tableros simétricos comparten una entrada
+                de la tabla (ver Bitboard.canonical). Se ignora si la
+                heurística no es simétrica (Heuristics.SYMMETRIC_HEURISTICS)
+        """
+        super().__init__(depth, weights, weights_config, time_budget_ms, prob_threshold,
+                         workers, parallel_chance, pruning, heuristic_bounds, engine,
+                         target_latency_ms, latency_model)
+        self.cache = TranspositionTable(cache_size)
+        self.native_cache_size = cache_size
+        self.symmetry = symmetry
+        self._use_symmetry = False
     
     def play(self, board: GameBoard) -> int:
         """
         Elige la mejor acción usando Expectimax con caché.
         """
-        self.cache.clear()  # Limpiar caché para cada turno
+        self.cache.new_search()  # Los valores del turno anterior pasan a ser reemplazables
         self.nodes_explored = 0
+        self._prob_truncated = False
+        # Sin heurística asignada se usa la simple, que es simétrica
+        self._use_symmetry = self.symmetry and (self.heuristic_func is None or
+                                                heuristic_is_symmetric(self.heuristic_func))
         return super().play(board)
     
-    def expectimax(self, board: GameBoard, depth: int, is_maximizing: bool) -> float:
+    def expectimax(self, board: GameBoard, depth: int, is_maximizing: bool,
+                   prob: float = 1.0, alpha: float = -np.inf, beta: float = np.inf) -> float:
         """
         Expectimax con memoización.
+        Reutiliza valores calculados con profundidad mayor o igual a la pedida.
+        Con poda solo se guardan los valores exactos (dentro de la ventana).
+        Con prob_threshold no se guardan los valores de subárboles con algún
+        corte por probabilidad: dependen de la probabilidad con la que se
+        llegó al nodo, y la tabla se conserva entre visitas y turnos.
         """
-        # Crear clave única para este estado
-        state_key = (board.grid.tobytes(), depth, is_maximizing)
+        # Clave Zobrist del tablero (o de su canónico), distinta para nodos MAX y de chance
+        if self._use_symmetry:
+            key = int(Bitboard.canonical_zobrist(board.bits, Bitboard.ZOBRIST_ROWS)[0])
+        else:
+            key = board.zobrist
+        state_key = key ^ MAX_NODE_KEY if is_maximizing else key
         
-        if state_key in self.cache:
-            return self.cache[state_key]
+        value = self.cache.probe(state_key, depth)
+        if value is not None:
+            return value
         
-        value = super().expectimax(board, depth, is_maximizing)
-        self.cache[state_key] = value
+        truncated = self._prob_truncated
+        self._prob_truncated = False
+        value = super().expectimax(board, depth, is_maximizing, prob, alpha, beta)
+        if not self._prob_truncated and (self.pruning is None or alpha < value < beta):
+            self.cache.store(state_key, depth, value)
+        self._prob_truncated |= truncated
         
         return value
@@ -13,6 +13,8 @@ from typing import Dict, List, Tuple
 from tqdm import tqdm
 
 from GameBoard import GameBoard
+from BoardBatch import BoardBatch
+from TileSpawner import TileSpawner
 from Agent import Agent
 from Random_Agent import RandomAgent
 from Expectimax_Agent import ExpectimaxAgent, ExpectimaxAgentOptimized
@@ -24,16 +26,23 @@ class GameExperiment:
     Clase para ejecutar y registrar experimentos con agentes de 2048.
     """
     
-    def __init__(self, agent: Agent, agent_name: str, num_games: int = 10):
+    def __init__(self, agent: Agent, agent_name: str, num_games: int = 10,
+                 board_backend: str = 'array', seed: int = None):
         """
         Args:
             agent: Agente a evaluar
             agent_name: Nombre descriptivo del agente
             num_games: Número de partidas a ejecutar
+            board_backend: Representación del tablero ('array' o 'bitboard')
+            seed: Semilla base; cada partida usa un stream de fichas propio
+                derivado de (seed, game_id), reproducible e independiente
+                aunque se ejecuten en procesos distintos
         """
         self.agent = agent
         self.agent_name = agent_name
         self.num_games = num_games
+        self.board_backend = board_backend
+        self.seed = seed
         self.results = []
     
     def run_single_game(self, game_id: int, verbose: bool = False) -> Dict:
@@ -43,10 +52,16 @@ class GameExperiment:
         Returns:
             Diccionario con métricas de la partida
         """
-        board = GameBoard()
+        spawner = TileSpawner.for_game(self.seed, game_id) if self.seed is not None else None
+        board = GameBoard(self.board_backend, spawner=spawner)
         moves = 0
+        latency_model = getattr(self.agent, 'latency_model', None)
+        first_latency_record = latency_model.observations if latency_model is not None else 0
         start_time = time.time()
         total_nodes_explored = 0
+        total_slides = 0
+        total_completed_depth = 0
+        max_move_time = 0.0
         last_move_time = start_time
         
         done = False
@@ -54,6 +69,7 @@ class GameExperiment:
             move_start = time.time()
             action = self.agent.play(board)
             move_time = time.time() - move_start
+            max_move_time = max(max_move_time, move_time)
             
             # Log si un movimiento tarda más de 60 segundos
             if move_time > 60:
@@ -63,6 +79,10 @@ class GameExperiment:
             # Registrar nodos explorados si el agente lo soporta
             if hasattr(self.agent, 'nodes_explored'):
                 total_nodes_explored += self.agent.nodes_explored
+            if hasattr(self.agent, 'slides'):
+                total_slides += self.agent.slides
+            if hasattr(self.agent, 'completed_depth'):
+                total_completed_depth += self.agent.completed_depth
             
             done = board.play(action)
             done = done or board.get_max_tile() >= 2048  # Win condition
@@ -79,13 +99,16 @@ class GameExperiment:
         result = {
             'game_id': game_id,
             'agent_name': self.agent_name,
+            'seed': self.seed,
             'max_tile': int(board.get_max_tile()),
             'final_score': self._calculate_score(board),
+            'merge_score': int(board.score),
             'moves': moves,
             'time_seconds': elapsed_time,
             'won': board.get_max_tile() >= 2048,
             'nodes_explored': total_nodes_explored,
             'avg_time_per_move': elapsed_time / moves if moves > 0 else 0,
+            'max_move_time': max_move_time,
             'timestamp': datetime.now().isoformat()
         }
         
@@ -96,7 +119,25 @@ class GameExperiment:
             result['alpha_beta'] = self.agent.use_alpha_beta
         if hasattr(self.agent, 'pruned_nodes'):
             result['pruned_nodes'] = self.agent.pruned_nodes
-        
+        if hasattr(self.agent, 'slides'):
+            result['slides'] = total_slides
+            result['slides_per_node'] = total_slides / total_nodes_explored if total_nodes_explored > 0 else 0
+        if getattr(self.agent, 'time_budget_ms', None) is not None:
+            result['time_budget_ms'] = self.agent.time_budget_ms
+            result['avg_completed_depth'] = total_completed_depth / moves if moves > 0 else 0
+        if latency_model is not None:
+            # Tiempo estimado vs real de las jugadas de esta partida (ver LatencyModel.log)
+            records = latency_model.records_since(first_latency_record)
+            estimated = [r for r in records if r['predicted_ms'] is not None]
+            result['target_latency_ms'] = self.agent.target_latency_ms
+            result['avg_completed_depth'] = total_completed_depth / moves if moves > 0 else 0
+            result['avg_predicted_ms'] = (np.mean([r['predicted_ms'] for r in estimated])
+                                          if estimated else None)
+            result['avg_actual_ms'] = (np.mean([r['actual_ms'] for r in estimated])
+                                       if estimated else None)
+            result['over_target_moves'] = sum(r['target_ms'] is not None and
+                                              r['actual_ms'] > r['target_ms'] for r in records)
+
         return result
     
     def run_experiment(self, verbose: bool = True) -> pd.DataFrame:
@@ -132,7 +173,8 @@ class GameExperiment:
     def _calculate_score(self, board: GameBoard) -> int:
         """
         Calcula el score final del tablero.
-        Suma de todas las fichas (se puede ajustar).
+        Suma de todas las fichas (se puede ajustar). El puntaje real de 2048
+        (suma de las fichas creadas al combinar) se guarda aparte en merge_score.
         """
         return int(np.sum(board.grid))
     
@@ -157,6 +199,10 @@ class GameExperiment:
         print(f"\nScore:")
         print(f"  Promedio: {df['final_score'].mean():.1f}")
         print(f"  Máximo: {df['final_score'].max()}")
+        if 'merge_score' in df.columns:
+            print(f"\nPuntaje de combinaciones:")
+            print(f"  Promedio: {df['merge_score'].mean():.1f}")
+            print(f"  Máximo: {df['merge_score'].max()}")
         print(f"\nMovimientos:")
         print(f"  Promedio: {df['moves'].mean():.1f}")
         print(f"  Máximo: {df['moves'].max()}")
@@ -355,6 +401,55 @@ class ExperimentSuite:
         self.all_results.append(df)
         return df
     
+    def run_batch_random_baseline(self, num_games: int = 1000, seed: int = None):
+        """
+        Baseline aleatorio vectorizado: juega todas las partidas en paralelo
+        con BoardBatch (mismas reglas que RandomAgent + GameBoard.play).
+        """
+        print(f"\n{'#'*60}")
+        print(f"# EXPERIMENTO: Baseline vectorizado (Agente Aleatorio)")
+        print(f"{'#'*60}\n")
+        
+        rng = np.random.default_rng(seed)
+        start_time = time.time()
+        
+        batch = BoardBatch.new_games(num_games, rng)
+        active = ~batch.terminal()
+        moves = np.zeros(num_games, dtype=np.int64)
+        scores = np.zeros(num_games, dtype=np.int64)
+        
+        while active.any():
+            actions = rng.integers(0, 4, num_games)
+            done, move_scores = batch.play(actions, rng, active)
+            moves += active
+            scores += move_scores
+            active &= ~(done | (batch.max_tiles() >= 2048))  # Win condition
+        
+        elapsed_time = time.time() - start_time
+        max_tiles = batch.max_tiles()
+        
+        df = pd.DataFrame({
+            'game_id': np.arange(num_games),
+            'agent_name': "Random_Baseline_Batch",
+            'max_tile': max_tiles,
+            'final_score': batch.tile_sums(),
+            'merge_score': scores,
+            'moves': moves,
+            'time_seconds': elapsed_time / num_games,
+            'won': max_tiles >= 2048,
+            'nodes_explored': 0,
+            'avg_time_per_move': elapsed_time / max(1, moves.sum()),
+            'timestamp': datetime.now().isoformat()
+        })
+        GameExperiment(None, "Random_Baseline_Batch", num_games)._print_summary(df)
+        
+        filename = f"{self.output_dir}/baseline_random_batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        df.to_csv(filename, index=False)
+        print(f"\nResultados guardados en: {filename}")
+        
+        self.all_results.append(df)
+        return df
+    
     def _compare_agents(self, df1: pd.DataFrame, df2: pd.DataFrame, 
                        name1: str, name2: str):
         """
@@ -364,7 +459,7 @@ class ExperimentSuite:
         print(f"COMPARACIÓN: {name1} vs {name2}")
         print(f"{'='*60}")
         
-        metrics = ['max_tile', 'final_score', 'moves', 'time_seconds']
+        metrics = ['max_tile', 'final_score', 'merge_score', 'moves', 'time_seconds']
         
         for metric in metrics:
             if metric in df1.columns and metric in df2.columns:
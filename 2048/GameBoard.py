@@ -1,36 +1,120 @@
 import numpy as np
-from numba import jit
-
-dirs = [UP, DOWN, LEFT, RIGHT] = range(4)
 
+import Bitboard
+from TileSpawner import TileSpawner
 
-@jit
-def merge(a):
-    for i in [0, 1, 2, 3]:
-        for j in [0, 1, 2]:
-            if a[i][j] == a[i][j + 1] and a[i][j] != 0:
-                a[i][j] *= 2
-                a[i][j + 1] = 0
-    return a
+dirs = [UP, DOWN, LEFT, RIGHT] = range(4)
 
+# 'array': grilla 4x4 de numpy (original)
+# 'bitboard': 16 exponentes empaquetados en un uint64 (ver Bitboard.py)
+BACKENDS = ('array', 'bitboard')
 
-@jit
-def justify_left(a, out):
-    for i in [0, 1, 2, 3]:
-        c = 0
-        for j in [0, 1, 2, 3]:
-            if a[i][j] != 0:
-                out[i][c] = a[i][j]
-                c += 1
-    return out
+# Buffer reutilizable para los tableros hijos de GameBoard.expand
+_EXPAND_BUFFER = np.empty(4, dtype=np.uint64)
 
 
 class GameBoard:
-    def __init__(self):
-        self.grid = np.zeros((4, 4))  # , dtype=np.int_)
+    def __init__(self, backend: str = 'array', seed=None, spawner: TileSpawner = None):
+        """
+        Args:
+            backend: Representacion del tablero ('array' o 'bitboard')
+            seed: Semilla de las fichas que aparecen (ver TileSpawner)
+            spawner: Motor de aparicion de fichas a usar en lugar de uno nuevo
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend '{backend}' desconocido. Opciones: {BACKENDS}")
+        self.backend = backend
+        self.spawner = spawner if spawner is not None else TileSpawner(seed)
+        self.score = 0  # Suma de las fichas creadas al combinar (puntaje real de 2048)
+        self._bits = np.uint64(0)
+        self._grid = np.zeros((4, 4))  # , dtype=np.int_)
+        self._zobrist = np.uint64(0)  # Clave Zobrist del tablero vacio
         self.__add_random_tile()
         self.__add_random_tile()
 
+    @classmethod
+    def from_bits(cls, bits: np.uint64, backend: str = 'array',
+                  spawner: TileSpawner = None) -> 'GameBoard':
+        """
+        Crea un tablero a partir de un bitboard, sin agregar fichas al azar.\n
+        Si no se pasa spawner se crea uno recien cuando haga falta agregar una ficha
+        """
+        board = cls.__new__(cls)
+        board.backend = backend
+        board.spawner = spawner
+        board.score = 0
+        board._bits = np.uint64(bits)
+        board._zobrist = None  # Se calcula recien cuando se pide
+        if backend == 'bitboard':
+            board._grid = None
+        else:
+            board._grid = np.zeros((4, 4))
+            Bitboard.to_grid(board._bits, board._grid)
+        return board
+
+    @classmethod
+    def from_key(cls, key: int, backend: str = 'array',
+                 spawner: TileSpawner = None) -> 'GameBoard':
+        """Reconstruye un tablero a partir de su clave (ver key)"""
+        return cls.from_bits(np.uint64(key), backend, spawner)
+
+    def key(self) -> int:
+        """
+        Clave compacta e inmutable del tablero: el bitboard como int de Python.\n
+        Hash e igualdad en O(1), ideal para cachés y sets. Se reconstruye con from_key.
+        """
+        return int(self.bits)
+
+    @property
+    def zobrist(self) -> int:
+        """
+        Clave Zobrist del tablero (hash de 64 bits, ver Bitboard.py).\n
+        Se mantiene actualizada de forma incremental en move, insert_tile y
+        al agregar fichas, sin volver a recorrer el tablero.
+        """
+        if self._zobrist is None:
+            self._zobrist = np.uint64(Bitboard.zobrist(self.bits, Bitboard.ZOBRIST_ROWS))
+        return int(self._zobrist)
+
+    @property
+    def grid(self) -> np.ndarray:
+        """
+        Grilla 4x4 con los valores de las fichas, de solo lectura.\n
+        Con el backend 'array' es una vista de la grilla interna (refleja los
+        movimientos siguientes) y con 'bitboard' una copia decodificada. Para
+        modificar el tablero usar insert_tile, move o asignar una grilla nueva:
+        escribir en la grilla dejaría desactualizada la clave Zobrist.
+        """
+        if self._grid is None:
+            grid = np.zeros((4, 4))
+            Bitboard.to_grid(self._bits, grid)
+            grid.flags.writeable = False
+            self._grid = grid
+        if self.backend == 'array':
+            view = self._grid.view()
+            view.flags.writeable = False
+            return view
+        return self._grid
+
+    @grid.setter
+    def grid(self, value: np.ndarray) -> None:
+        if self.backend == 'bitboard':
+            self._bits = np.uint64(Bitboard.from_grid(np.asarray(value, dtype=np.float64)))
+            self._grid = None
+        else:
+            # move() escribe in-place, la grilla tiene que ser float64 C-contigua
+            grid = np.ascontiguousarray(value, dtype=np.float64)
+            Bitboard.from_grid(grid)  # Valida el tope de las fichas (ValueError)
+            self._grid = grid
+        self._zobrist = None
+
+    @property
+    def bits(self) -> np.uint64:
+        """Devuelve el tablero codificado como bitboard (ver Bitboard.py)"""
+        if self.backend == 'bitboard':
+            return self._bits
+        return np.uint64(Bitboard.from_grid(self._grid))
+
     def render(self)->None:
         """Imprime el tablero en consola"""
         for i in range(4):
@@ -41,16 +125,45 @@ class GameBoard:
 
     def clone(self)->'GameBoard':
         """Me devuelve otro board igual"""
-        board_clone = GameBoard()
-        board_clone.grid = np.copy(self.grid)
+        board_clone = GameBoard.__new__(GameBoard)
+        board_clone.backend = self.backend
+        board_clone.spawner = self.spawner
+        board_clone.score = self.score
+        board_clone._bits = self._bits
+        board_clone._zobrist = self._zobrist
+        if self.backend == 'bitboard':
+            # La grilla decodificada es de solo lectura, se puede compartir
+            board_clone._grid = self._grid
+        else:
+            board_clone._grid = np.copy(self._grid)
         return board_clone
 
     def insert_tile(self, pos:tuple[int,int], value:int)->None:
-        """Agrega una ficha en la posicion indicada (x,y), con el valor indicado"""
-        self.grid[pos[0]][pos[1]] = value
+        """
+        Agrega una ficha en la posicion indicada (x,y), con el valor indicado.\n
+        Lanza ValueError si el valor supera Bitboard.MAX_TILE (32768)
+        """
+        exponent = int(value).bit_length() - 1 if value else 0
+        if exponent > Bitboard.MAX_EXPONENT:
+            raise ValueError(f"Ficha {value} mayor a la máxima representable ({Bitboard.MAX_TILE})")
+        if self._zobrist is not None:
+            cell = 4 * pos[0] + pos[1]
+            previous = int(self._grid[pos[0]][pos[1]]).bit_length() - 1 if self.backend == 'array' \
+                else Bitboard.get_exponent(self._bits, pos[0], pos[1])
+            self._zobrist ^= Bitboard.ZOBRIST_CELLS[cell, max(previous, 0)] ^ \
+                Bitboard.ZOBRIST_CELLS[cell, exponent]
+        if self.backend == 'bitboard':
+            self._bits = np.uint64(Bitboard.set_exponent(self._bits, pos[0], pos[1], exponent))
+            self._grid = None
+        else:
+            self._grid[pos[0]][pos[1]] = value
 
     def get_available_cells(self)->list[tuple[int,int]]:
         """Devuelve todas las posiciones en las que se puede agregar una ficha"""
+        if self.backend == 'bitboard':
+            bits = int(self._bits)
+            return [(k >> 2, k & 3) for k in range(16) if not (bits >> (4 * k)) & 0xF]
+
         cells = []
         for x in range(4):
             for y in range(4):
@@ -60,48 +173,37 @@ class GameBoard:
 
     def get_max_tile(self)->int:
         """Devuelve cual es el valor de la ficha mas grande del tablero"""
+        if self.backend == 'bitboard':
+            exponent = Bitboard.max_exponent(self._bits)
+            return 1 << exponent if exponent else 0
         return np.amax(self.grid)
 
     def move(self, dir:int, get_avail_call=False):
         """
         Ejecuta una accion. Es decir, mueve todo el tablero en la direccion indicada,\n
-        y junta las fichas que corresponda juntar
+        y junta las fichas que corresponda juntar.\n
+        La grilla se actualiza in-place (sigue siendo la misma matriz C-contigua).\n
+        Devuelve el puntaje ganado por las combinaciones del movimiento, o si el
+        tablero cambio cuando get_avail_call es True
         """
-        if get_avail_call:
-            clone = self.clone()
-
-        z1 = np.zeros((4, 4))  # , dtype=np.int_)
-        z2 = np.zeros((4, 4))  # , dtype=np.int_)
-
-        if dir == UP:
-            self.grid = self.grid[:, ::-1].T
-            self.grid = justify_left(self.grid, z1)
-            self.grid = merge(self.grid)
-            self.grid = justify_left(self.grid, z2)
-            self.grid = self.grid.T[:, ::-1]
-        if dir == DOWN:
-            self.grid = self.grid.T[:, ::-1]
-            self.grid = justify_left(self.grid, z1)
-            self.grid = merge(self.grid)
-            self.grid = justify_left(self.grid, z2)
-            self.grid = self.grid[:, ::-1].T
-        if dir == LEFT:
-            self.grid = justify_left(self.grid, z1)
-            self.grid = merge(self.grid)
-            self.grid = justify_left(self.grid, z2)
-        if dir == RIGHT:
-            self.grid = self.grid[:, ::-1]
-            self.grid = self.grid[::-1, :]
-            self.grid = justify_left(self.grid, z1)
-            self.grid = merge(self.grid)
-            self.grid = justify_left(self.grid, z2)
-            self.grid = self.grid[:, ::-1]
-            self.grid = self.grid[::-1, :]
+        bits = self.bits
+        moved, merge_score = Bitboard.move(bits, dir, Bitboard.ROW_TABLES)
+        moved = np.uint64(moved)
+        changed = moved != bits
+        if changed:
+            if self._zobrist is not None:
+                self._zobrist = np.uint64(Bitboard.zobrist_update(self._zobrist, bits, moved,
+                                                                  Bitboard.ZOBRIST_ROWS))
+            if self.backend == 'bitboard':
+                self._bits = moved
+                self._grid = None
+            else:
+                Bitboard.to_grid(moved, self._grid)
 
         if get_avail_call:
-            return not (clone.grid == self.grid).all()
+            return changed
         else:
-            return None
+            return merge_score
 
     def get_available_moves(self)->list[int]:
         """
@@ -113,14 +215,63 @@ class GameBoard:
             \t0   0   0   4\n
             \tDevuelve solo izquierda\n
         """
-        available_moves = []
+        mask = self.get_move_mask()
+        return [x for x in dirs if mask >> x & 1]
+
+    def get_move_mask(self)->int:
+        """
+        Devuelve una mascara de 4 bits con los movimientos legales
+        (el bit d esta prendido si se puede mover en la direccion d)
+        """
+        return Bitboard.move_mask(self.bits, Bitboard.ROW_TABLES)
+
+    def is_terminal(self)->bool:
+        """Devuelve True si no queda ningun movimiento legal"""
+        return self.get_move_mask() == 0
+
+    def expand(self, afterstates=None)->tuple[int, list]:
+        """
+        Calcula en una sola pasada (sin clonar ni usar el RNG) los movimientos
+        legales y los tableros resultantes.\n
+        Devuelve (mascara, hijos) donde hijos[d] es el tablero luego de mover
+        en la direccion d, o None si ese movimiento no es legal.\n
+        Con afterstates (ver AfterstateCache) los movimientos se toman de la
+        memo y los hijos ya traen su clave Zobrist
+        """
+        if afterstates is None:
+            mask = Bitboard.expand(self.bits, Bitboard.ROW_TABLES, _EXPAND_BUFFER)
+            children = [GameBoard.from_bits(_EXPAND_BUFFER[x], self.backend, self.spawner) if mask >> x & 1 else None
+                        for x in dirs]
+            return mask, children
 
+        mask, moved, _, keys = afterstates.expand(self.bits)
+        children = [None] * 4
         for x in dirs:
-            board_clone = self.clone()
-            if board_clone.move(x, True):
-                available_moves.append(x)
+            if mask >> x & 1:
+                # Como from_bits, sin convertir el bitboard ni recalcular la clave
+                child = GameBoard.__new__(GameBoard)
+                child.backend = self.backend
+                child.spawner = self.spawner
+                child.score = 0
+                child._bits = moved[x]
+                child._zobrist = keys[x]
+                if self.backend == 'bitboard':
+                    child._grid = None
+                else:
+                    child._grid = np.zeros((4, 4))
+                    Bitboard.to_grid(moved[x], child._grid)
+                children[x] = child
+        return mask, children
 
-        return available_moves
+    def expand_node(self, afterstates=None)->tuple[bool, list[int], list]:
+        """
+        Expansion completa de un nodo de busqueda con una sola pasada de
+        movimientos (ver expand).\n
+        Devuelve (terminal, movimientos legales, hijos) donde hijos[d] es el
+        tablero luego de mover en la direccion d, o None si no es legal
+        """
+        mask, children = self.expand(afterstates)
+        return mask == 0, [x for x in dirs if mask >> x & 1], children
 
     def play(self, dir:int):
         """
@@ -128,23 +279,25 @@ class GameBoard:
         La posibilidad de que la ficha sea un:\n
             \t2 - 90%\n
             \t4 - 10%\n
+        El puntaje de las combinaciones se acumula en self.score
         """
-        self.move(dir)
+        self.score += self.move(dir)
         self.__add_random_tile()
-        return len(self.get_available_moves()) == 0
+        return self.is_terminal()
 
     def __add_random_tile(self):
-        if np.random.random_integers(0, 99) < 90:
-            value = 2
-        else:
-            value = 4
-
-        cells = self.get_available_cells()
-        pos = cells[np.random.random_integers(
-            0, len(cells) - 1)] if cells else None
+        if self.spawner is None:
+            self.spawner = TileSpawner()
+        spawned, pos = self.spawner.spawn(self.bits)
 
         if pos is None:
             return None
+        elif self.backend == 'bitboard':
+            if self._zobrist is not None:
+                exponent = Bitboard.get_exponent(spawned, pos[0], pos[1])
+                self._zobrist ^= Bitboard.ZOBRIST_CELLS[4 * pos[0] + pos[1], exponent]
+            self._bits = spawned
+            self._grid = None
         else:
-            self.insert_tile(pos, value)
-            return pos
\ No newline at end of file
+            self.insert_tile(pos, 1 << Bitboard.get_exponent(spawned, pos[0], pos[1]))
+        return pos
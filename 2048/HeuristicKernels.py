@@ -0,0 +1,194 @@
+"""
+Kernels de numba para los componentes de las heurísticas de Heuristics.py.
+
+Cada kernel recibe la grilla 4x4 (board.grid) y repite exactamente el mismo
+recorrido y el mismo orden de operaciones que la implementación en Python,
+por lo que los puntajes son idénticos bit a bit (lo verifica
+tests/test_heuristic_parity.py). Es la alternativa de menor riesgo a las
+tablas por línea de HeuristicTables.py.
+"""
+import numpy as np
+from numba import njit
+
+# Pesos de la heurística intermedia (componente posicional), compartidos con
+# la implementación en Python de Heuristics.py
+POSITION_WEIGHTS = np.array([
+    [4, 3, 2, 1],
+    [3, 2, 1, 0],
+    [2, 1, 0, -1],
+    [1, 0, -1, -2]
+])
+
+# Pesos de la heurística compleja (estrategia de esquina)
+CORNER_WEIGHTS = np.array([
+    [16, 8, 8, 16],
+    [8,  4, 4, 8],
+    [8,  4, 4, 8],
+    [16, 8, 8, 16]
+])
+
+
+@njit(cache=True)
+def count_empty(grid) -> int:
+    """Cantidad de celdas vacías."""
+    empty = 0
+    for i in range(4):
+        for j in range(4):
+            if grid[i, j] == 0:
+                empty += 1
+    return empty
+
+
+@njit(cache=True)
+def smoothness(grid) -> float:
+    """Kernel de Heuristics._smoothness."""
+    smoothness_value = 0.0
+
+    for i in range(4):
+        for j in range(4):
+            if grid[i, j] != 0:
+                value = np.log2(grid[i, j])
+
+                if j < 3 and grid[i, j + 1] != 0:
+                    target_value = np.log2(grid[i, j + 1])
+                    smoothness_value -= abs(value - target_value)
+
+                if i < 3 and grid[i + 1, j] != 0:
+                    target_value = np.log2(grid[i + 1, j])
+                    smoothness_value -= abs(value - target_value)
+
+    return smoothness_value
+
+
+@njit(cache=True)
+def monotonicity(grid) -> float:
+    """Kernel de Heuristics._monotonicity."""
+    up = 0.0
+    down = 0.0
+    left = 0.0
+    right = 0.0
+
+    for i in range(4):
+        current = 0
+        next_pos = current + 1
+        while next_pos < 4:
+            while next_pos < 4 and grid[i, next_pos] == 0:
+                next_pos += 1
+            if next_pos >= 4:
+                next_pos -= 1
+
+            current_value = np.log2(grid[i, current]) if grid[i, current] != 0 else 0.0
+            next_value = np.log2(grid[i, next_pos]) if grid[i, next_pos] != 0 else 0.0
+
+            if current_value > next_value:
+                left += next_value - current_value
+            elif next_value > current_value:
+                right += current_value - next_value
+
+            current = next_pos
+            next_pos += 1
+
+    for j in range(4):
+        current = 0
+        next_pos = current + 1
+        while next_pos < 4:
+            while next_pos < 4 and grid[next_pos, j] == 0:
+                next_pos += 1
+            if next_pos >= 4:
+                next_pos -= 1
+
+            current_value = np.log2(grid[current, j]) if grid[current, j] != 0 else 0.0
+            next_value = np.log2(grid[next_pos, j]) if grid[next_pos, j] != 0 else 0.0
+
+            if current_value > next_value:
+                up += next_value - current_value
+            elif next_value > current_value:
+                down += current_value - next_value
+
+            current = next_pos
+            next_pos += 1
+
+    return max(up, down) + max(left, right)
+
+
+@njit(cache=True)
+def max_tile_corner(grid, max_value) -> float:
+    """Kernel de Heuristics._max_tile_corner."""
+    if (grid[0, 0] == max_value or grid[0, 3] == max_value or
+            grid[3, 0] == max_value or grid[3, 3] == max_value):
+        return 10000.0
+    return -5000.0
+
+
+@njit(cache=True)
+def max_corner_position(grid, max_value) -> float:
+    """Componente 'max tile en esquina' de la heurística intermedia."""
+    for i in range(4):
+        for j in range(4):
+            if grid[i, j] == max_value:
+                if i == 0 and j == 0:
+                    return max_value * 1.0
+                if (i == 0 and j == 3) or (i == 3 and j == 0):
+                    return max_value * 0.9
+                if i == 3 and j == 3:
+                    return max_value * 0.8
+                min_dist = min(min(abs(i - 0) + abs(j - 0), abs(i - 0) + abs(j - 3)),
+                               min(abs(i - 3) + abs(j - 0), abs(i - 3) + abs(j - 3)))
+                return -max_value * min_dist * 0.5
+    return 0.0
+
+
+@njit(cache=True)
+def positional_score(grid, weights) -> float:
+    """Componente posicional de la heurística intermedia."""
+    score = 0.0
+    for i in range(4):
+        for j in range(4):
+            if grid[i, j] > 0:
+                tile_value = np.log2(grid[i, j])
+                score += tile_value * weights[i, j]
+    return score
+
+
+@njit(cache=True)
+def merge_potential(grid) -> float:
+    """Componente 'potencial de merge' de la heurística compleja."""
+    merge_score = 0.0
+    for i in range(4):
+        for j in range(4):
+            if grid[i, j] != 0:
+                # Merges normales
+                if j < 3 and grid[i, j] == grid[i, j + 1]:
+                    merge_score += grid[i, j]
+                if i < 3 and grid[i, j] == grid[i + 1, j]:
+                    merge_score += grid[i, j]
+
+                # Bonus para merges grandes
+                if grid[i, j] >= 256:
+                    if j < 3 and grid[i, j] == grid[i, j + 1]:
+                        merge_score += grid[i, j] * 5.0
+                    if i < 3 and grid[i, j] == grid[i + 1, j]:
+                        merge_score += grid[i, j] * 5.0
+    return merge_score
+
+
+@njit(cache=True)
+def value_score(grid) -> float:
+    """Componente 'valor del tablero' de la heurística compleja."""
+    total = 0.0
+    for i in range(4):
+        for j in range(4):
+            if grid[i, j] != 0:
+                total += grid[i, j] ** 2
+    return total
+
+
+@njit(cache=True)
+def corner_score(grid, weights) -> float:
+    """Componente 'estrategia de esquina' de la heurística compleja."""
+    total = 0.0
+    for i in range(4):
+        for j in range(4):
+            if grid[i, j] != 0:
+                total += grid[i, j] * weights[i, j]
+    return total
@@ -0,0 +1,333 @@
+"""
+Tablas por línea para evaluar las heurísticas intermedia y compleja.
+
+Monotonía, suavidad, celdas vacías, potencial de merge, valor y estrategia
+de esquina son sumas de términos por fila y por columna. Como una línea de
+4 fichas (leída de izquierda a derecha o de arriba a abajo) tiene solo 65536
+estados posibles, cada término se precalcula en LINE_FEATURES y una
+evaluación completa del tablero son 8 lecturas de tabla (4 filas y 4
+columnas del bitboard) más unos pocos términos que dependen de la posición
+de la ficha máxima.
+
+Las tablas se guardan en heuristic_tables.npy junto a este módulo y se cargan
+con memory-map (ver Bitboard.load_cached_table).
+"""
+import os
+
+import numpy as np
+from numba import njit
+
+import Bitboard
+
+HEURISTIC_TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     'heuristic_tables.npy')
+
+# Filas de LINE_FEATURES (un valor por cada una de las 65536 líneas)
+(MONO_A,         # Monotonía: caídas a lo largo de la línea (izquierda / arriba)
+ MONO_B,         # Monotonía: subidas a lo largo de la línea (derecha / abajo)
+ SMOOTH,         # Suavidad entre fichas vecinas de la línea
+ EMPTY,          # Celdas vacías
+ POSITION,       # Suma de log2(ficha) * (4 - j)
+ LOG_SUM,        # Suma de log2(ficha)
+ MERGE,          # Potencial de merge (con bonus x5 para fichas >= 256)
+ VALUE,          # Suma de fichas al cuadrado
+ CORNER_OUTER,   # Estrategia de esquina, filas 0 y 3: pesos [16, 8, 8, 16]
+ CORNER_INNER,   # Estrategia de esquina, filas 1 y 2: pesos [8, 4, 4, 8]
+ ) = range(10)
+NUM_FEATURES = 10
+
+# Esquinas del tablero (nibble del bitboard)
+_CORNER_NIBBLES = (0, 3, 12, 15)
+
+
+# ============================================================
+# CONSTRUCCIÓN DE LAS TABLAS
+# ============================================================
+
+@njit(cache=True)
+def _line_monotonicity(line):
+    """Mismo recorrido que Heuristics._monotonicity sobre una sola línea."""
+    decreasing = 0.0
+    increasing = 0.0
+    current = 0
+    next_pos = current + 1
+    while next_pos < 4:
+        while next_pos < 4 and line[next_pos] == 0:
+            next_pos += 1
+        if next_pos >= 4:
+            next_pos -= 1
+
+        current_value = float(line[current])
+        next_value = float(line[next_pos])
+
+        if current_value > next_value:
+            decreasing += next_value - current_value
+        elif next_value > current_value:
+            increasing += current_value - next_value
+
+        current = next_pos
+        next_pos += 1
+    return decreasing, increasing
+
+
+@njit(cache=True)
+def _build_line_features(features, lines) -> None:
+    """Escribe en la columna k de features los términos de la línea lines[k]."""
+    line = np.zeros(4, dtype=np.int64)
+    outer_weights = (16.0, 8.0, 8.0, 16.0)
+    inner_weights = (8.0, 4.0, 4.0, 8.0)
+    for k in range(lines.shape[0]):
+        index = lines[k]
+        for j in range(4):
+            line[j] = (index >> (4 * j)) & 0xF
+
+        features[MONO_A, k], features[MONO_B, k] = _line_monotonicity(line)
+
+        smooth = 0.0
+        empty = 0.0
+        position = 0.0
+        log_sum = 0.0
+        merge = 0.0
+        value = 0.0
+        corner_outer = 0.0
+        corner_inner = 0.0
+        for j in range(4):
+            exponent = line[j]
+            if exponent == 0:
+                empty += 1.0
+                continue
+            tile = float(1 << exponent)
+            position += exponent * (4 - j)
+            log_sum += exponent
+            value += tile ** 2
+            corner_outer += tile * outer_weights[j]
+            corner_inner += tile * inner_weights[j]
+            if j < 3 and line[j + 1] != 0:
+                smooth -= abs(exponent - line[j + 1])
+                if line[j + 1] == exponent:
+                    merge += tile
+                    if tile >= 256:
+                        merge += tile * 5.0
+
+        features[SMOOTH, k] = smooth
+        features[EMPTY, k] = empty
+        features[POSITION, k] = position
+        features[LOG_SUM, k] = log_sum
+        features[MERGE, k] = merge
+        features[VALUE, k] = value
+        features[CORNER_OUTER, k] = corner_outer
+        features[CORNER_INNER, k] = corner_inner
+
+
+def load_line_features(path: str = HEURISTIC_TABLES_PATH) -> np.ndarray:
+    """
+    Carga las tablas de términos por línea, generándolas la primera vez
+    (o si las guardadas no coinciden con el código actual).
+
+    Returns:
+        Array (NUM_FEATURES, 65536) float64
+    """
+    def build():
+        features = np.zeros((NUM_FEATURES, 65536))
+        _build_line_features(features, np.arange(65536))
+        return features
+
+    def check(features):
+        expected = np.zeros((NUM_FEATURES, Bitboard.CHECK_LINES.size))
+        _build_line_features(expected, Bitboard.CHECK_LINES)
+        return np.array_equal(features[:, Bitboard.CHECK_LINES], expected)
+
+    return Bitboard.load_cached_table(path, build, (NUM_FEATURES, 65536), np.float64, check)
+
+
+LINE_FEATURES = load_line_features()
+
+
+def intermediate_tables(weights: tuple) -> np.ndarray:
+    """
+    Combina los términos aditivos de la heurística intermedia para una
+    configuración de pesos (W1..W5).
+
+    Returns:
+        Array (2, 65536): fila 0 para filas del tablero, fila 1 para columnas
+    """
+    _, W2, _, W4, W5 = weights
+    f = LINE_FEATURES
+    return np.ascontiguousarray(np.stack([
+        W2 * f[EMPTY] - W4 * f[SMOOTH] + W5 * f[POSITION],
+        -W4 * f[SMOOTH],
+    ]))
+
+
+def complex_tables(weights: tuple) -> np.ndarray:
+    """
+    Combina los términos aditivos de la heurística compleja para una
+    configuración de pesos.
+
+    Returns:
+        Array (3, 65536): filas externas (0 y 3), filas internas (1 y 2)
+        y columnas del tablero
+    """
+    _, w_smooth, _, _, w_merge, w_value, w_corner = weights
+    f = LINE_FEATURES
+    common = w_smooth * f[SMOOTH] + w_merge * f[MERGE]
+    return np.ascontiguousarray(np.stack([
+        common + w_value * f[VALUE] + w_corner * f[CORNER_OUTER],
+        common + w_value * f[VALUE] + w_corner * f[CORNER_INNER],
+        common,
+    ]))
+
+
+# ============================================================
+# EVALUACIÓN
+# ============================================================
+
+@njit(cache=True)
+def simple_eval(board, config) -> float:
+    """Heurística simple sobre un bitboard (ver Heuristics.simple_heuristic)."""
+    empty = Bitboard.count_empty(board)
+    max_exp = Bitboard.max_exponent(board)
+    max_tile = float(1 << max_exp) if max_exp > 0 else 0.0
+    if config == 1:
+        return empty * 10.0 + max_tile
+    return empty * 20.0 + max_tile * 0.5
+
+
+@njit(cache=True)
+def _monotonicity(board, transposed, features) -> float:
+    rows_a = 0.0
+    rows_b = 0.0
+    cols_a = 0.0
+    cols_b = 0.0
+    for i in range(4):
+        shift = np.uint64(16 * i)
+        row = (board >> shift) & Bitboard.ROW_MASK
+        column = (transposed >> shift) & Bitboard.ROW_MASK
+        rows_a += features[MONO_A, row]
+        rows_b += features[MONO_B, row]
+        cols_a += features[MONO_A, column]
+        cols_b += features[MONO_B, column]
+    return max(cols_a, cols_b) + max(rows_a, rows_b)
+
+
+@njit(cache=True)
+def intermediate_eval(board, features, tables, weights) -> float:
+    """
+    Heurística intermedia sobre un bitboard (ver Heuristics.intermediate_heuristic).
+
+    Args:
+        board: Bitboard (np.uint64)
+        features: LINE_FEATURES
+        tables: intermediate_tables(weights)
+        weights: (W1, W2, W3, W4, W5)
+    """
+    W1, _, W3, _, W5 = weights
+    transposed = Bitboard.transpose(board)
+
+    additive = 0.0
+    for i in range(4):
+        shift = np.uint64(16 * i)
+        row = (board >> shift) & Bitboard.ROW_MASK
+        column = (transposed >> shift) & Bitboard.ROW_MASK
+        additive += tables[0, row] - W5 * i * features[LOG_SUM, row] + tables[1, column]
+
+    # Max tile en esquina: primera aparición de la ficha máxima (fila por fila)
+    max_exp = Bitboard.max_exponent(board)
+    max_tile = float(1 << max_exp) if max_exp > 0 else 0.0
+    cell = 0
+    while Bitboard.get_exponent(board, cell >> 2, cell & 3) != max_exp:
+        cell += 1
+    max_row = cell >> 2
+    max_col = cell & 3
+    if cell == 0:
+        max_corner_score = max_tile * 1.0
+    elif cell == 3 or cell == 12:
+        max_corner_score = max_tile * 0.9
+    elif cell == 15:
+        max_corner_score = max_tile * 0.8
+    else:
+        min_dist = min(max_row, 3 - max_row) + min(max_col, 3 - max_col)
+        max_corner_score = -max_tile * min_dist * 0.5
+
+    return W1 * _monotonicity(board, transposed, features) + additive + W3 * max_corner_score
+
+
+@njit(cache=True)
+def complex_eval(board, features, tables, weights) -> float:
+    """
+    Heurística compleja sobre un bitboard (ver Heuristics.complex_heuristic).
+
+    Args:
+        board: Bitboard (np.uint64)
+        features: LINE_FEATURES
+        tables: complex_tables(weights)
+        weights: pesos de (monotonía, suavidad, vacías, max en esquina,
+            merge, valor, estrategia de esquina)
+    """
+    w_mono, _, w_empty, w_max_corner, _, _, _ = weights
+    transposed = Bitboard.transpose(board)
+
+    additive = 0.0
+    empty = 0
+    for i in range(4):
+        shift = np.uint64(16 * i)
+        row = (board >> shift) & Bitboard.ROW_MASK
+        column = (transposed >> shift) & Bitboard.ROW_MASK
+        additive += tables[0 if i == 0 or i == 3 else 1, row] + tables[2, column]
+        empty += int(features[EMPTY, row])
+
+    if empty >= 8:
+        empty_score = empty * 100.0
+    elif empty >= 6:
+        empty_score = empty * 50.0
+    elif empty >= 3:
+        empty_score = empty * 30.0
+    else:
+        empty_score = empty * 15.0
+
+    max_exp = Bitboard.max_exponent(board)
+    max_tile = float(1 << max_exp) if max_exp > 0 else 0.0
+    max_corner_score = -5000.0
+    for cell in _CORNER_NIBBLES:
+        if Bitboard.get_exponent(board, cell >> 2, cell & 3) == max_exp:
+            max_corner_score = 10000.0
+            break
+
+    if max_tile >= 2048:
+        milestone_bonus = 100000.0
+    elif max_tile >= 1024:
+        milestone_bonus = 50000.0
+    elif max_tile >= 512:
+        milestone_bonus = 10000.0
+    elif max_tile >= 256:
+        milestone_bonus = 2000.0
+    else:
+        milestone_bonus = 0.0
+
+    return (w_mono * _monotonicity(board, transposed, features) +
+            additive +
+            w_empty * empty_score +
+            w_max_corner * max_corner_score +
+            milestone_bonus)
+
+
+# ============================================================
+# EVALUACIÓN EN BATCH
+# ============================================================
+
+@njit(cache=True)
+def simple_eval_all(boards, config, out) -> None:
+    for k in range(boards.shape[0]):
+        out[k] = simple_eval(boards[k], config)
+
+
+@njit(cache=True)
+def intermediate_eval_all(boards, features, tables, weights, out) -> None:
+    for k in range(boards.shape[0]):
+        out[k] = intermediate_eval(boards[k], features, tables, weights)
+
+
+@njit(cache=True)
+def complex_eval_all(boards, features, tables, weights, out) -> None:
+    for k in range(boards.shape[0]):
+        out[k] = complex_eval(boards[k], features, tables, weights)
@@ -5,9 +5,36 @@ Contiene 3 heurísticas de complejidad creciente, cada una con 2 configuraciones
 1. simple_heuristic: Muy sencilla (celdas vacías + max tile)
 2. intermediate_heuristic: Intermedia (5 componentes balanceados)
 3. complex_heuristic: Compleja (7+ componentes optimizados)
+
+Las heurísticas intermedia y compleja tienen además una versión equivalente
+basada en tablas por línea (ver HeuristicTables.py), que se pide con
+backend='table' y es la que aprovechan la evaluación en batch y el motor
+nativo, y otra con kernels de numba que da exactamente
+los mismos puntajes que la implementación en Python (ver HeuristicKernels.py).
+evaluate_batch evalúa un array de tableros en un solo llamado compilado.
 """
+import functools
+
 import numpy as np
+import Bitboard
+from BoardBatch import BoardBatch
 from GameBoard import GameBoard
+import HeuristicKernels
+import HeuristicTables
+
+
+# Pesos (W1..W5) de la heurística intermedia por configuración
+INTERMEDIATE_WEIGHTS = {
+    1: (1.0, 2.7, 1.0, 0.1, 0.5),   # Balanceada
+    2: (0.5, 1.5, 2.0, 0.05, 1.0),  # Agresiva (prioriza esquina y posición)
+}
+
+# Pesos de la heurística compleja por configuración: monotonía, suavidad,
+# celdas vacías, max en esquina, merge, valor del tablero y estrategia de esquina
+COMPLEX_WEIGHTS = {
+    1: (5.0, 2.0, 8.0, 0.1, 6.0, 0.0001, 0.01),    # Equilibrada
+    2: (8.0, 3.0, 12.0, 0.15, 4.0, 0.00005, 0.005),  # Defensiva
+}
 
 
 # ============================================================
@@ -79,12 +106,7 @@ def intermediate_heuristic(board: GameBoard, config: int = 1) -> float:
     smoothness_score = _smoothness(board)
     
     # ===== COMPONENTE 5: Peso posicional =====
-    position_weights = np.array([
-        [4, 3, 2, 1],
-        [3, 2, 1, 0],
-        [2, 1, 0, -1],
-        [1, 0, -1, -2]
-    ])
+    position_weights = HeuristicKernels.POSITION_WEIGHTS
     
     positional_score = 0.0
     for i in range(4):
@@ -94,12 +116,7 @@ def intermediate_heuristic(board: GameBoard, config: int = 1) -> float:
                 positional_score += tile_value * position_weights[i][j]
     
     # ===== COMBINACIÓN CON PESOS =====
-    if config == 1:
-        # Configuración 1: Balanceada
-        W1, W2, W3, W4, W5 = 1.0, 2.7, 1.0, 0.1, 0.5
-    else:
-        # Configuración 2: Agresiva (prioriza esquina y posición)
-        W1, W2, W3, W4, W5 = 0.5, 1.5, 2.0, 0.05, 1.0
+    W1, W2, W3, W4, W5 = INTERMEDIATE_WEIGHTS[1 if config == 1 else 2]
     
     return (W1 * monotonicity_score + 
             W2 * empty_score + 
@@ -169,12 +186,7 @@ def complex_heuristic(board: GameBoard, config: int = 1) -> float:
     value_score = sum(grid[i][j] ** 2 for i in range(4) for j in range(4) if grid[i][j] != 0)
     
     # ===== COMPONENTE 7: Estrategia de esquina =====
-    weights = np.array([
-        [16, 8, 8, 16],
-        [8,  4, 4, 8],
-        [8,  4, 4, 8],
-        [16, 8, 8, 16]
-    ])
+    weights = HeuristicKernels.CORNER_WEIGHTS
     corner_score = sum(grid[i][j] * weights[i][j] for i in range(4) for j in range(4) if grid[i][j] != 0)
     
     # ===== COMPONENTE 8: Bonus por milestones =====
@@ -190,26 +202,16 @@ def complex_heuristic(board: GameBoard, config: int = 1) -> float:
         milestone_bonus = 0.0
     
     # ===== COMBINACIÓN CON PESOS =====
-    if config == 1:
-        # Configuración 1: Equilibrada
-        total = (monotonicity_score * 5.0 +
-                smoothness_score * 2.0 +
-                empty_score * 8.0 +
-                max_corner_score * 0.1 +
-                merge_score * 6.0 +
-                value_score * 0.0001 +
-                corner_score * 0.01 +
-                milestone_bonus)
-    else:
-        # Configuración 2: Defensiva (más peso en vacías y monotonía)
-        total = (monotonicity_score * 8.0 +
-                smoothness_score * 3.0 +
-                empty_score * 12.0 +
-                max_corner_score * 0.15 +
-                merge_score * 4.0 +
-                value_score * 0.00005 +
-                corner_score * 0.005 +
-                milestone_bonus)
+    (w_mono, w_smooth, w_empty, w_max_corner,
+     w_merge, w_value, w_corner) = COMPLEX_WEIGHTS[1 if config == 1 else 2]
+    total = (monotonicity_score * w_mono +
+            smoothness_score * w_smooth +
+            empty_score * w_empty +
+            max_corner_score * w_max_corner +
+            merge_score * w_merge +
+            value_score * w_value +
+            corner_score * w_corner +
+            milestone_bonus)
     
     return total
 
@@ -300,6 +302,116 @@ def _max_tile_corner(board: GameBoard) -> float:
     return -5000.0
 
 
+# ============================================================
+# VERSIONES CON TABLAS POR LÍNEA
+# ============================================================
+
+_INTERMEDIATE_TABLES = {cfg: HeuristicTables.intermediate_tables(w)
+                        for cfg, w in INTERMEDIATE_WEIGHTS.items()}
+_COMPLEX_TABLES = {cfg: HeuristicTables.complex_tables(w)
+                   for cfg, w in COMPLEX_WEIGHTS.items()}
+
+
+def intermediate_heuristic_table(board: GameBoard, config: int = 1) -> float:
+    """
+    Misma heurística que intermediate_heuristic, evaluada con 8 lecturas de
+    tablas por línea sobre el bitboard.
+    """
+    config = 1 if config == 1 else 2
+    return HeuristicTables.intermediate_eval(board.bits, HeuristicTables.LINE_FEATURES,
+                                             _INTERMEDIATE_TABLES[config],
+                                             INTERMEDIATE_WEIGHTS[config])
+
+
+def complex_heuristic_table(board: GameBoard, config: int = 1) -> float:
+    """
+    Misma heurística que complex_heuristic, evaluada con 8 lecturas de
+    tablas por línea sobre el bitboard.
+    """
+    config = 1 if config == 1 else 2
+    return HeuristicTables.complex_eval(board.bits, HeuristicTables.LINE_FEATURES,
+                                        _COMPLEX_TABLES[config],
+                                        COMPLEX_WEIGHTS[config])
+
+
+# ============================================================
+# VERSIONES CON KERNELS DE NUMBA
+# ============================================================
+
+def intermediate_heuristic_numba(board: GameBoard, config: int = 1) -> float:
+    """
+    Misma heurística que intermediate_heuristic, con los componentes
+    calculados por kernels de numba (resultado idéntico bit a bit).
+    """
+    grid = board.grid
+    max_tile = board.get_max_tile()
+    
+    monotonicity_score = HeuristicKernels.monotonicity(grid)
+    empty_score = HeuristicKernels.count_empty(grid)
+    max_corner_score = HeuristicKernels.max_corner_position(grid, max_tile)
+    smoothness_score = HeuristicKernels.smoothness(grid)
+    positional_score = HeuristicKernels.positional_score(grid, HeuristicKernels.POSITION_WEIGHTS)
+    
+    W1, W2, W3, W4, W5 = INTERMEDIATE_WEIGHTS[1 if config == 1 else 2]
+    
+    return (W1 * monotonicity_score + 
+            W2 * empty_score + 
+            W3 * max_corner_score - 
+            W4 * smoothness_score + 
+            W5 * positional_score)
+
+
+def complex_heuristic_numba(board: GameBoard, config: int = 1) -> float:
+    """
+    Misma heurística que complex_heuristic, con los componentes calculados
+    por kernels de numba (resultado idéntico bit a bit).
+    """
+    grid = board.grid
+    max_tile = board.get_max_tile()
+    
+    monotonicity_score = HeuristicKernels.monotonicity(grid)
+    smoothness_score = HeuristicKernels.smoothness(grid)
+    
+    empty = HeuristicKernels.count_empty(grid)
+    if empty >= 8:
+        empty_score = empty * 100.0
+    elif empty >= 6:
+        empty_score = empty * 50.0
+    elif empty >= 3:
+        empty_score = empty * 30.0
+    else:
+        empty_score = empty * 15.0
+    
+    max_corner_score = HeuristicKernels.max_tile_corner(grid, max_tile)
+    merge_score = HeuristicKernels.merge_potential(grid)
+    value_score = HeuristicKernels.value_score(grid)
+    corner_score = HeuristicKernels.corner_score(grid, HeuristicKernels.CORNER_WEIGHTS)
+    
+    if max_tile >= 2048:
+        milestone_bonus = 100000.0
+    elif max_tile >= 1024:
+        milestone_bonus = 50000.0
+    elif max_tile >= 512:
+        milestone_bonus = 10000.0
+    elif max_tile >= 256:
+        milestone_bonus = 2000.0
+    else:
+        milestone_bonus = 0.0
+    
+    (w_mono, w_smooth, w_empty, w_max_corner,
+     w_merge, w_value, w_corner) = COMPLEX_WEIGHTS[1 if config == 1 else 2]
+    total = (monotonicity_score * w_mono +
+            smoothness_score * w_smooth +
+            empty_score * w_empty +
+            max_corner_score * w_max_corner +
+            merge_score * w_merge +
+            value_score * w_value +
+            corner_score * w_corner +
+            milestone_bonus)
+    
+    return total
+
+
 # ============================================================
 # DICCIONARIO Y HELPER
 # ============================================================
@@ -310,20 +422,257 @@ HEURISTICS = {
     'complex': complex_heuristic
 }
 
+TABLE_HEURISTICS = {
+    'simple': simple_heuristic,
+    'intermediate': intermediate_heuristic_table,
+    'complex': complex_heuristic_table
+}
+
+NUMBA_HEURISTICS = {
+    'simple': simple_heuristic,
+    'intermediate': intermediate_heuristic_numba,
+    'complex': complex_heuristic_numba
+}
+
+# Implementaciones disponibles de cada heurística
+HEURISTIC_BACKENDS = {
+    'python': HEURISTICS,
+    'table': TABLE_HEURISTICS,
+    'numba': NUMBA_HEURISTICS
+}
+
 
-def get_heuristic(name: str):
+def get_heuristic(name: str, backend: str = 'python'):
     """
     Obtiene una función heurística por nombre.
     
     Args:
         name: 'simple', 'intermediate', o 'complex'
+        backend: 'python' (implementación original), 'table' (tablas por
+            línea) o 'numba' (kernels idénticos a la implementación original)
     
     Returns:
         Función heurística
     """
-    if name not in HEURISTICS:
+    heuristics = HEURISTIC_BACKENDS[backend]
+    if name not in heuristics:
         print(f"ADVERTENCIA: Heurística '{name}' no encontrada. Usando 'intermediate'.")
-        return HEURISTICS['intermediate']
+        return heuristics['intermediate']
     
-    return HEURISTICS[name]
+    return heuristics[name]
+
+
+
+
+def make_heuristic(name: str, config: int = 1, backend: str = 'python'):
+    """
+    Heurística con la configuración fijada, lista para asignar a
+    agent.heuristic_func. Es un functools.partial (no una lambda), así que se
+    puede serializar con pickle y heuristic_spec puede recuperar nombre y
+    configuración. Con backend='table' los agentes evalúan las hojas en batch
+    y pueden usar el motor nativo.
+    """
+    return functools.partial(get_heuristic(name, backend), config=config)
+
+
+def heuristic_spec(func) -> tuple[str, int] | None:
+    """
+    Devuelve (nombre, config) si func es una heurística de tablas creada con
+    make_heuristic, es decir, si evaluate_batch da exactamente los mismos
+    valores que llamarla tablero por tablero. En otro caso devuelve None.
+    """
+    if not isinstance(func, functools.partial) or func.args:
+        return None
+    if set(func.keywords) - {'config'}:
+        return None
+    for name, heuristic in TABLE_HEURISTICS.items():
+        if func.func is heuristic:
+            return name, func.keywords.get('config', 1)
+    return None
+
+
+# ============================================================
+# COTAS
+# ============================================================
+
+# Las podas Star1/Star2 de Expectimax acotan el valor de los hijos todavía no
+# evaluados con las cotas [L, U] de la heurística, así que las cotas deciden si
+# la poda sirve: una cota válida para cualquier tablero (con fichas de hasta
+# 32768) es varios órdenes de magnitud más ancha que los valores de una
+# partida real y la poda casi nunca corta. Por eso las cotas se calculan por
+# ficha máxima: HEURISTIC_BOUNDS[nombre][config][e] vale para los tableros
+# sin fichas mayores a 2**e, tomando el mínimo y el máximo de cada término por
+# línea solo entre las líneas con fichas <= 2**e. Debajo de un nodo de chance
+# la suma de las fichas crece a lo sumo 4 por ficha agregada, lo que acota la
+# ficha máxima de sus hojas (ver Expectimax_Agent._node_bounds).
+
+# Exponente de la ficha más grande de cada una de las 65536 líneas
+_LINE_MAX_EXPONENT = np.max([(np.arange(65536) >> (4 * j)) & 0xF for j in range(4)], axis=0)
+
+
+def _milestone_bonus_bounds(max_tile: float) -> tuple[float, float]:
+    # Bonus por milestones de la heurística compleja (crece con la ficha máxima)
+    for milestone, bonus in ((2048, 100000.0), (1024, 50000.0), (512, 10000.0), (256, 2000.0)):
+        if max_tile >= milestone:
+            return 0.0, bonus
+    return 0.0, 0.0
+
+
+def _heuristic_bounds(name: str, config: int, max_exponent: int) -> tuple[float, float]:
+    """
+    Cotas inferior y superior de una heurística sobre los tableros sin fichas
+    mayores a 2**max_exponent, sumando el mínimo y el máximo de cada término
+    por línea (tablas de HeuristicTables, solo las líneas posibles) y el rango
+    de los términos de la ficha máxima.
+    """
+    max_tile = float(1 << max_exponent) if max_exponent > 0 else 0.0
+    # La simple no tiene términos por línea
+    if name == 'simple':
+        if config == 1:
+            return 0.0, 16 * 10.0 + max_tile
+        return 0.0, 16 * 20.0 + max_tile * 0.5
+    
+    valid = _LINE_MAX_EXPONENT <= max_exponent
+    f = HeuristicTables.LINE_FEATURES[:, valid]
+    # Cada max(a, b) de la monotonía es <= 0 y >= la suma de 4 líneas de a
+    mono_low = 8 * max(f[HeuristicTables.MONO_A].min(), f[HeuristicTables.MONO_B].min())
+    mono_high = 0.0
+    
+    if name == 'intermediate':
+        W1, _, W3, _, W5 = INTERMEDIATE_WEIGHTS[config]
+        tables = _INTERMEDIATE_TABLES[config][:, valid]
+        rows = [tables[0] - W5 * i * f[HeuristicTables.LOG_SUM] for i in range(4)]
+        low = (W1 * mono_low + sum(row.min() for row in rows) + 4 * tables[1].min()
+               - W3 * max_tile)
+        high = W1 * mono_high + sum(row.max() for row in rows) + 4 * tables[1].max() + W3 * max_tile
+        return float(low), float(high)
+    
+    w_mono, _, w_empty, w_max_corner, _, _, _ = COMPLEX_WEIGHTS[config]
+    tables = _COMPLEX_TABLES[config][:, valid]
+    bonus_low, bonus_high = _milestone_bonus_bounds(max_tile)
+    low = (w_mono * mono_low + 2 * tables[0].min() + 2 * tables[1].min() + 4 * tables[2].min()
+           - w_max_corner * 5000.0 + bonus_low)
+    high = (w_mono * mono_high + 2 * tables[0].max() + 2 * tables[1].max() + 4 * tables[2].max()
+            + w_empty * 16 * 100.0 + w_max_corner * 10000.0 + bonus_high)
+    return float(low), float(high)
+
+
+# HEURISTIC_BOUNDS[nombre][config][e] = (cota inferior, cota superior) sobre
+# los tableros sin fichas mayores a 2**e, para podas que necesitan acotar el
+# valor de las hojas (Star1/Star2 en Expectimax). El último elemento vale para
+# cualquier tablero.
+HEURISTIC_BOUNDS = {name: {config: tuple(_heuristic_bounds(name, config, e)
+                                         for e in range(Bitboard.MAX_EXPONENT + 1))
+                           for config in (1, 2)}
+                    for name in HEURISTICS}
+
+
+def heuristic_bounds(func) -> tuple[tuple[float, float], ...] | None:
+    """
+    Cotas (inferior, superior) por exponente de la ficha máxima (ver
+    HEURISTIC_BOUNDS) de una heurística creada con make_heuristic, en
+    cualquiera de sus implementaciones. Devuelve None si no se reconoce.
+    """
+    if not isinstance(func, functools.partial) or func.args:
+        return None
+    for heuristics in HEURISTIC_BACKENDS.values():
+        for name, heuristic in heuristics.items():
+            if func.func is heuristic:
+                config = 1 if func.keywords.get('config', 1) == 1 else 2
+                return HEURISTIC_BOUNDS[name][config]
+    return None
+
+
+# ============================================================
+# SIMETRÍA
+# ============================================================
+
+# Si la heurística da el mismo valor en los 8 simétricos de un tablero (ver
+# Bitboard.canonical). La intermedia no: sus pesos posicionales y el bonus de
+# la ficha máxima favorecen la esquina (0, 0). En la compleja todos los
+# términos son simétricos (los pesos de esquina también); los valores pueden
+# diferir solo en el redondeo del orden de las sumas.
+SYMMETRIC_HEURISTICS = {
+    'simple': True,
+    'intermediate': False,
+    'complex': True,
+}
+
+
+def heuristic_is_symmetric(func) -> bool:
+    """
+    Indica si una heurística creada con make_heuristic (en cualquiera de sus
+    implementaciones) es simétrica. Devuelve False si no se reconoce.
+    """
+    if not isinstance(func, functools.partial) or func.args:
+        return False
+    for heuristics in HEURISTIC_BACKENDS.values():
+        for name, heuristic in heuristics.items():
+            if func.func is heuristic:
+                return SYMMETRIC_HEURISTICS[name]
+    return False
+
+
+# ============================================================
+# EVALUACIÓN EN BATCH
+# ============================================================
+
+def evaluate_batch(boards, name: str, config: int = 1) -> np.ndarray:
+    """
+    Evalúa muchos tableros en un solo llamado compilado.
+
+    Args:
+        boards: Array de bitboards uint64, BoardBatch o lista de GameBoard
+        name: 'simple', 'intermediate', o 'complex'
+        config: 1 o 2 (configuración de pesos)
+
+    Returns:
+        Array float64 con el valor de cada tablero (igual al de la versión
+        con tablas de la heurística)
+    """
+    if isinstance(boards, BoardBatch):
+        bits = boards.boards
+    elif isinstance(boards, np.ndarray):
+        bits = np.ascontiguousarray(boards, dtype=np.uint64)
+    else:
+        bits = np.array([board.bits for board in boards], dtype=np.uint64)
+
+    config = 1 if config == 1 else 2
+    out = np.empty(bits.shape[0])
+    if name == 'simple':
+        HeuristicTables.simple_eval_all(bits, config, out)
+    elif name == 'intermediate':
+        HeuristicTables.intermediate_eval_all(bits, HeuristicTables.LINE_FEATURES,
+                                              _INTERMEDIATE_TABLES[config],
+                                              INTERMEDIATE_WEIGHTS[config], out)
+    elif name == 'complex':
+        HeuristicTables.complex_eval_all(bits, HeuristicTables.LINE_FEATURES,
+                                         _COMPLEX_TABLES[config],
+                                         COMPLEX_WEIGHTS[config], out)
+    else:
+        raise ValueError(f"Heurística desconocida: {name}")
+    return out
+
+
+def evaluate_children(boards: list, name: str, config: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Expande cada bitboard en las 4 direcciones y evalúa todos los hijos en
+    un solo llamado (las hojas de nodos MAX de profundidad 1).
+
+    Args:
+        boards: Lista o array de K bitboards
+
+    Returns:
+        (masks, values): máscara de movimientos legales (K,) y valores (K, 4)
+        de cada hijo. Para los tableros sin movimientos, values[k, 0] es el
+        valor del propio tablero.
+    """
+    bits = np.array(boards, dtype=np.uint64)
+    children = np.empty((len(bits), 4), dtype=np.uint64)
+    masks = np.empty(len(bits), dtype=np.uint8)
+    Bitboard.expand_all(bits, Bitboard.ROW_TABLES, children, masks)
 
+    terminal = masks == 0
+    children[terminal, 0] = bits[terminal]
+    values = evaluate_batch(children.ravel(), name, config).reshape(-1, 4)
+    return masks, values
@@ -0,0 +1,238 @@
+"""
+Modelo de latencia por profundidad para elegir la profundidad de búsqueda.
+
+get_adaptive_depth elige la profundidad con umbrales fijos de celdas vacías,
+sin tener en cuenta cuánto cuesta de verdad ramificar ni la velocidad de la
+máquina. Este modelo aprende, para cada profundidad, una regresión lineal del
+logaritmo del tiempo y de los nodos explorados sobre características del
+tablero (celdas vacías, fichas distintas, movimientos legales):
+
+    log(segundos) ~ w0 + w1 * vacías + w2 * distintas + w3 * legales
+
+Se entrena online (observe después de cada jugada, con olvido exponencial
+para seguir cambios de la máquina) o desde jugadas registradas (fit, load).
+choose_depth elige la profundidad más profunda cuyo tiempo estimado entra en
+la latencia objetivo. Una profundidad todavía sin datos se estima con la
+anterior por el crecimiento entre las dos anteriores, pero solo un nivel más
+allá de la última con datos: el error de extrapolar varios niveles crece
+exponencialmente, así que el modelo se anima a cada nivel nuevo de a uno.
+
+Las características se recortan al rango visto en cada profundidad: la
+regresión no se extrapola a tableros muy distintos de los que la entrenaron.
+
+Las últimas jugadas observadas quedan en log con el tiempo estimado y el
+real, para poder auditar el modelo (ver stats). El log tiene un tamaño
+máximo: la regresión solo usa sumas acumuladas, así que una partida larga no
+hace crecer la memoria.
+"""
+import collections
+import json
+
+import numpy as np
+
+from GameBoard import GameBoard
+
+# Crecimiento del tiempo por nivel cuando no hay dos profundidades con datos
+DEFAULT_GROWTH = 10.0
+NUM_FEATURES = 4  # Constante, vacías, fichas distintas, movimientos legales
+
+
+def board_features(board: GameBoard) -> tuple[int, int, int]:
+    """
+    Características del tablero que usa el modelo.
+
+    Returns:
+        (celdas vacías, fichas distintas, movimientos legales)
+    """
+    grid = board.grid
+    tiles = grid[grid > 0]
+    return (int(grid.size - tiles.size), int(np.unique(tiles).size),
+            bin(board.get_move_mask()).count('1'))
+
+
+class LatencyModel:
+    """
+    Regresión por profundidad de log(tiempo) y log(nodos) sobre board_features.
+    - log: una entrada por jugada observada (estimado y real), solo las
+      últimas max_log
+    - observations: jugadas observadas en total (también las que ya no están en log)
+    """
+
+    def __init__(self, decay: float = 0.995, min_samples: int = 8, ridge: float = 1e-3,
+                 max_log: int = 10000):
+        """
+        Args:
+            decay: Peso que conservan las observaciones anteriores en cada
+                observación nueva (1.0 = sin olvido)
+            min_samples: Observaciones necesarias para usar la regresión de una profundidad
+            ridge: Regularización de la regresión (evita sistemas singulares
+                cuando una característica todavía no varió)
+            max_log: Jugadas que se conservan en log (las más viejas se descartan)
+        """
+        self.decay = decay
+        self.min_samples = min_samples
+        self.ridge = ridge
+        self.log = collections.deque(maxlen=max_log)
+        self.observations = 0
+        self.clear()
+
+    def clear(self) -> None:
+        """Descarta lo aprendido (el log se mantiene)"""
+        # profundidad -> [X^T X, X^T log(segundos), X^T log(nodos), observaciones]
+        self._sums = {}
+        self._weights = {}  # profundidad -> (pesos del tiempo, pesos de los nodos)
+        self._ranges = {}  # profundidad -> (mínimo, máximo) de cada fila observada
+
+    @staticmethod
+    def _row(features: tuple) -> np.ndarray:
+        return np.array((1.0,) + tuple(float(f) for f in features))
+
+    def observe(self, features: tuple, depth: int, seconds: float, nodes: int,
+                target_ms: float | None = None) -> None:
+        """
+        Agrega una jugada buscada con la profundidad dada y la registra en log
+        junto con lo que el modelo estimaba antes de verla.
+        """
+        predicted_seconds, predicted_nodes = self.predict(features, depth)
+        self.observations += 1
+        self.log.append({
+            'depth': depth,
+            'features': list(features),
+            'predicted_ms': predicted_seconds * 1000 if predicted_seconds is not None else None,
+            'actual_ms': seconds * 1000,
+            'predicted_nodes': predicted_nodes,
+            'nodes': nodes,
+            'target_ms': target_ms,
+        })
+
+        x = self._row(features)
+        if depth not in self._sums:
+            self._sums[depth] = [np.zeros((NUM_FEATURES, NUM_FEATURES)), np.zeros(NUM_FEATURES),
+                                 np.zeros(NUM_FEATURES), 0]
+        sums = self._sums[depth]
+        sums[0] = self.decay * sums[0] + np.outer(x, x)
+        sums[1] = self.decay * sums[1] + x * np.log(max(seconds, 1e-6))
+        sums[2] = self.decay * sums[2] + x * np.log(max(nodes, 1))
+        sums[3] += 1
+        low, high = self._ranges.get(depth, (x, x))
+        self._ranges[depth] = (np.minimum(low, x), np.maximum(high, x))
+        self._weights.pop(depth, None)  # Se vuelve a resolver en el próximo predict
+
+    def records_since(self, observations: int) -> list[dict]:
+        """
+        Entradas del log de las jugadas observadas después de que
+        self.observations valía observations (las que siguen en el log).
+        """
+        count = min(self.observations - observations, len(self.log))
+        return list(self.log)[len(self.log) - count:]
+
+    def fit(self, records: list[dict]) -> 'LatencyModel':
+        """
+        Entrena con jugadas registradas (entradas con el formato de log).
+
+        Returns:
+            El propio modelo
+        """
+        for record in records:
+            self.observe(tuple(record['features']), record['depth'], record['actual_ms'] / 1000,
+                         record['nodes'], record.get('target_ms'))
+        return self
+
+    def _depth_weights(self, depth: int) -> tuple | None:
+        sums = self._sums.get(depth)
+        if sums is None or sums[3] < self.min_samples:
+            return None
+        if depth not in self._weights:
+            regularized = sums[0] + self.ridge * np.eye(NUM_FEATURES)
+            self._weights[depth] = (np.linalg.solve(regularized, sums[1]),
+                                    np.linalg.solve(regularized, sums[2]))
+        return self._weights[depth]
+
+    def predict(self, features: tuple, depth: int) -> tuple[float | None, float | None]:
+        """
+        Tiempo y nodos estimados para buscar con la profundidad dada, usando
+        solo la regresión de esa profundidad.
+
+        Returns:
+            (segundos, nodos), o (None, None) si la profundidad no tiene
+            suficientes observaciones
+        """
+        weights = self._depth_weights(depth)
+        if weights is None:
+            return None, None
+        x = np.clip(self._row(features), *self._ranges[depth])
+        return float(np.exp(x @ weights[0])), float(np.exp(x @ weights[1]))
+
+    def estimate_seconds(self, features: tuple, depth: int) -> float | None:
+        """
+        Tiempo estimado para la profundidad dada; si no tiene datos, se
+        extrapola desde la anterior.
+
+        Returns:
+            Segundos, o None si ni la profundidad ni la anterior tienen datos
+        """
+        estimates = {}
+        for d in range(max(1, depth - 2), depth + 1):
+            seconds, _ = self.predict(features, d)
+            if seconds is None and d == depth and d - 1 in estimates:
+                growth = DEFAULT_GROWTH
+                if d - 2 in estimates and estimates[d - 2] > 0:
+                    growth = max(estimates[d - 1] / estimates[d - 2], 1.0)
+                seconds = estimates[d - 1] * growth
+            if seconds is not None:
+                estimates[d] = seconds
+        return estimates.get(depth)
+
+    def choose_depth(self, board: GameBoard, target_ms: float, min_depth: int = 2,
+                     max_depth: int = 20) -> int | None:
+        """
+        Profundidad más profunda cuyo tiempo estimado entra en target_ms
+        (al menos min_depth, y a lo sumo un nivel más que la última con datos).
+
+        Returns:
+            La profundidad, o None si todavía no hay datos para estimar min_depth
+        """
+        features = board_features(board)
+        if self.estimate_seconds(features, min_depth) is None:
+            return None
+        depth = min_depth
+        while depth < max_depth:
+            seconds = self.estimate_seconds(features, depth + 1)
+            if seconds is None or seconds * 1000 > target_ms:
+                break
+            depth += 1
+        return depth
+
+    def stats(self) -> dict:
+        """
+        Resumen del log (las últimas max_log jugadas) para auditar el modelo:
+        error de las estimaciones (en escala logarítmica, solo jugadas con
+        estimación) y jugadas que superaron la latencia objetivo.
+        """
+        estimated = [r for r in self.log if r['predicted_ms'] is not None]
+        errors = [abs(np.log(max(r['actual_ms'], 1e-3) / max(r['predicted_ms'], 1e-3)))
+                  for r in estimated]
+        with_target = [r for r in self.log if r['target_ms'] is not None]
+        return {
+            'observations': self.observations,
+            'logged': len(self.log),
+            'estimated': len(estimated),
+            'depths': sorted(d for d in self._sums if self._sums[d][3] >= self.min_samples),
+            'median_log_error': float(np.median(errors)) if errors else None,
+            'mean_ratio': float(np.exp(np.mean([np.log(max(r['actual_ms'], 1e-3) /
+                                                        max(r['predicted_ms'], 1e-3))
+                                                 for r in estimated]))) if estimated else None,
+            'over_target': sum(r['actual_ms'] > r['target_ms'] for r in with_target),
+        }
+
+    def save(self, path: str) -> None:
+        """Guarda el log en JSON (el modelo se reconstruye con load)"""
+        with open(path, 'w') as f:
+            json.dump(list(self.log), f)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'LatencyModel':
+        """Modelo entrenado con un log guardado con save"""
+        with open(path) as f:
+            records = json.load(f)
+        return cls(**kwargs).fit(records)
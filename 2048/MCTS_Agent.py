@@ -0,0 +1,210 @@
+"""
+Agente Monte Carlo Tree Search (MCTS) para jugar 2048.
+
+El árbol alterna dos tipos de nodos, como Expectimax:
+- Nodos de decisión: tablero antes de mover; sus hijos son los movimientos
+  legales y se eligen con UCT.
+- Nodos de chance: tablero después de mover (antes de la ficha); sus hijos son
+  las fichas que pueden aparecer, que se muestrean con sus probabilidades
+  reales (celda uniforme, 2 con 90% y 4 con 10%).
+
+Cada iteración baja por el árbol hasta un nodo de decisión nuevo, lo evalúa
+con la heurística del agente (Heuristics.py) y propaga el valor hacia la raíz
+(promedio de las evaluaciones del subárbol). No hay rollouts: la hoja vale su
+heurística. Como la escala de las heurísticas es muy distinta entre sí (y
+crece a lo largo de la partida), UCT usa el valor medio de cada movimiento
+normalizado al rango de los valores de sus hermanos.
+
+El árbol se conserva entre jugadas: después del movimiento elegido y de la
+ficha que apareció de verdad, el subárbol correspondiente pasa a ser la raíz
+(si esa ficha ya se había muestreado). La búsqueda para por cantidad de
+nodos evaluados o por tiempo, así que el costo por jugada se elige libremente.
+"""
+import math
+import time
+
+import numpy as np
+
+from Agent import Agent
+from AfterstateCache import AfterstateCache
+from GameBoard import GameBoard
+
+
+class _DecisionNode:
+    """Tablero antes de mover. children: dirección -> _ChanceNode (se crean al expandir)."""
+
+    __slots__ = ('bits', 'visits', 'value_sum', 'children', 'terminal')
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self.visits = 0
+        self.value_sum = 0.0
+        self.children = None
+        self.terminal = False
+
+
+class _ChanceNode:
+    """Tablero después de mover. children: bitboard con la ficha -> _DecisionNode."""
+
+    __slots__ = ('bits', 'visits', 'value_sum', 'children', 'empty_cells')
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self.visits = 0
+        self.value_sum = 0.0
+        self.children = {}
+        self.empty_cells = [k for k in range(16) if not (bits >> (4 * k)) & 0xF]
+
+
+class MCTSAgent(Agent):
+    """
+    Agente que usa MCTS con nodos de chance y hojas evaluadas con heurística.
+    - nodes_explored: hojas evaluadas en la última jugada
+    - reused_visits: visitas de la raíz heredadas de la jugada anterior
+    """
+
+    def __init__(self, max_nodes=2000, time_budget_ms=None, exploration=0.3, reuse_tree=True,
+                 seed=None):
+        """
+        Args:
+            max_nodes: Hojas evaluadas (iteraciones) por jugada. Con
+                time_budget_ms se usa como tope adicional (None = sin tope)
+            time_budget_ms: Tiempo máximo por movimiento (None = sin límite)
+            exploration: Constante de exploración de UCT (sobre valores
+                normalizados a [0, 1] entre hermanos)
+            reuse_tree: Si True, el subárbol de la jugada real pasa a ser la
+                raíz de la búsqueda siguiente
+            seed: Semilla del muestreo de fichas
+        """
+        if max_nodes is None and time_budget_ms is None:
+            raise ValueError("Se necesita max_nodes o time_budget_ms")
+        self.max_nodes = max_nodes
+        self.time_budget_ms = time_budget_ms
+        self.exploration = exploration
+        self.reuse_tree = reuse_tree
+        self.rng = np.random.default_rng(seed)
+        self.heuristic_func = None  # Se asigna externamente
+
+        self.nodes_explored = 0
+        self.reused_visits = 0
+        self.afterstates = AfterstateCache()
+        self._root = None  # Raíz de la última búsqueda
+        self._last_chance = None  # Nodo de chance del movimiento elegido
+
+    def reset(self) -> None:
+        """Descarta el árbol (p. ej. al empezar otra partida)"""
+        self._root = None
+        self._last_chance = None
+
+    def play(self, board: GameBoard) -> int:
+        """
+        Elige el movimiento más visitado de la raíz después de la búsqueda.
+
+        Returns:
+            Acción a tomar (0=UP, 1=DOWN, 2=LEFT, 3=RIGHT)
+        """
+        self.nodes_explored = 0
+        root = self._find_root(int(board.bits))
+        self.reused_visits = root.visits
+
+        self._expand(root)
+        if root.terminal:
+            self.reset()
+            return 0  # No hay movimientos válidos
+
+        deadline = None
+        if self.time_budget_ms is not None:
+            deadline = time.perf_counter() + self.time_budget_ms / 1000
+        while self.max_nodes is None or self.nodes_explored < self.max_nodes:
+            self._iterate(root)
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        # Hijo más visitado (desempata por valor medio)
+        best_action = max(root.children, key=lambda move: (
+            root.children[move].visits,
+            root.children[move].value_sum / max(1, root.children[move].visits)))
+        self._root = root
+        self._last_chance = root.children[best_action]
+        return best_action
+
+    def _find_root(self, bits: int) -> _DecisionNode:
+        """Subárbol del tablero actual si la ficha que apareció ya se había muestreado."""
+        if self.reuse_tree and self._last_chance is not None:
+            node = self._last_chance.children.get(bits)
+            if node is not None:
+                return node
+        if self._root is not None and self._root.bits == bits:
+            return self._root  # play() repetido sobre el mismo tablero
+        return _DecisionNode(bits)
+
+    def _expand(self, node: _DecisionNode) -> None:
+        """Crea los nodos de chance de los movimientos legales (una sola vez)."""
+        if node.children is not None:
+            return
+        mask, children, _, _ = self.afterstates.expand(np.uint64(node.bits))
+        node.children = {move: _ChanceNode(int(children[move]))
+                         for move in range(4) if mask >> move & 1}
+        node.terminal = not node.children
+
+    def _iterate(self, root: _DecisionNode) -> None:
+        """Una iteración: selección, expansión, evaluación de la hoja y propagación."""
+        path = [root]
+        node = root
+        while node.visits > 0 and not node.terminal:
+            self._expand(node)
+            if node.terminal:
+                break
+            chance = self._select(node)
+            path.append(chance)
+            node = self._sample_spawn(chance)
+            path.append(node)
+
+        value = self._evaluate(node)  # Hoja nueva o fin de juego
+        self.nodes_explored += 1
+
+        for visited in path:
+            visited.visits += 1
+            visited.value_sum += value
+
+    def _select(self, node: _DecisionNode) -> _ChanceNode:
+        """
+        UCT: primero los movimientos sin visitar; después valor medio
+        normalizado al rango de los hermanos + exploración.
+        """
+        children = list(node.children.values())
+        for chance in children:
+            if chance.visits == 0:
+                return chance
+        means = [chance.value_sum / chance.visits for chance in children]
+        low = min(means)
+        scale = max(means) - low
+        if scale <= 0:
+            scale = 1.0
+        log_visits = math.log(node.visits)
+        scores = [(mean - low) / scale + self.exploration * math.sqrt(log_visits / chance.visits)
+                  for mean, chance in zip(means, children)]
+        return children[scores.index(max(scores))]
+
+    def _sample_spawn(self, chance: _ChanceNode) -> _DecisionNode:
+        """Muestrea la ficha que aparece y devuelve (o crea) el nodo de decisión."""
+        cell = chance.empty_cells[self.rng.integers(len(chance.empty_cells))]
+        exponent = 1 if self.rng.random() < 0.9 else 2
+        bits = chance.bits | (exponent << (4 * cell))
+        node = chance.children.get(bits)
+        if node is None:
+            node = chance.children[bits] = _DecisionNode(bits)
+        return node
+
+    def _evaluate(self, node: _DecisionNode) -> float:
+        """Valor de una hoja con la heurística del agente."""
+        return self.heuristic_utility(GameBoard.from_bits(np.uint64(node.bits), 'bitboard'))
+
+    def heuristic_utility(self, board: GameBoard) -> float:
+        """
+        Usa la función heurística configurada.
+        """
+        if self.heuristic_func is None:
+            # Fallback simple si no se asignó heurística
+            return len(board.get_available_cells()) * 10.0 + board.get_max_tile()
+        return self.heuristic_func(board)
@@ -3,8 +3,32 @@ Agente que utiliza el algoritmo Minimax con Alpha-Beta Pruning para jugar 2048.
 Aunque Minimax es típico para juegos adversariales, se puede adaptar para 2048.
 """
 from Agent import Agent
+from AfterstateCache import AfterstateCache
 from GameBoard import GameBoard
+from Heuristics import evaluate_children, heuristic_is_symmetric, heuristic_spec
+from LatencyModel import LatencyModel, board_features
+from NativeSearch import NativeTable
+from ParallelSearch import SearchPool
+from TranspositionTable import EXACT, LOWER, MAX_NODE_KEY, NO_MOVE, UPPER, TranspositionTable
+import Bitboard
+import NativeSearch
 import numpy as np
+import time
+
+
+# Para _select_critical_cells, por celda (4*i + j): desplazamientos del
+# bitboard de las celdas del entorno 3x3 y bonus por posición
+_NEIGHBOR_SHIFTS = [[4 * (4 * ni + nj)
+                     for ni in range(max(0, i - 1), min(4, i + 2))
+                     for nj in range(max(0, j - 1), min(4, j + 2))]
+                    for i in range(4) for j in range(4)]
+# Priorizar esquinas y bordes (generalmente peor para el jugador)
+_CELL_BONUS = [1000 if i in (0, 3) and j in (0, 3) else 500 if i in (0, 3) or j in (0, 3) else 0
+               for i in range(4) for j in range(4)]
+
+
+class _SearchTimeout(Exception):
+    """Se lanza dentro de la búsqueda cuando se agota time_budget_ms."""
 
 
 class MinimaxAgent(Agent):
@@ -14,27 +38,93 @@ class MinimaxAgent(Agent):
     - Nodos MIN: simula el "oponente" (aparición de fichas en peor posición)
     """
     
-    def __init__(self, depth=4, use_alpha_beta=True, weights=None, weights_config=None):
+    ENGINES = ('python', 'native')
+    
+    def __init__(self, depth=4, use_alpha_beta=True, weights=None, weights_config=None,
+                 time_budget_ms=None, workers=None, engine='python', target_latency_ms=None,
+                 latency_model=None, aspiration=None):
         """
         Args:
             depth: Profundidad máxima de búsqueda
             use_alpha_beta: Si True, usa poda Alpha-Beta; si False, Minimax básico
             weights: DEPRECATED - No se usa
             weights_config: DEPRECATED - No se usa
+            time_budget_ms: Tiempo máximo por movimiento. Si se indica, se usa
+                iterative deepening en lugar de la profundidad adaptativa
+            workers: Si es mayor a 1, los movimientos de la raíz se evalúan en
+                paralelo en un pool persistente de procesos (ver ParallelSearch.py),
+                cada uno con ventana completa. Con time_budget_ms el tiempo se
+                controla entre iteraciones
+            engine: 'python' o 'native' (búsqueda compilada con numba, ver
+                NativeSearch.py; sin workers)
+            target_latency_ms: Si se indica, la profundidad adaptativa es la
+                más profunda que latency_model estima que entra en esta latencia
+                por jugada (con los umbrales fijos mientras no tenga datos)
+            latency_model: LatencyModel (p. ej. entrenado con jugadas
+                registradas). Si no se indica y hay target_latency_ms, se crea
+                uno vacío que aprende online
+            aspiration: Semiancho de la ventana de aspiración del iterative
+                deepening, como fracción del valor de la iteración anterior
+                (None la desactiva). Solo se usa con time_budget_ms, poda
+                Alpha-Beta y motor 'python' sin workers
         """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Motor '{engine}' desconocido. Opciones: {self.ENGINES}")
+        if engine == 'native' and workers is not None and workers > 1:
+            raise ValueError("El motor 'native' no admite workers")
         self.depth = depth
         self.use_alpha_beta = use_alpha_beta
+        self.time_budget_ms = time_budget_ms
+        self.workers = workers
+        self.engine = engine
+        self.target_latency_ms = target_latency_ms
+        if latency_model is None and target_latency_ms is not None:
+            latency_model = LatencyModel()
+        self.latency_model = latency_model  # Aprende de cada jugada con profundidad adaptativa
+        self.native_cache_size = 1 << 20  # Capacidad de la tabla del motor nativo
+        self.max_depth = 20  # Tope de profundidad del iterative deepening
         self.heuristic_func = None  # Se asigna externamente
         
         self.nodes_explored = 0
         self.pruned_nodes = 0
+        self.slides = 0  # Movimientos de tablero calculados (4 por expansión no memorizada)
+        self.completed_depth = 0  # Profundidad de la última búsqueda completa
         self.use_adaptive_depth = True  # Activar profundidad adaptativa
+        self.use_batch_eval = True  # Evaluar en batch las hojas de los nodos MIN de profundidad 1
+        self.aspiration = aspiration
+        self.aspiration_researches = 0  # Búsquedas repetidas por salir de la ventana
+        
+        self._deadline = None
+        self._next_time_check = np.inf  # nodes_explored al que se vuelve a mirar el reloj
+        self._pool = None  # Se crea en el primer play() con workers
+        self.afterstates = AfterstateCache()  # Movimientos ya calculados (entre ramas y turnos)
+        self._native_table = None  # Tabla del motor nativo (se crea en el primer play)
+    
+    def __getstate__(self) -> dict:
+        # El pool y el reloj no se serializan (el agente se copia a los procesos del pool)
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        state['_deadline'] = None
+        state['_next_time_check'] = np.inf
+        return state
+    
+    def close(self) -> None:
+        """Termina el pool de procesos, si hay uno"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
     
     def get_adaptive_depth(self, board: GameBoard) -> int:
         """Ajusta profundidad según número de celdas vacías para evitar explosión combinatoria."""
         if not self.use_adaptive_depth:
             return self.depth
         
+        if self.target_latency_ms is not None:
+            depth = self.latency_model.choose_depth(board, self.target_latency_ms,
+                                                    max_depth=self.max_depth)
+            if depth is not None:
+                return depth
+        
         empty_cells = len(board.get_available_cells())
         
         if empty_cells <= 3:
@@ -48,52 +138,220 @@ class MinimaxAgent(Agent):
     
     def play(self, board: GameBoard) -> int:
         """
-        Elige la mejor acción usando Minimax con profundidad adaptativa.
+        Elige la mejor acción usando Minimax con profundidad adaptativa,
+        o con iterative deepening si hay time_budget_ms.
         
         Returns:
             Acción a tomar (0=UP, 1=DOWN, 2=LEFT, 3=RIGHT)
         """
         self.nodes_explored = 0
         self.pruned_nodes = 0
+        self.slides = 0
+        self.aspiration_researches = 0
         
-        # Usar profundidad adaptativa
-        depth = self.get_adaptive_depth(board)
-        
-        best_action = None
-        best_value = -np.inf
-        alpha = -np.inf
-        beta = np.inf
-        
-        available_moves = board.get_available_moves()
+        _, available_moves, children = self._expand_node(board)
         
         if not available_moves:
             return 0
         
-        # Ordenar movimientos por heurística rápida (mejor poda)
+        ordered_moves = self._order_root_moves(children, available_moves)
+        
+        if self.engine == 'native':
+            return self._native_play(board, ordered_moves)
+        
+        if self.time_budget_ms is not None:
+            return self._iterative_deepening(children, ordered_moves)
+        
+        # Usar profundidad adaptativa
+        depth = self.get_adaptive_depth(board)
+        start = time.perf_counter()
+        best_action, _ = self._search_root(children, ordered_moves, depth)
+        self.completed_depth = depth
+        self._observe_latency(board, depth, start)
+        return best_action
+    
+    def _order_root_moves(self, children: list, moves: list) -> list:
+        """Ordena los movimientos de la raíz por heurística rápida (mejor poda)."""
         move_values = []
-        for move in available_moves:
-            board_copy = board.clone()
-            board_copy.move(move)
+        for move in moves:
+            board_copy = children[move]
             quick_val = len(board_copy.get_available_cells()) * 10 + board_copy.get_max_tile()
             move_values.append((move, quick_val))
         
         move_values.sort(key=lambda x: x[1], reverse=True)
+        return [move for move, _ in move_values]
+    
+    def _native_play(self, board: GameBoard, moves: list) -> int:
+        """
+        play() con la búsqueda compilada: misma profundidad adaptativa (o
+        iterative deepening con time_budget_ms, reordenando la raíz entre
+        iteraciones) y mismo criterio de elección en la raíz, con la tabla
+        del motor conservada entre turnos. No usa ventana de aspiración.
+        """
+        if self._native_table is None:
+            self._native_table = NativeTable(self.native_cache_size)
+        self._native_table.new_search()
+        heuristic = NativeSearch.agent_heuristic(self.heuristic_func)
+        stats = np.zeros(3, dtype=np.int64)
+        values = np.empty(4)
+        
+        def search(depth: int) -> int:
+            nonlocal moves
+            NativeSearch.minimax_root(board.bits, depth, np.array(moves, dtype=np.int64),
+                                      self.use_alpha_beta, heuristic,
+                                      self._native_table.arrays(), Bitboard.ROW_TABLES,
+                                      stats, values)
+            best_action = moves[0]
+            for move in moves:
+                if values[move] > values[best_action]:
+                    best_action = move
+            moves = sorted(moves, key=lambda move: values[move], reverse=True)
+            return best_action
+        
+        if self.time_budget_ms is not None:
+            best_action, self.completed_depth = NativeSearch.iterative_deepening(
+                search, self.time_budget_ms, self.max_depth)
+        else:
+            depth = self.get_adaptive_depth(board)
+            start = time.perf_counter()
+            best_action = search(depth)
+            self.completed_depth = depth
+        self.nodes_explored += int(stats[NativeSearch.NODES])
+        self.pruned_nodes += int(stats[NativeSearch.PRUNED])
+        self.slides += int(stats[NativeSearch.SLIDES])
+        if self.time_budget_ms is None:
+            self._observe_latency(board, depth, start)
+        return best_action
+    
+    def _observe_latency(self, board: GameBoard, depth: int, start: float) -> None:
+        """Registra en latency_model el tiempo y los nodos de la búsqueda que empezó en start."""
+        if self.latency_model is not None:
+            self.latency_model.observe(board_features(board), depth, time.perf_counter() - start,
+                                       self.nodes_explored, self.target_latency_ms)
+    
+    def _search_root(self, children: list, moves: list, depth: int,
+                     alpha: float = -np.inf, beta: float = np.inf) -> tuple[int, dict]:
+        """
+        Evalúa los movimientos de la raíz en el orden dado.
+        Con una ventana (alpha, beta) finita la búsqueda corta en el primer
+        movimiento que llegue a beta (ver _aspiration_search).
         
-        for move, _ in move_values:
-            board_copy = board.clone()
-            board_copy.move(move)
+        Returns:
+            (mejor movimiento, valor de cada movimiento)
+        """
+        if self.workers is not None and self.workers > 1:
+            return self._parallel_search_root(children, moves, depth)
+        
+        best_action = None
+        best_value = -np.inf
+        values = {}
+        
+        for move in moves:
+            board_copy = children[move]
             
             if self.use_alpha_beta:
                 value = self.minimax(board_copy, depth - 1, False, alpha, beta)
                 alpha = max(alpha, value)
             else:
                 value = self.minimax(board_copy, depth - 1, False, -np.inf, np.inf)
+            values[move] = value
             
             if value > best_value:
                 best_value = value
                 best_action = move
+            
+            if self.use_alpha_beta and value >= beta:
+                break  # Fuera de la ventana de aspiración
+        
+        return (best_action if best_action is not None else moves[0]), values
+    
+    def _aspiration_search(self, children: list, moves: list, depth: int,
+                           guess: float) -> tuple[int, dict]:
+        """
+        _search_root con una ventana alrededor del valor de la iteración
+        anterior (guess). Si el mejor valor cae fuera de la ventana, es solo
+        una cota y se repite la búsqueda con la ventana completa.
+        """
+        delta = self.aspiration * max(abs(guess), 1.0)
+        alpha = guess - delta
+        beta = guess + delta
+        best_action, values = self._search_root(children, moves, depth, alpha, beta)
+        if alpha < max(values.values()) < beta:
+            return best_action, values
+        
+        self.aspiration_researches += 1
+        return self._search_root(children, moves, depth)
+    
+    def _parallel_search_root(self, children: list, moves: list, depth: int) -> tuple[int, dict]:
+        """
+        _search_root con una tarea por movimiento en el pool de procesos.
+        Los movimientos no comparten alpha, así que cada uno se busca con
+        ventana completa.
+        """
+        if self._pool is None:
+            self._pool = SearchPool(self, self.workers)
+        
+        tasks = [('minimax', children[move].key(), (depth - 1, False, -np.inf, np.inf))
+                 for move in moves]
+        results = self._pool.run(tasks)
+        
+        best_action = None
+        best_value = -np.inf
+        values = {}
+        for move, (value, nodes, pruned, slides) in zip(moves, results):
+            self.nodes_explored += nodes
+            self.pruned_nodes += pruned
+            self.slides += slides
+            values[move] = value
+            if value > best_value:
+                best_value = value
+                best_action = move
+        
+        return (best_action if best_action is not None else moves[0]), values
+    
+    def _iterative_deepening(self, children: list, moves: list) -> int:
+        """
+        Búsqueda anytime: profundiza d = 1, 2, 3, ... hasta agotar
+        time_budget_ms y devuelve el mejor movimiento de la última iteración
+        completa. Cada iteración evalúa primero los movimientos que mejor
+        resultaron en la anterior (mejor poda) y, con aspiration, busca con
+        una ventana alrededor del valor de la anterior.
+        """
+        deadline = time.perf_counter() + self.time_budget_ms / 1000
+        best_action = moves[0]
+        self.completed_depth = 0
+        use_aspiration = (self.aspiration is not None and self.use_alpha_beta and
+                          not (self.workers is not None and self.workers > 1))
+        values = None
+        
+        try:
+            for depth in range(1, self.max_depth + 1):
+                if use_aspiration and values is not None:
+                    best_action, values = self._aspiration_search(children, moves, depth,
+                                                                  values[best_action])
+                else:
+                    best_action, values = self._search_root(children, moves, depth)
+                self.completed_depth = depth
+                moves = sorted(moves, key=lambda move: values[move], reverse=True)
+                
+                # La primera iteración corre sin reloj: siempre hay una jugada
+                self._deadline = deadline
+                self._next_time_check = self.nodes_explored
+                if time.perf_counter() > deadline:
+                    break
+        except _SearchTimeout:
+            pass  # Se descarta la iteración incompleta
+        finally:
+            self._deadline = None
+            self._next_time_check = np.inf
         
-        return best_action if best_action is not None else available_moves[0]
+        return best_action
+    
+    def _check_time(self) -> None:
+        """Mira el reloj cada 256 nodos y corta la búsqueda si se pasó el tiempo."""
+        self._next_time_check = self.nodes_explored + 256
+        if time.perf_counter() > self._deadline:
+            raise _SearchTimeout
     
     def minimax(self, board: GameBoard, depth: int, is_maximizing: bool, 
                 alpha: float, beta: float) -> float:
@@ -111,31 +369,51 @@ class MinimaxAgent(Agent):
             Valor del estado
         """
         self.nodes_explored += 1
+        if self.nodes_explored >= self._next_time_check:
+            self._check_time()
         
         # Caso base
-        if depth == 0 or len(board.get_available_moves()) == 0:
+        if depth == 0:
             return self.heuristic_utility(board)
         
         if is_maximizing:
-            return self.max_node(board, depth, alpha, beta)
+            # La misma expansión sirve para ver si el juego terminó y para
+            # generar los hijos
+            expansion = self._expand_node(board)
+            if expansion[0]:
+                return self.heuristic_utility(board)
+            return self.max_node(board, depth, alpha, beta, expansion)
         else:
+            # Viene de un movimiento legal: tiene celdas vacías y no es terminal
             return self.min_node(board, depth, alpha, beta)
     
-    def max_node(self, board: GameBoard, depth: int, alpha: float, beta: float) -> float:
+    def _expand_node(self, board: GameBoard) -> tuple[bool, list, list]:
+        """GameBoard.expand_node con la memo del agente, contando los movimientos calculados."""
+        if self.afterstates is None:
+            self.slides += 4
+            return board.expand_node()
+        misses = self.afterstates.misses
+        expansion = board.expand_node(self.afterstates)
+        self.slides += 4 * (self.afterstates.misses - misses)
+        return expansion
+    
+    def max_node(self, board: GameBoard, depth: int, alpha: float, beta: float,
+                 expansion: tuple = None) -> float:
         """
         Nodo maximizador: el jugador elige la mejor acción.
+        expansion es el resultado de _expand_node si ya se calculó.
         """
         max_value = -np.inf
-        available_moves = board.get_available_moves()
+        terminal, _, children = expansion if expansion is not None else self._expand_node(board)
         
-        if not available_moves:
+        if terminal:
             return self.heuristic_utility(board)
         
-        for move in available_moves:
-            board_copy = board.clone()
-            board_copy.move(move)
+        for child in children:
+            if child is None:
+                continue
             
-            value = self.minimax(board_copy, depth - 1, False, alpha, beta)
+            value = self.minimax(child, depth - 1, False, alpha, beta)
             max_value = max(max_value, value)
             
             if self.use_alpha_beta:
@@ -157,18 +435,12 @@ class MinimaxAgent(Agent):
         if not available_cells:
             return self.heuristic_utility(board)
         
-        # Muestreo adaptativo según profundidad (OPTIMIZACIÓN CLAVE)
-        if depth >= 2:
-            max_cells = 3  # Solo 3 celdas en niveles altos
-        elif depth == 1:
-            max_cells = 5  # 5 celdas en nivel medio
-        else:
-            max_cells = len(available_cells)  # Todas en hojas
+        cells_to_evaluate = self._cells_to_evaluate(board, available_cells, depth)
         
-        if len(available_cells) > max_cells:
-            cells_to_evaluate = self._select_critical_cells(board, available_cells, max_cells)
-        else:
-            cells_to_evaluate = available_cells
+        if depth == 1:
+            spec = self._batch_spec()
+            if spec is not None:
+                return self._leaf_min_node(board, cells_to_evaluate, alpha, beta, spec)
         
         for cell in cells_to_evaluate:
             # Solo evaluar ficha 2 en niveles profundos (simplificación estocástica)
@@ -198,30 +470,109 @@ class MinimaxAgent(Agent):
         
         return min_value
     
+    def _cells_to_evaluate(self, board: GameBoard, available_cells: list, depth: int) -> list:
+        """Celdas que evalúa un nodo MIN según su profundidad."""
+        # Muestreo adaptativo según profundidad (OPTIMIZACIÓN CLAVE)
+        if depth >= 2:
+            max_cells = 3  # Solo 3 celdas en niveles altos
+        elif depth == 1:
+            max_cells = 5  # 5 celdas en nivel medio
+        else:
+            max_cells = len(available_cells)  # Todas en hojas
+        
+        if len(available_cells) > max_cells:
+            return self._select_critical_cells(board, available_cells, max_cells)
+        return available_cells
+    
+    def _leaf_min_node(self, board: GameBoard, cells: list, alpha: float, beta: float,
+                       spec: tuple) -> float:
+        """
+        min_node de profundidad 1 con las hojas evaluadas en batch.
+        Los nodos MAX que cuelgan de este nodo solo tienen hojas, así que se
+        expanden y evalúan todos juntos con un único llamado a
+        Heuristics.evaluate_children, y después se recorren en el mismo orden
+        que la recursión (mismo valor, mismas podas y mismos nodos contados).
+        """
+        bits = int(board.bits)
+        spawned = []
+        for i, j in cells:
+            shift = 4 * (4 * i + j)
+            spawned.append(bits | (1 << shift))  # Ficha 2
+            spawned.append(bits | (2 << shift))  # Ficha 4
+        
+        masks, values = evaluate_children(spawned, *spec)
+        self.slides += 4 * len(spawned)
+        masks = masks.tolist()
+        values = values.tolist()
+        
+        min_value = np.inf
+        for k in range(len(cells)):
+            value_2 = self._leaf_max_value(masks[2 * k], values[2 * k], alpha, beta)
+            value_4 = self._leaf_max_value(masks[2 * k + 1], values[2 * k + 1], alpha, beta)
+            value = min(value_2, value_4)
+            min_value = min(min_value, value)
+            
+            if self.use_alpha_beta:
+                beta = min(beta, value)
+                if beta <= alpha:
+                    self.pruned_nodes += 1
+                    break  # Poda Alpha
+        
+        return min_value
+    
+    def _leaf_max_value(self, mask: int, child_values: list, alpha: float, beta: float) -> float:
+        """
+        Valor de un nodo MAX de profundidad 1 a partir de los valores ya
+        evaluados de sus hijos (equivalente a max_node).
+        """
+        self.nodes_explored += 1
+        if not mask:
+            return child_values[0]  # Tablero terminal
+        
+        max_value = -np.inf
+        for move in range(4):
+            if not mask >> move & 1:
+                continue
+            self.nodes_explored += 1
+            value = child_values[move]
+            max_value = max(max_value, value)
+            
+            if self.use_alpha_beta:
+                alpha = max(alpha, value)
+                if beta <= alpha:
+                    self.pruned_nodes += 1
+                    break  # Poda Beta
+        
+        return max_value
+    
+    def _batch_spec(self) -> tuple | None:
+        """
+        (nombre, config) de la heurística para evaluate_batch, o None si la
+        heurística asignada no se puede evaluar en batch.
+        """
+        if not self.use_batch_eval:
+            return None
+        if self.heuristic_func is None:
+            return ('simple', 1)  # Igual al fallback de heuristic_utility
+        return heuristic_spec(self.heuristic_func)
+    
     def _select_critical_cells(self, board: GameBoard, available_cells: list, count: int) -> list:
         """
         Selecciona las celdas más críticas para evaluar.
         Prioriza celdas cerca de fichas grandes o en posiciones estratégicas.
         """
-        grid = board.grid
+        bits = int(board.bits)
         cell_scores = []
         
         for cell in available_cells:
             i, j = cell
-            score = 0
+            score = _CELL_BONUS[4 * i + j]
             
             # Penalizar celdas cerca de fichas grandes (peor para el jugador)
-            for di in [-1, 0, 1]:
-                for dj in [-1, 0, 1]:
-                    ni, nj = i + di, j + dj
-                    if 0 <= ni < 4 and 0 <= nj < 4:
-                        score += grid[ni][nj]
-            
-            # Priorizar esquinas y bordes (generalmente peor para el jugador)
-            if i in [0, 3] and j in [0, 3]:
-                score += 1000  # Esquina
-            elif i in [0, 3] or j in [0, 3]:
-                score += 500   # Borde
+            for shift in _NEIGHBOR_SHIFTS[4 * i + j]:
+                exponent = (bits >> shift) & 0xF
+                if exponent:
+                    score += 1 << exponent
             
             cell_scores.append((cell, score))
         
@@ -242,71 +593,277 @@ class MinimaxAgent(Agent):
 class MinimaxAgentOptimized(MinimaxAgent):
     """
     Versión optimizada con memoización y ordenamiento de movimientos.
+    Los valores se guardan en una tabla de transposición de tamaño fijo
+    (ver TranspositionTable.py) junto con su tipo (exacto o cota) y el mejor
+    movimiento de cada nodo, que se busca primero la próxima vez.
+    
+    Los demás movimientos de los nodos MAX se ordenan sin evaluar a los hijos:
+    primero los killer moves de esa profundidad (los que cortaron en nodos
+    hermanos) y después por la tabla de historia (cortes acumulados por
+    movimiento). Los nodos MIN evalúan primero las celdas más críticas.
+    
+    Con symmetry=True los tableros simétricos comparten entrada: la clave es
+    la del tablero canónico y el movimiento (o la celda) se guarda en el
+    sistema de coordenadas del canónico. Como la selección de celdas de los
+    nodos MIN desempata por posición, el valor de un tablero y el de su
+    simétrico pueden diferir levemente.
     """
     
-    def __init__(self, depth=4, use_alpha_beta=True, weights=None, weights_config='balanced'):
-        super().__init__(depth, use_alpha_beta, weights, weights_config)
-        self.cache = {}
+    def __init__(self, depth=4, use_alpha_beta=True, weights=None, weights_config='balanced',
+                 cache_size=1 << 20, time_budget_ms=None, workers=None, aspiration=0.1,
+                 symmetry=False, engine='python', target_latency_ms=None, latency_model=None):
+        """
+        Args:
+            cache_size: Capacidad de la tabla de transposición (entradas,
+                también la de la tabla del motor nativo)
+            aspiration: Como en MinimaxAgent, pero activa por defecto
+            symmetry: Si True, los 8 tableros simétricos comparten una entrada
+                de la tabla (ver Bitboard.canonical). Se ignora si la
+                heurística no es simétrica (Heuristics.SYMMETRIC_HEURISTICS)
+        """
+        super().__init__(depth, use_alpha_beta, weights, weights_config, time_budget_ms, workers,
+                         engine, target_latency_ms, latency_model, aspiration)
+        self.native_cache_size = cache_size
+        self.symmetry = symmetry
+        self._use_symmetry = False
+        # Como cada entrada indica si su valor es exacto o una cota, la tabla
+        # se conserva entre turnos también con poda Alpha-Beta
+        self.cache = TranspositionTable(cache_size)
+        self.history = [0.0] * 4  # Cortes de cada movimiento, ponderados por profundidad
+        self._killers = {}  # profundidad -> [killer, killer anterior]
     
     def play(self, board: GameBoard) -> int:
         """
         Versión optimizada con caché.
         """
-        self.cache.clear()
+        self.cache.new_search()
         self.nodes_explored = 0
         self.pruned_nodes = 0
+        # Las profundidades cambian de turno a turno: los killers se descartan
+        # y la historia se conserva a la mitad
+        self._killers = {}
+        self.history = [value / 2 for value in self.history]
+        # Sin heurística asignada se usa la simple, que es simétrica
+        self._use_symmetry = self.symmetry and (self.heuristic_func is None or
+                                                heuristic_is_symmetric(self.heuristic_func))
         return super().play(board)
     
+    def _record_cutoff(self, move: int, depth: int) -> None:
+        """Registra un movimiento que produjo una poda Beta."""
+        self.history[move] += depth * depth
+        killers = self._killers.setdefault(depth, [NO_MOVE, NO_MOVE])
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+    
+    def _order_moves(self, legal_moves: list, depth: int, tt_move: int) -> list:
+        """
+        Orden de búsqueda de un nodo MAX: movimiento de la tabla, killers
+        de la profundidad y el resto por historia.
+        """
+        history = self.history
+        ordered_moves = sorted(legal_moves, key=lambda move: history[move], reverse=True)
+        for move in reversed([tt_move] + self._killers.get(depth, [])):
+            if move in ordered_moves and move != ordered_moves[0]:
+                ordered_moves.remove(move)
+                ordered_moves.insert(0, move)
+        return ordered_moves
+    
+    def _cells_to_evaluate(self, board: GameBoard, available_cells: list, depth: int) -> list:
+        """Celdas del nodo MIN, siempre de la más crítica a la menos crítica."""
+        cells = super()._cells_to_evaluate(board, available_cells, depth)
+        if cells is available_cells and len(cells) > 1:
+            cells = self._select_critical_cells(board, cells, len(cells))
+        return cells
+    
     def minimax(self, board: GameBoard, depth: int, is_maximizing: bool, 
                 alpha: float, beta: float) -> float:
         """
         Minimax con memoización.
+        Las cotas guardadas achican la ventana (alpha, beta) o resuelven el
+        nodo sin buscar; el valor se guarda como exacto o como cota según
+        dónde cayó respecto a la ventana con la que se buscó.
         """
-        # Crear clave para el caché
-        state_key = (board.grid.tobytes(), depth, is_maximizing)
+        # Clave Zobrist del tablero (o de su canónico), distinta para nodos MAX y MIN
+        sym = 0
+        if self._use_symmetry:
+            key, sym = Bitboard.canonical_zobrist(board.bits, Bitboard.ZOBRIST_ROWS)
+            key = int(key)
+        else:
+            key = board.zobrist
+        state_key = key ^ MAX_NODE_KEY if is_maximizing else key
+        # Movimientos (nodos MAX) o celdas (nodos MIN) entre el tablero y el canónico
+        to_canonical = Bitboard.SYMMETRY_MOVES if is_maximizing else Bitboard.SYMMETRY_CELLS
+        from_canonical = (Bitboard.SYMMETRY_MOVES_INV if is_maximizing
+                          else Bitboard.SYMMETRY_CELLS_INV)
+        
+        value, alpha, beta, tt_move = self.cache.probe_bounds(state_key, depth, alpha, beta)
+        if value is not None:
+            return value
+        if tt_move != NO_MOVE:
+            tt_move = from_canonical[sym][tt_move]
         
-        if state_key in self.cache:
-            return self.cache[state_key]
+        self.nodes_explored += 1
+        if self.nodes_explored >= self._next_time_check:
+            self._check_time()
         
-        value = super().minimax(board, depth, is_maximizing, alpha, beta)
-        self.cache[state_key] = value
+        # Caso base
+        expansion = None
+        if depth > 0 and is_maximizing:
+            expansion = self._expand_node(board)
+        if depth == 0 or (expansion is not None and expansion[0]):
+            value = self.heuristic_utility(board)
+            self.cache.store(state_key, depth, value)
+            return value
+        
+        if is_maximizing:
+            value, best_move = self._search_max(board, depth, alpha, beta, tt_move, expansion)
+        else:
+            value, best_move = self._search_min(board, depth, alpha, beta, tt_move)
+        
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if best_move != NO_MOVE:
+            best_move = to_canonical[sym][best_move]
+        self.cache.store(state_key, depth, value, flag, best_move)
         
         return value
     
-    def max_node(self, board: GameBoard, depth: int, alpha: float, beta: float) -> float:
+    def max_node(self, board: GameBoard, depth: int, alpha: float, beta: float,
+                 expansion: tuple = None) -> float:
         """
         Nodo MAX optimizado con ordenamiento de movimientos.
         Evalúa primero los movimientos más prometedores.
         """
-        available_moves = board.get_available_moves()
-        
-        if not available_moves:
-            return self.heuristic_utility(board)
+        return self._search_max(board, depth, alpha, beta, NO_MOVE, expansion)[0]
+    
+    def _search_max(self, board: GameBoard, depth: int, alpha: float, beta: float,
+                    tt_move: int = NO_MOVE, expansion: tuple = None) -> tuple[float, int]:
+        """
+        max_node que además devuelve el mejor movimiento. tt_move (el mejor
+        movimiento guardado en la tabla) se evalúa primero (ver _order_moves).
         
-        # Ordenar movimientos por valor heurístico (para mejor poda)
-        move_values = []
-        for move in available_moves:
-            board_copy = board.clone()
-            board_copy.move(move)
-            value = self.heuristic_utility(board_copy)
-            move_values.append((move, value))
+        Returns:
+            (valor, mejor movimiento)
+        """
+        terminal, legal_moves, children = (expansion if expansion is not None
+                                           else self._expand_node(board))
+        
+        if terminal:
+            return self.heuristic_utility(board), NO_MOVE
+        
+        if depth == 1:
+            # Los hijos son hojas: se evalúan una sola vez y se recorren de
+            # mejor a peor (mismo recorrido que _leaf_max_value)
+            child_values = [self.heuristic_utility(child) if child is not None
+                            else -np.inf for child in children]
+            best_move = max(legal_moves, key=lambda move: child_values[move])
+            max_value = child_values[best_move]
+            if self.use_alpha_beta and beta <= max(alpha, max_value):
+                self.nodes_explored += 1
+                self.pruned_nodes += 1
+            else:
+                self.nodes_explored += len(legal_moves)
+            return max_value, best_move
         
-        # Ordenar de mejor a peor
-        move_values.sort(key=lambda x: x[1], reverse=True)
-        ordered_moves = [move for move, _ in move_values]
+        ordered_moves = self._order_moves(legal_moves, depth, tt_move)
         
         max_value = -np.inf
+        best_move = ordered_moves[0]
         for move in ordered_moves:
-            board_copy = board.clone()
-            board_copy.move(move)
+            board_copy = children[move]
             
             value = self.minimax(board_copy, depth - 1, False, alpha, beta)
-            max_value = max(max_value, value)
+            if value > max_value:
+                max_value = value
+                best_move = move
             
             if self.use_alpha_beta:
                 alpha = max(alpha, value)
                 if beta <= alpha:
                     self.pruned_nodes += 1
+                    self._record_cutoff(move, depth)
                     break
         
+        return max_value, best_move
+    
+    def min_node(self, board: GameBoard, depth: int, alpha: float, beta: float) -> float:
+        """
+        Nodo MIN con la celda guardada en la tabla evaluada primero.
+        """
+        return self._search_min(board, depth, alpha, beta)[0]
+    
+    def _search_min(self, board: GameBoard, depth: int, alpha: float, beta: float,
+                    tt_move: int = NO_MOVE) -> tuple[float, int]:
+        """
+        min_node que además devuelve la peor celda para el jugador (4*i + j).
+        tt_move (la celda guardada en la tabla) se evalúa primero.
+        
+        Returns:
+            (valor, mejor celda; NO_MOVE si el nodo se evaluó en batch)
+        """
+        available_cells = board.get_available_cells()
+        
+        if not available_cells:
+            return self.heuristic_utility(board), NO_MOVE
+        
+        cells_to_evaluate = self._cells_to_evaluate(board, available_cells, depth)
+        if tt_move != NO_MOVE:
+            tt_cell = (tt_move >> 2, tt_move & 3)
+            if tt_cell in cells_to_evaluate:
+                cells_to_evaluate = [tt_cell] + [cell for cell in cells_to_evaluate
+                                                 if cell != tt_cell]
+        
+        if depth == 1:
+            spec = self._batch_spec()
+            if spec is not None:
+                return self._leaf_min_node(board, cells_to_evaluate, alpha, beta, spec), NO_MOVE
+        
+        min_value = np.inf
+        best_cell = NO_MOVE
+        for cell in cells_to_evaluate:
+            # Solo evaluar ficha 2 en niveles profundos (simplificación estocástica)
+            board_copy = board.clone()
+            board_copy.insert_tile(cell, 2)
+            value = self.minimax(board_copy, depth, True, alpha, beta)
+            if depth < 2:
+                # Evaluar ambos valores solo cerca de hojas
+                board_copy = board.clone()
+                board_copy.insert_tile(cell, 4)
+                value = min(value, self.minimax(board_copy, depth, True, alpha, beta))
+            
+            if value < min_value:
+                min_value = value
+                best_cell = 4 * cell[0] + cell[1]
+            
+            if self.use_alpha_beta:
+                beta = min(beta, value)
+                if beta <= alpha:
+                    self.pruned_nodes += 1
+                    break  # Poda Alpha
+        
+        return min_value, best_cell
+    
+    def _leaf_max_value(self, mask: int, child_values: list, alpha: float, beta: float) -> float:
+        """
+        Equivalente a max_node optimizado a profundidad 1: el mejor hijo se
+        evalúa primero, así que o se poda en el primer hijo o se recorren todos.
+        """
+        self.nodes_explored += 1
+        if not mask:
+            return child_values[0]  # Tablero terminal
+        
+        legal_values = [child_values[move] for move in range(4) if mask >> move & 1]
+        max_value = max(legal_values)
+        
+        if self.use_alpha_beta and beta <= max(alpha, max_value):
+            self.nodes_explored += 1
+            self.pruned_nodes += 1
+        else:
+            self.nodes_explored += len(legal_values)
+        
         return max_value
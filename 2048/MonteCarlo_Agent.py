@@ -0,0 +1,202 @@
+"""
+Agente Monte Carlo puro para jugar 2048.
+
+No arma un árbol de búsqueda: cada movimiento legal de la raíz se puntúa con
+el puntaje medio (suma de combinaciones hasta el fin de la partida) de muchas
+partidas simuladas (rollouts) que empiezan con ese movimiento. Los rollouts
+de todos los movimientos avanzan juntos, un paso por iteración, sobre un
+BoardBatch; las partidas terminadas se sacan del batch a medida que terminan.
+
+La fuerza del agente crece directamente con la cantidad de rollouts, así que
+se ajusta con un presupuesto de rollouts o de tiempo, y con workers reparte
+los rollouts en el pool de procesos de ParallelSearch.py.
+"""
+from Agent import Agent
+from BoardBatch import BoardBatch, greedy_legal_moves, random_legal_moves
+from GameBoard import GameBoard
+from ParallelSearch import SearchPool
+import numpy as np
+import time
+
+
+class MonteCarloAgent(Agent):
+    """
+    Agente que elige el movimiento con mejor puntaje medio de sus rollouts.
+    - nodes_explored: movimientos simulados en la última jugada
+    - rollouts_done: rollouts completos en la última jugada (todos los movimientos)
+    """
+
+    POLICIES = ('random', 'greedy')
+
+    def __init__(self, rollouts=200, policy='random', time_budget_ms=None, max_rollout_moves=None,
+                 workers=None, seed=None):
+        """
+        Args:
+            rollouts: Rollouts por movimiento de la raíz. Con time_budget_ms es
+                el tamaño de cada tanda: se juegan tandas hasta agotar el tiempo
+            policy: 'random' (movimiento legal al azar) o 'greedy' (el de mayor
+                puntaje inmediato) para jugar los rollouts
+            time_budget_ms: Tiempo máximo por movimiento. La primera tanda se
+                completa siempre; una tanda cortada por el reloj se descarta
+            max_rollout_moves: Largo máximo de un rollout (None = hasta el fin
+                de la partida)
+            workers: Si es mayor a 1, los rollouts se reparten en un pool
+                persistente de procesos (ver ParallelSearch.py)
+            seed: Semilla de los rollouts (reproducibles con workers=None)
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Política '{policy}' desconocida. Opciones: {self.POLICIES}")
+        self.rollouts = rollouts
+        self.policy = policy
+        self.time_budget_ms = time_budget_ms
+        self.max_rollout_moves = max_rollout_moves
+        self.workers = workers
+        self.rng = np.random.default_rng(seed)
+
+        self.nodes_explored = 0
+        self.rollouts_done = 0
+        self._pool = None  # Se crea en el primer play() con workers
+
+    def __getstate__(self) -> dict:
+        # El pool no se serializa (el agente se copia a los procesos del pool)
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        return state
+
+    def close(self) -> None:
+        """Termina el pool de procesos, si hay uno"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def play(self, board: GameBoard) -> int:
+        """
+        Elige el movimiento con mayor puntaje medio de sus rollouts.
+
+        Returns:
+            Acción a tomar (0=UP, 1=DOWN, 2=LEFT, 3=RIGHT)
+        """
+        self.nodes_explored = 0
+        self.rollouts_done = 0
+
+        moves = board.get_available_moves()
+        if not moves:
+            return 0  # No hay movimientos válidos
+        if len(moves) == 1:
+            return moves[0]
+
+        if self.workers is not None and self.workers > 1:
+            totals, counts = self._parallel_rollout_totals(board)
+        else:
+            totals, counts = self.rollout_totals(board, self.rollouts, self.time_budget_ms,
+                                                 self.rng.integers(2 ** 63))
+
+        values = {move: totals[move] / counts[move] for move in moves if counts[move] > 0}
+        return max(values, key=values.get)
+
+    def _parallel_rollout_totals(self, board: GameBoard) -> tuple[np.ndarray, np.ndarray]:
+        """rollout_totals repartido en el pool: una tarea por proceso, cada una con su semilla."""
+        if self._pool is None:
+            self._pool = SearchPool(self, self.workers)
+
+        rollouts = -(-self.rollouts // self.workers)  # Redondeo hacia arriba
+        tasks = [('rollout_totals', board.key(), (rollouts, self.time_budget_ms, seed))
+                 for seed in self.rng.integers(2 ** 63, size=self.workers)]
+        results = self._pool.run(tasks)
+
+        totals = np.zeros(4)
+        counts = np.zeros(4, dtype=np.int64)
+        for (task_totals, task_counts), nodes, _, _ in results:
+            totals += task_totals
+            counts += task_counts
+            self.nodes_explored += nodes
+        self.rollouts_done = int(counts.sum())
+        return totals, counts
+
+    def rollout_totals(self, board: GameBoard, rollouts: int, time_budget_ms: float | None,
+                       seed: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Juega rollouts desde cada movimiento legal del tablero: una tanda si
+        no hay time_budget_ms, si no tandas hasta agotar el tiempo.
+
+        Returns:
+            (suma de puntajes, cantidad de rollouts) por dirección
+        """
+        rng = np.random.default_rng(seed)
+        mask, children = board.expand()
+        moves = [move for move in range(4) if mask >> move & 1]
+        afterstates = np.array([children[move].bits for move in moves], dtype=np.uint64)
+        # Puntaje de combinaciones del movimiento de la raíz
+        _, move_scores = BoardBatch(np.full(len(moves), board.bits)).move(np.array(moves))
+
+        totals = np.zeros(4)
+        counts = np.zeros(4, dtype=np.int64)
+        deadline = None
+        if time_budget_ms is not None:
+            deadline = time.perf_counter() + time_budget_ms / 1000
+
+        while True:
+            round_totals = self._play_round(afterstates, move_scores, rollouts, rng,
+                                            deadline if counts.any() else None)
+            if round_totals is None:
+                break  # Tanda cortada por el reloj
+            totals[moves] += round_totals
+            counts[moves] += rollouts
+            self.rollouts_done += rollouts * len(moves)
+            if deadline is None or time.perf_counter() > deadline:
+                break
+        return totals, counts
+
+    def _play_round(self, afterstates: np.ndarray, move_scores: np.ndarray, rollouts: int,
+                    rng: np.random.Generator, deadline: float | None) -> np.ndarray | None:
+        """
+        Juega una tanda de rollouts por movimiento, todos en un solo batch.
+
+        Args:
+            afterstates: Tablero después de cada movimiento de la raíz (antes de la ficha)
+            move_scores: Puntaje de combinaciones de cada movimiento de la raíz
+            deadline: Si se pasa, la tanda se corta y se descarta
+
+        Returns:
+            Suma de los puntajes de los rollouts de cada movimiento, o None si
+            se cortó
+        """
+        owner = np.repeat(np.arange(len(afterstates)), rollouts)  # Movimiento de cada rollout
+        scores = np.repeat(move_scores, rollouts).astype(np.float64)
+        batch = BoardBatch(np.repeat(afterstates, rollouts))
+        batch.spawn(rng)
+        totals = np.zeros(len(afterstates))
+
+        steps = 0
+        while len(batch):
+            masks = batch.move_masks()
+            finished = masks == 0
+            if self.max_rollout_moves is not None and steps >= self.max_rollout_moves:
+                finished[:] = True
+            if finished.any():
+                # Sacar del batch las partidas terminadas
+                np.add.at(totals, owner[finished], scores[finished])
+                alive = ~finished
+                batch = BoardBatch(batch.boards[alive])
+                owner = owner[alive]
+                scores = scores[alive]
+                masks = masks[alive]
+                if not len(batch):
+                    break
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+
+            if self.policy == 'greedy':
+                actions = greedy_legal_moves(batch.boards, rng)
+            else:
+                actions = random_legal_moves(masks, rng)
+            _, move_scores_step = batch.move(actions)
+            scores += move_scores_step
+            batch.spawn(rng)
+            self.nodes_explored += len(batch)
+            steps += 1
+        return totals
+
+    def heuristic_utility(self, board: GameBoard) -> float:
+        """No usa heurística: el valor de un movimiento sale de sus rollouts."""
+        return 0
@@ -0,0 +1,500 @@
+"""
+Búsqueda Expectimax / Minimax compilada con numba sobre bitboards.
+
+Es el motor engine="native" de ExpectimaxAgent y MinimaxAgent: la recursión
+completa (nodos MAX, de chance / MIN, heurística y tabla de transposición)
+corre compilada sobre enteros uint64, sin crear un GameBoard ni llamar un
+método de Python por nodo. Sigue la misma profundidad, el mismo muestreo de
+celdas y la misma forma de combinar los valores que los agentes en Python:
+- Expectimax: con profundidad >= 2 se muestrean 3 celdas (solo ficha 2), con
+  profundidad 1 se muestrean 5 (fichas 2 y 4), con el mismo peso por celda.
+  Con prob_threshold los nodos de chance son exactos.
+- Minimax: mismas celdas críticas (_select_critical_cells) y mismo mínimo
+  entre fichas 2 y 4 cerca de las hojas, con poda Alpha-Beta opcional.
+
+La heurística se evalúa con las tablas por línea de HeuristicTables.py (los
+mismos valores que las heurísticas de make_heuristic con backend='table').
+El muestreo usa el generador de numba, que es independiente del de numpy.
+
+La tabla de transposición son arrays de numpy (NativeTable): buckets de dos
+entradas, una preferida por profundidad y otra de reemplazo siempre, como en
+TranspositionTable.py. La clave es el propio bitboard (sin colisiones).
+"""
+import functools
+
+import numpy as np
+from numba import njit
+
+import time
+
+import Bitboard
+import HeuristicTables
+from Heuristics import COMPLEX_WEIGHTS, INTERMEDIATE_WEIGHTS, heuristic_spec
+
+# Heurísticas que sabe evaluar el motor
+HEURISTIC_KINDS = {'simple': 0, 'intermediate': 1, 'complex': 2}
+SIMPLE, INTERMEDIATE, COMPLEX = range(3)
+
+# Tipos de valor guardado (como en TranspositionTable.py)
+EXACT, LOWER, UPPER = range(3)
+NO_MOVE = -1
+
+# Posiciones de los contadores de estadísticas (CUTS: cortes por prob_threshold)
+NODES, PRUNED, SLIDES, CUTS = range(4)
+NUM_STATS = 4
+
+# Las funciones recursivas se llaman siempre con is_max (y use_alpha_beta)
+# como variables, nunca con constantes: numba especializa una función por
+# cada constante literal que recibe, y las especializaciones recursivas que se
+# llaman entre sí no se pueden recargar del cache de disco (cache=True).
+
+# Multiplicador (Fibonacci hashing) para elegir el bucket de un bitboard
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+@functools.lru_cache(maxsize=None)
+def heuristic_params(name: str, config: int = 1) -> tuple:
+    """
+    Parámetros de una heurística para el motor compilado.
+
+    Returns:
+        Tupla (tipo, config, LINE_FEATURES, tablas y pesos de la intermedia,
+        tablas y pesos de la compleja)
+    """
+    if name not in HEURISTIC_KINDS:
+        raise ValueError(f"Heurística '{name}' desconocida. Opciones: {list(HEURISTIC_KINDS)}")
+    config = 1 if config == 1 else 2
+    intermediate_weights = tuple(float(w) for w in INTERMEDIATE_WEIGHTS[config])
+    complex_weights = tuple(float(w) for w in COMPLEX_WEIGHTS[config])
+    return (HEURISTIC_KINDS[name], config, HeuristicTables.LINE_FEATURES,
+            HeuristicTables.intermediate_tables(intermediate_weights), intermediate_weights,
+            HeuristicTables.complex_tables(complex_weights), complex_weights)
+
+
+def agent_heuristic(heuristic_func) -> tuple:
+    """
+    Parámetros de la heurística de un agente (la simple si no tiene una).
+    Solo se admiten las heurísticas de Heuristics.make_heuristic con backend='table'.
+    """
+    spec = ('simple', 1) if heuristic_func is None else heuristic_spec(heuristic_func)
+    if spec is None:
+        raise ValueError("El motor 'native' solo evalúa heurísticas de "
+                         "Heuristics.make_heuristic(..., backend='table')")
+    return heuristic_params(*spec)
+
+
+def iterative_deepening(search, time_budget_ms: float, max_depth: int) -> tuple[int, int]:
+    """
+    Iterative deepening con la búsqueda compilada. Una iteración no se puede
+    cortar a mitad de camino, así que la siguiente empieza solo si su tiempo
+    estimado (el de la última por el crecimiento entre las dos últimas)
+    entra en lo que queda de time_budget_ms. La primera corre siempre.
+
+    Args:
+        search: Función que busca con la profundidad dada y devuelve el mejor movimiento
+
+    Returns:
+        (mejor movimiento de la última iteración, profundidad alcanzada)
+    """
+    deadline = time.perf_counter() + time_budget_ms / 1000
+    previous_elapsed = None
+    for depth in range(1, max_depth + 1):
+        start = time.perf_counter()
+        best_action = search(depth)
+        elapsed = max(time.perf_counter() - start, 1e-6)
+        growth = max(elapsed / previous_elapsed, 2.0) if previous_elapsed else 4.0
+        previous_elapsed = elapsed
+        if time.perf_counter() + elapsed * growth > deadline:
+            break
+    return best_action, depth
+
+
+class NativeTable:
+    """
+    Tabla de transposición en arrays de numpy para la búsqueda compilada.
+    Se conserva entre turnos; new_search() envejece las entradas actuales.
+    """
+
+    def __init__(self, capacity: int = 1 << 20):
+        """
+        Args:
+            capacity: Cantidad máxima de entradas (se redondea a una potencia de 2)
+        """
+        bucket_bits = 1
+        while 2 << (bucket_bits + 1) <= capacity:
+            bucket_bits += 1
+        self.capacity = 2 << bucket_bits
+        self.shift = 64 - bucket_bits
+        self.generation = 0
+        self.clear()
+
+    def clear(self) -> None:
+        """Descarta todas las entradas"""
+        self.keys = np.zeros(self.capacity, dtype=np.uint64)
+        self.values = np.zeros(self.capacity)
+        self.depths = np.full(self.capacity, -1, dtype=np.int16)
+        # bit 0: nodo MAX, bits 1-2: tipo de valor, bits 3-7: mejor movimiento + 1
+        self.info = np.zeros(self.capacity, dtype=np.uint8)
+        self.generations = np.zeros(self.capacity, dtype=np.uint8)
+
+    def __getstate__(self) -> dict:
+        # Se serializa vacía (p. ej. al copiar el agente a otro proceso)
+        return {'capacity': self.capacity}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['capacity'])
+
+    def new_search(self) -> None:
+        """Empieza una búsqueda nueva: las entradas actuales pasan a ser reemplazables"""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def arrays(self) -> tuple:
+        """Arrays y parámetros que recibe la búsqueda compilada"""
+        return (self.keys, self.values, self.depths, self.info, self.generations,
+                np.uint64(self.shift), np.uint8(self.generation))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.depths >= 0))
+
+
+# ============================================================
+# HEURÍSTICA Y TABLA
+# ============================================================
+
+@njit(cache=True)
+def evaluate(board, heuristic) -> float:
+    """Valor de la heurística (ver heuristic_params) sobre un bitboard."""
+    kind, config, features, intermediate_tables, intermediate_weights, \
+        complex_tables, complex_weights = heuristic
+    if kind == SIMPLE:
+        return HeuristicTables.simple_eval(board, config)
+    if kind == INTERMEDIATE:
+        return HeuristicTables.intermediate_eval(board, features, intermediate_tables,
+                                                 intermediate_weights)
+    return HeuristicTables.complex_eval(board, features, complex_tables, complex_weights)
+
+
+@njit(cache=True)
+def _slot(board, shift) -> int:
+    """Primera entrada del bucket del tablero."""
+    return np.int64((board * _HASH_MULTIPLIER) >> shift) * 2
+
+
+@njit(cache=True)
+def _find(board, is_max, table) -> int:
+    """Índice de la entrada del tablero, o -1 si no está."""
+    keys, depths, info, shift = table[0], table[2], table[3], table[5]
+    slot = _slot(board, shift)
+    for index in range(slot, slot + 2):
+        if keys[index] == board and depths[index] >= 0 and (info[index] & 1) == is_max:
+            return index
+    return -1
+
+
+@njit(cache=True)
+def _store(board, is_max, depth, value, flag, move, table) -> None:
+    keys, values, depths, info, generations, shift, generation = table
+    slot = _slot(board, shift)
+    index = slot
+    same = keys[slot] == board and (info[slot] & 1) == is_max
+    if same:
+        if depth < depths[slot]:
+            return  # Ya hay un valor más profundo para el mismo nodo
+    elif generations[slot] == generation and depth < depths[slot]:
+        index = slot + 1
+    keys[index] = board
+    values[index] = value
+    depths[index] = depth
+    info[index] = is_max | (flag << 1) | ((move + 1) << 3)
+    generations[index] = generation
+
+
+@njit(cache=True)
+def _empty_cells(board, cells) -> int:
+    """Escribe en cells los índices (4*i + j) de las celdas vacías, en orden."""
+    count = 0
+    for k in range(16):
+        if (board >> np.uint64(4 * k)) & Bitboard.NIBBLE_MASK == 0:
+            cells[count] = k
+            count += 1
+    return count
+
+
+# ============================================================
+# EXPECTIMAX
+# ============================================================
+
+@njit(cache=True)
+def _expectimax(board, depth, is_max, prob, threshold, heuristic, table, tables, stats) -> float:
+    """
+    Valor de un nodo (igual que ExpectimaxAgentOptimized.expectimax).
+    threshold <= 0 indica muestreo de celdas; si no, nodos de chance exactos
+    con corte por probabilidad.
+    """
+    if depth == 0:
+        stats[NODES] += 1
+        return evaluate(board, heuristic)
+    if threshold > 0 and prob < threshold:
+        stats[NODES] += 1
+        stats[CUTS] += 1
+        return evaluate(board, heuristic)
+
+    index = _find(board, is_max, table)
+    if index >= 0 and table[2][index] >= depth:
+        table[4][index] = table[6]  # Sigue en uso
+        return table[1][index]
+    stats[NODES] += 1
+    cuts = stats[CUTS]
+    child_is_max = 1 - is_max  # Los nodos MAX y de chance se alternan
+
+    if is_max:
+        stats[SLIDES] += 4
+        value = -np.inf
+        for direction in range(4):
+            child, _ = Bitboard.move(board, direction, tables)
+            if child != board:
+                value = max(value, _expectimax(child, depth - 1, child_is_max, prob, threshold,
+                                               heuristic, table, tables, stats))
+        if value == -np.inf:
+            value = evaluate(board, heuristic)  # Juego terminado
+    else:
+        cells = np.empty(16, dtype=np.int64)
+        num_empty = _empty_cells(board, cells)
+        if num_empty == 0:
+            return evaluate(board, heuristic)
+
+        count = num_empty
+        weight_per_cell = 1.0
+        if threshold > 0:
+            both_tiles = True
+            prob_2 = prob * 0.9 / num_empty
+            prob_4 = prob * 0.1 / num_empty
+        else:
+            max_cells = 3 if depth >= 2 else 5
+            if num_empty > max_cells:
+                # Muestreo sin reposición (Fisher-Yates parcial)
+                for k in range(max_cells):
+                    pick = np.random.randint(k, num_empty)
+                    cells[k], cells[pick] = cells[pick], cells[k]
+                count = max_cells
+                weight_per_cell = num_empty / count
+            both_tiles = depth < 2
+            prob_2 = prob
+            prob_4 = prob
+
+        expected_value = 0.0
+        for k in range(count):
+            shift = np.uint64(4 * cells[k])
+            value_2 = _expectimax(board | (np.uint64(1) << shift), depth, child_is_max, prob_2,
+                                  threshold, heuristic, table, tables, stats)
+            if both_tiles:
+                value_4 = _expectimax(board | (np.uint64(2) << shift), depth, child_is_max, prob_4,
+                                      threshold, heuristic, table, tables, stats)
+                cell_value = 0.9 * value_2 + 0.1 * value_4
+            else:
+                cell_value = value_2
+            expected_value += cell_value * weight_per_cell
+        value = expected_value / count
+
+    # Un subárbol con cortes por probabilidad depende del prob con el que se
+    # llegó al nodo: no se guarda (la tabla se conserva entre visitas y turnos)
+    if stats[CUTS] == cuts:
+        _store(board, is_max, depth, value, EXACT, NO_MOVE, table)
+    return value
+
+
+@njit(cache=True)
+def expectimax_root(board, depth, threshold, heuristic, table, tables, stats, values) -> None:
+    """
+    Valor de cada movimiento de la raíz (igual que ExpectimaxAgent._search_root).
+
+    Args:
+        values: Array de 4 posiciones; los movimientos ilegales quedan en -inf
+    """
+    stats[SLIDES] += 4
+    is_max = np.int64(0)  # Hijos de la raíz: nodos de chance
+    for direction in range(4):
+        child, _ = Bitboard.move(board, direction, tables)
+        values[direction] = -np.inf
+        if child != board:
+            values[direction] = _expectimax(child, depth - 1, is_max, 1.0, threshold,
+                                            heuristic, table, tables, stats)
+
+
+# ============================================================
+# MINIMAX
+# ============================================================
+
+@njit(cache=True)
+def _critical_cells(board, cells, num_empty, count) -> None:
+    """
+    Deja en las primeras count posiciones de cells las celdas más críticas,
+    de mayor a menor puntaje y en orden de celda si empatan (igual que
+    MinimaxAgent._select_critical_cells).
+    """
+    scores = np.empty(num_empty, dtype=np.int64)
+    for k in range(num_empty):
+        i = cells[k] >> 2
+        j = cells[k] & 3
+        score = 0
+        for ni in range(max(0, i - 1), min(4, i + 2)):
+            for nj in range(max(0, j - 1), min(4, j + 2)):
+                exponent = (board >> np.uint64(4 * (4 * ni + nj))) & Bitboard.NIBBLE_MASK
+                if exponent:
+                    score += 1 << exponent
+        if (i == 0 or i == 3) and (j == 0 or j == 3):
+            score += 1000  # Esquina
+        elif i == 0 or i == 3 or j == 0 or j == 3:
+            score += 500  # Borde
+        scores[k] = score
+
+    for k in range(count):
+        best = k
+        for m in range(k + 1, num_empty):
+            if scores[m] > scores[best]:
+                best = m
+        # Se desplaza el bloque para mantener el orden de las que empatan
+        cell = cells[best]
+        score = scores[best]
+        for m in range(best, k, -1):
+            cells[m] = cells[m - 1]
+            scores[m] = scores[m - 1]
+        cells[k] = cell
+        scores[k] = score
+
+
+@njit(cache=True)
+def _minimax(board, depth, is_max, alpha, beta, use_alpha_beta, heuristic, table, tables,
+             stats) -> float:
+    """
+    Valor de un nodo (igual que MinimaxAgent.minimax). La tabla guarda el
+    valor como exacto o como cota según la ventana y el mejor movimiento (o
+    celda), que se busca primero.
+    """
+    best_move = NO_MOVE
+    if depth > 0:
+        index = _find(board, is_max, table)
+        if index >= 0:
+            best_move = (table[3][index] >> 3) - 1
+            if table[2][index] >= depth:
+                table[4][index] = table[6]  # Sigue en uso
+                stored = table[1][index]
+                flag = (table[3][index] >> 1) & 3
+                if flag == EXACT:
+                    return stored
+                if flag == LOWER:
+                    alpha = max(alpha, stored)
+                else:
+                    beta = min(beta, stored)
+                if alpha >= beta:
+                    return stored
+
+    stats[NODES] += 1
+    if depth == 0:
+        return evaluate(board, heuristic)
+
+    window_alpha = alpha
+    window_beta = beta
+    child_is_max = 1 - is_max  # Los nodos MAX y MIN se alternan
+    if is_max:
+        stats[SLIDES] += 4
+        children = np.empty(4, dtype=np.uint64)
+        for direction in range(4):
+            child, _ = Bitboard.move(board, direction, tables)
+            children[direction] = child
+        value = -np.inf
+        stored_move = NO_MOVE
+        for k in range(5):
+            # Primero el movimiento de la tabla, después en orden
+            direction = best_move if k == 0 else k - 1
+            if direction == NO_MOVE or (k > 0 and direction == best_move):
+                continue
+            if children[direction] == board:
+                continue
+            child_value = _minimax(children[direction], depth - 1, child_is_max, alpha, beta,
+                                   use_alpha_beta, heuristic, table, tables, stats)
+            if child_value > value:
+                value = child_value
+                stored_move = direction
+            if use_alpha_beta:
+                alpha = max(alpha, child_value)
+                if beta <= alpha:
+                    stats[PRUNED] += 1
+                    break  # Poda Beta
+        if stored_move == NO_MOVE:
+            value = evaluate(board, heuristic)  # Juego terminado
+    else:
+        cells = np.empty(16, dtype=np.int64)
+        num_empty = _empty_cells(board, cells)
+        if num_empty == 0:
+            return evaluate(board, heuristic)
+
+        max_cells = 3 if depth >= 2 else 5
+        count = num_empty
+        if num_empty > max_cells:
+            _critical_cells(board, cells, num_empty, max_cells)
+            count = max_cells
+        if best_move != NO_MOVE:
+            for k in range(count):
+                if cells[k] == best_move:
+                    for m in range(k, 0, -1):
+                        cells[m] = cells[m - 1]
+                    cells[0] = best_move
+                    break
+
+        value = np.inf
+        stored_move = NO_MOVE
+        for k in range(count):
+            shift = np.uint64(4 * cells[k])
+            child_value = _minimax(board | (np.uint64(1) << shift), depth, child_is_max, alpha,
+                                   beta, use_alpha_beta, heuristic, table, tables, stats)
+            if depth < 2:
+                child_value = min(child_value,
+                                  _minimax(board | (np.uint64(2) << shift), depth, child_is_max,
+                                           alpha, beta, use_alpha_beta, heuristic, table, tables,
+                                           stats))
+            if child_value < value:
+                value = child_value
+                stored_move = cells[k]
+            if use_alpha_beta:
+                beta = min(beta, child_value)
+                if beta <= alpha:
+                    stats[PRUNED] += 1
+                    break  # Poda Alpha
+
+    if value <= window_alpha:
+        flag = UPPER
+    elif value >= window_beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    _store(board, is_max, depth, value, flag, stored_move, table)
+    return value
+
+
+@njit(cache=True)
+def minimax_root(board, depth, moves, use_alpha_beta, heuristic, table, tables, stats,
+                 values) -> None:
+    """
+    Valor de cada movimiento de la raíz, en el orden dado (igual que
+    MinimaxAgent._search_root).
+
+    Args:
+        moves: Array con los movimientos legales en el orden de búsqueda
+        values: Array de 4 posiciones; los movimientos no buscados quedan en -inf
+    """
+    alpha = -np.inf
+    is_max = np.int64(0)  # Hijos de la raíz: nodos MIN
+    for direction in range(4):
+        values[direction] = -np.inf
+    for k in range(moves.shape[0]):
+        direction = moves[k]
+        child, _ = Bitboard.move(board, direction, tables)
+        if use_alpha_beta:
+            value = _minimax(child, depth - 1, is_max, alpha, np.inf, use_alpha_beta, heuristic,
+                             table, tables, stats)
+            alpha = max(alpha, value)
+        else:
+            value = _minimax(child, depth - 1, is_max, -np.inf, np.inf, use_alpha_beta, heuristic,
+                             table, tables, stats)
+        values[direction] = value
@@ -0,0 +1,82 @@
+"""
+Pool de procesos persistente para repartir la búsqueda de los agentes.
+
+Cada proceso del pool recibe una sola vez una copia del agente (serializada
+con pickle, sin el pool ni el contenido de sus cachés) y después solo recibe
+tareas chicas: la clave del tablero (GameBoard.key, un int), el método de
+búsqueda a llamar y sus argumentos. Devuelve el valor del nodo junto con los
+nodos explorados y podados y los movimientos de tablero calculados, para que
+el agente acumule las estadísticas.
+La copia del agente vive mientras viva el pool, así que su tabla de
+transposición se reutiliza entre tareas y entre turnos.
+"""
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from GameBoard import GameBoard
+
+# Copia del agente en cada proceso del pool
+_worker_agent = None
+
+
+def _init_worker(agent_bytes: bytes) -> None:
+    global _worker_agent
+    _worker_agent = pickle.loads(agent_bytes)
+    np.random.seed()  # Cada proceso con su propio muestreo (con fork heredarían el mismo estado)
+
+
+def _run_task(task: tuple) -> tuple[float, int, int, int]:
+    """
+    Ejecuta una tarea (método, clave del tablero, argumentos) con el agente
+    del proceso.
+
+    Returns:
+        (valor, nodos explorados, nodos podados, movimientos calculados)
+    """
+    method, key, args = task
+    agent = _worker_agent
+    agent.nodes_explored = 0
+    agent.pruned_nodes = 0
+    agent.slides = 0
+    if hasattr(agent, 'cache'):
+        agent.cache.new_search()
+    board = GameBoard.from_key(key, 'bitboard')
+    value = getattr(agent, method)(board, *args)
+    return value, agent.nodes_explored, agent.pruned_nodes, agent.slides
+
+
+class SearchPool:
+    """
+    Pool de procesos con una copia del agente en cada uno.
+    - workers: cantidad de procesos
+    """
+
+    def __init__(self, agent, workers: int):
+        """
+        Args:
+            agent: Agente a copiar en cada proceso (la heurística tiene que
+                poder serializarse, p. ej. con Heuristics.make_heuristic)
+            workers: Cantidad de procesos
+        """
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                             initargs=(pickle.dumps(agent),))
+
+    def run(self, tasks: list[tuple]) -> list[tuple[float, int, int, int]]:
+        """
+        Ejecuta las tareas en paralelo.
+
+        Args:
+            tasks: Lista de (método, clave del tablero, argumentos)
+
+        Returns:
+            Lista de (valor, nodos explorados, nodos podados, movimientos
+            calculados), en el mismo orden que las tareas
+        """
+        return list(self._executor.map(_run_task, tasks))
+
+    def close(self) -> None:
+        """Termina los procesos del pool"""
+        self._executor.shutdown()
@@ -0,0 +1,74 @@
+"""
+Motor de aparición de fichas para GameBoard.
+
+Usa numpy.random.Generator con una semilla explícita por partida, de modo
+que cada proceso de un experimento genera partidas independientes y
+reproducibles. Los números aleatorios se sacan en bloques de 64 bits y cada
+aparición consume uno solo: los 32 bits altos eligen el valor (2 con 90%,
+4 con 10%) y los 32 bajos la celda vacía, que se ubica con operaciones de
+bits sobre el bitboard (Bitboard.spawn).
+"""
+import numpy as np
+
+import Bitboard
+
+# Umbral de los 32 bits altos para que la ficha sea un 2 (90%)
+_TWO_THRESHOLD = int(0.9 * 2**32)
+_LOW_MASK = 0xFFFFFFFF
+
+
+class TileSpawner:
+    """
+    Generador de fichas nuevas con stream reproducible.
+    - seed: semilla (int o np.random.SeedSequence). Si es None se toma del RNG
+      global de numpy, así np.random.seed sigue reproduciendo las partidas.
+    """
+
+    def __init__(self, seed=None, block_size: int = 4096):
+        """
+        Args:
+            seed: Semilla del stream de la partida
+            block_size: Cantidad de números aleatorios que se sacan por bloque
+        """
+        if seed is None:
+            seed = np.random.randint(0, 2**63 - 1, dtype=np.int64)
+        self.rng = np.random.default_rng(seed)
+        self.block_size = block_size
+        self._block = []
+        self._pos = 0
+
+    @classmethod
+    def for_game(cls, seed: int, game_id: int) -> 'TileSpawner':
+        """
+        Stream independiente para la partida game_id de un experimento con
+        semilla base seed (los streams no se solapan entre partidas).
+        """
+        return cls(np.random.SeedSequence(seed, spawn_key=(game_id,)))
+
+    def _next_draw(self) -> int:
+        if self._pos == len(self._block):
+            self._block = self.rng.bit_generator.random_raw(self.block_size).tolist()
+            self._pos = 0
+        draw = self._block[self._pos]
+        self._pos += 1
+        return draw
+
+    def spawn(self, bits: np.uint64) -> tuple[np.uint64, tuple[int, int]]:
+        """
+        Agrega una ficha al azar en una celda vacía del bitboard.
+
+        Returns:
+            (bitboard resultante, posición (x, y) de la ficha), o (bits, None)
+            si no hay celdas vacías
+        """
+        num_empty = Bitboard.count_empty(bits)
+        if num_empty == 0:
+            return bits, None
+
+        draw = self._next_draw()
+        exponent = 1 if (draw >> 32) < _TWO_THRESHOLD else 2
+        index = ((draw & _LOW_MASK) * num_empty) >> 32
+
+        spawned = np.uint64(Bitboard.spawn(bits, index, exponent))
+        cell = (int(spawned ^ bits).bit_length() - 1) // 4
+        return spawned, (cell >> 2, cell & 3)
@@ -0,0 +1,206 @@
+"""
+Tabla de transposición de tamaño fijo para los agentes de búsqueda.
+
+Reemplaza al dict que los agentes optimizados vaciaban en cada turno: la
+tabla tiene capacidad fija (no crece durante el turno) y se conserva entre
+turnos, así que la búsqueda del turno siguiente reutiliza los subárboles ya
+calculados.
+
+Cada clave cae en un bucket de dos entradas:
+- Entrada preferida por profundidad: solo se reemplaza por una búsqueda al
+  menos igual de profunda, o si quedó de una búsqueda anterior (envejecida).
+- Entrada de reemplazo siempre: recibe lo que no entra en la primera.
+
+Las búsquedas se numeran con new_search() (generación); las entradas de
+generaciones anteriores se reemplazan primero. Una consulta acierta si la
+clave coincide y el valor guardado se calculó con al menos la profundidad
+pedida. Con persistent=False solo aciertan las entradas de la búsqueda
+actual (sin tener que vaciar la tabla en cada turno).
+
+Cada entrada guarda además el tipo de valor y el mejor movimiento del nodo.
+Una búsqueda con poda Alpha-Beta devuelve un valor exacto solo si cae dentro
+de la ventana (alpha, beta); si no, es una cota (LOWER: el valor real es >=,
+UPPER: el valor real es <=). probe_bounds usa las cotas para achicar la
+ventana, y el movimiento guardado se busca primero aunque la entrada no
+alcance la profundidad pedida.
+
+Las claves son claves Zobrist (GameBoard.zobrist): enteros de 64 bits bien
+distribuidos, así que el bucket se elige directamente con sus bits bajos.
+
+Las entradas viven en arrays de numpy preasignados, como en
+NativeSearch.NativeTable: la memoria queda fija al crear la tabla. Una
+entrada está vacía si su profundidad es -1 (la clave 0 es válida), y las
+entradas ocupadas se cuentan al guardar, así que len() es O(1).
+"""
+import numpy as np
+
+# Se combina (XOR) con la clave Zobrist del tablero en los nodos MAX, para
+# distinguirlos de los nodos de chance / MIN del mismo tablero
+MAX_NODE_KEY = 0x5DEECE66D2B7E151
+
+# Tipos de valor guardado
+EXACT = 0  # Valor exacto
+LOWER = 1  # Cota inferior (la búsqueda cortó por beta)
+UPPER = 2  # Cota superior (ningún hijo superó alpha)
+
+NO_MOVE = -1
+
+
+class TranspositionTable:
+    """
+    Tabla de transposición acotada con reemplazo por profundidad.
+    - hits / misses: consultas que encontraron (o no) un valor utilizable
+    - evictions: entradas válidas de otra clave que se sobrescribieron
+    """
+
+    def __init__(self, capacity: int = 1 << 20, persistent: bool = True):
+        """
+        Args:
+            capacity: Cantidad máxima de entradas (se redondea a una potencia de 2)
+            persistent: Si False, los valores de búsquedas anteriores no se reutilizan
+        """
+        num_buckets = 1
+        while 2 * num_buckets < capacity:
+            num_buckets *= 2
+        self.capacity = 2 * num_buckets
+        self.persistent = persistent
+        self._bucket_mask = num_buckets - 1
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.clear()
+
+    def clear(self) -> None:
+        """Descarta todas las entradas (los contadores se mantienen)"""
+        self._keys = np.zeros(self.capacity, dtype=np.uint64)
+        self._values = np.zeros(self.capacity)
+        self._depths = np.full(self.capacity, -1, dtype=np.int16)  # -1 = entrada vacía
+        self._generations = np.zeros(self.capacity, dtype=np.int64)
+        self._flags = np.full(self.capacity, EXACT, dtype=np.int8)
+        self._moves = np.full(self.capacity, NO_MOVE, dtype=np.int8)
+        self._size = 0  # Entradas ocupadas
+
+    def __getstate__(self) -> dict:
+        # Se serializa vacía (p. ej. al copiar el agente a otro proceso)
+        return {'capacity': self.capacity, 'persistent': self.persistent}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['capacity'], state['persistent'])
+
+    def new_search(self) -> None:
+        """Empieza una búsqueda nueva: las entradas actuales pasan a ser viejas"""
+        self.generation += 1
+
+    def _find(self, key: int) -> int:
+        """Índice de la entrada de la clave, o -1 si no está (o es de otra búsqueda sin persistent)"""
+        slot = (key & self._bucket_mask) << 1
+        for index in (slot, slot + 1):
+            if (self._depths.item(index) >= 0 and self._keys.item(index) == key and
+                    (self.persistent or self._generations.item(index) == self.generation)):
+                return index
+        return -1
+
+    def probe(self, key: int, depth: int) -> float | None:
+        """
+        Busca el valor exacto de una clave calculado con profundidad >= depth.
+
+        Returns:
+            El valor guardado, o None si no hay uno utilizable
+        """
+        index = self._find(key)
+        if index >= 0 and self._depths.item(index) >= depth and self._flags.item(index) == EXACT:
+            self._generations[index] = self.generation  # Sigue en uso
+            self.hits += 1
+            return self._values.item(index)
+        self.misses += 1
+        return None
+
+    def probe_bounds(self, key: int, depth: int, alpha: float,
+                     beta: float) -> tuple[float | None, float, float, int]:
+        """
+        Consulta una clave para una búsqueda con ventana (alpha, beta).
+
+        Returns:
+            (valor, alpha, beta, movimiento):
+            - valor: el valor guardado si alcanza para resolver el nodo sin
+              buscar (exacto, o una cota que cae fuera de la ventana), si no None
+            - alpha, beta: la ventana achicada con la cota guardada
+            - movimiento: el mejor movimiento guardado (NO_MOVE si no hay),
+              aunque la entrada sea de menor profundidad
+        """
+        index = self._find(key)
+        if index < 0:
+            self.misses += 1
+            return None, alpha, beta, NO_MOVE
+
+        self._generations[index] = self.generation  # Sigue en uso
+        move = self._moves.item(index)
+        if self._depths.item(index) < depth:
+            self.misses += 1
+            return None, alpha, beta, move
+
+        self.hits += 1
+        value = self._values.item(index)
+        flag = self._flags.item(index)
+        if flag == EXACT:
+            return value, alpha, beta, move
+        if flag == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value, alpha, beta, move
+        return None, alpha, beta, move
+
+    def store(self, key: int, depth: int, value: float, flag: int = EXACT,
+              move: int = NO_MOVE) -> None:
+        """
+        Guarda el valor de una clave calculado con la profundidad dada, con
+        su tipo (EXACT, LOWER o UPPER) y el mejor movimiento del nodo.
+        Si la clave ya está en alguna de las dos entradas del bucket se
+        actualiza esa entrada (conservando el valor más profundo), así que una
+        clave nunca ocupa las dos.
+        """
+        slot = (key & self._bucket_mask) << 1
+        index = -1
+        for candidate in (slot, slot + 1):
+            if self._depths.item(candidate) >= 0 and self._keys.item(candidate) == key:
+                index = candidate
+                break
+
+        if index >= 0:
+            # La clave ya está en el bucket: se actualiza esa misma entrada
+            usable = self.persistent or self._generations.item(index) == self.generation
+            if usable and depth < self._depths.item(index):
+                return  # Ya hay un valor más profundo para la misma clave
+        else:
+            index = slot
+            preferred_is_old = self._generations.item(slot) != self.generation
+            if not (preferred_is_old or depth >= self._depths.item(slot)):
+                index = slot + 1
+            if self._depths.item(index) < 0:
+                self._size += 1
+            else:
+                self.evictions += 1
+        self._keys[index] = key
+        self._values[index] = value
+        self._depths[index] = depth
+        self._generations[index] = self.generation
+        self._flags[index] = flag
+        self._moves[index] = move
+
+    def __len__(self) -> int:
+        return self._size
+
+    def stats(self) -> dict:
+        """Contadores de uso de la tabla"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
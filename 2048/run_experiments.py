@@ -23,7 +23,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from Experiments import GameExperiment
 from Minimax_Agent import MinimaxAgent
 from Expectimax_Agent import ExpectimaxAgent
-from Heuristics import get_heuristic
+from Heuristics import make_heuristic
 
 
 def print_header(text: str):
@@ -33,12 +33,16 @@ def print_header(text: str):
     print("=" * 80 + "\n")
 
 
-def run_complete_experiments(num_games: int = 20):
+def run_complete_experiments(num_games: int = 20, heuristic_backend: str = 'python'):
     """
     Ejecuta la suite COMPLETA de experimentos según el obligatorio.
     
     Args:
         num_games: Número de partidas por experimento
+        heuristic_backend: Backend de las heurísticas ('python' o 'table').
+            'python' reproduce los CSV ya registrados en results/; 'table'
+            es más rápido pero redondea distinto en punto flotante y puede
+            desempatar movimientos de otra forma.
     """
     print_header("EXPERIMENTOS COMPLETOS - OBLIGATORIO 2048")
     
@@ -80,14 +84,9 @@ def run_complete_experiments(num_games: int = 20):
                 print(f"  HEURÍSTICA: {heuristic_name.upper()} - CONFIG {config_num}")
                 print(f"{'#' * 80}\n")
                 
-                heuristic_func = get_heuristic(heuristic_name)
-                
-                # Crear función wrapper que incluye el parámetro config
-                def make_heuristic_with_config(heur_func, cfg):
-                    return lambda board: heur_func(board, config=cfg)
-                
-                heuristic_with_config = make_heuristic_with_config(heuristic_func, config_num)
-                heuristic_with_config = make_heuristic_with_config(heuristic_func, config_num)
+                # Heurística con la configuración fijada
+                heuristic_with_config = make_heuristic(heuristic_name, config_num,
+                                                       backend=heuristic_backend)
             
                 # ========== EXPERIMENTO 1: Minimax SIN Alpha-Beta ==========
                 print(f"\n[{experiment_number}/{total_experiments}] Minimax (sin AB) - {heuristic_name} - config{config_num} - depth={depth}")
@@ -0,0 +1,46 @@
+"""
+Las tablas precalculadas guardadas en disco (row_tables.npy,
+heuristic_tables.npy) se vuelven a generar si no coinciden con el código
+actual, en lugar de reutilizarse en silencio.
+"""
+import numpy as np
+
+import Bitboard
+import HeuristicTables
+
+
+def test_valid_row_tables_are_reused(tmp_path):
+    path = str(tmp_path / 'row_tables.npy')
+    np.save(path, Bitboard.ROW_TABLES)
+    mtime = (tmp_path / 'row_tables.npy').stat().st_mtime_ns
+    tables = Bitboard.load_row_tables(path)
+    assert np.array_equal(tables, Bitboard.ROW_TABLES)
+    assert (tmp_path / 'row_tables.npy').stat().st_mtime_ns == mtime
+
+
+def test_stale_row_tables_are_rebuilt(tmp_path):
+    # Tabla de antes del tope de 32768: dos fichas de 32768 se combinaban
+    stale = np.array(Bitboard.ROW_TABLES)
+    stale[Bitboard.ROW_LEFT, 0x00FF] = 0x0000
+    stale[Bitboard.ROW_SCORE, 0x00FF] = 65536
+    path = str(tmp_path / 'row_tables.npy')
+    np.save(path, stale)
+    assert np.array_equal(Bitboard.load_row_tables(path), Bitboard.ROW_TABLES)
+    assert np.array_equal(np.load(path), Bitboard.ROW_TABLES)
+
+
+def test_row_tables_with_other_format_are_rebuilt(tmp_path):
+    path = str(tmp_path / 'row_tables.npy')
+    np.save(path, Bitboard.ROW_TABLES.astype(np.uint16))
+    assert Bitboard.load_row_tables(path).dtype == np.uint32
+    (tmp_path / 'row_tables.npy').write_bytes(b'no es un .npy')
+    assert np.array_equal(Bitboard.load_row_tables(path), Bitboard.ROW_TABLES)
+
+
+def test_stale_line_features_are_rebuilt(tmp_path):
+    stale = np.array(HeuristicTables.LINE_FEATURES)
+    stale[HeuristicTables.MERGE, Bitboard.CHECK_LINES[1]] += 1.0
+    path = str(tmp_path / 'heuristic_tables.npy')
+    np.save(path, stale)
+    assert np.array_equal(HeuristicTables.load_line_features(path),
+                          HeuristicTables.LINE_FEATURES)
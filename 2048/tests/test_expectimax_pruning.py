@@ -0,0 +1,69 @@
+"""
+La poda Star1/Star2 de Expectimax no cambia las decisiones: con nodos de
+chance exactos (prob_threshold), la búsqueda podada devuelve el mismo
+movimiento y el mismo valor en la raíz que la búsqueda completa.
+"""
+import numpy as np
+import pytest
+
+from Expectimax_Agent import ExpectimaxAgent, ExpectimaxAgentOptimized
+from GameBoard import GameBoard
+from Heuristics import make_heuristic
+
+DEPTH = 3
+PROB_THRESHOLD = 1e-3
+NUM_POSITIONS = 20
+
+
+def _positions(count: int, seed: int = 0) -> list[int]:
+    """Claves de tableros de partidas con movimientos al azar."""
+    rng = np.random.default_rng(seed)
+    keys = []
+    board = GameBoard('bitboard', seed=seed)
+    while len(keys) < count:
+        moves = board.get_available_moves()
+        if not moves:
+            board = GameBoard('bitboard', seed=seed + len(keys) + 1)
+            continue
+        # Cada tanto un tablero, para cubrir toda la partida
+        if rng.random() < 0.2:
+            keys.append(board.key())
+        board.play(int(rng.choice(moves)))
+    return keys
+
+
+def _search(agent: ExpectimaxAgent, key: int) -> tuple[int, float]:
+    """Movimiento y valor en la raíz de una búsqueda con profundidad fija."""
+    np.random.seed(0)  # Muestreo fijo (los nodos exactos no lo usan)
+    board = GameBoard.from_key(key, 'bitboard')
+    _, moves, children = agent._expand_node(board)
+    if agent.pruning is not None:
+        agent._bounds = agent._resolve_bounds()
+    agent.pruned_nodes = 0
+    move, values = agent._search_root(children, moves, DEPTH)
+    return move, values[move]
+
+
+@pytest.mark.parametrize('pruning', ('star1', 'star2'))
+@pytest.mark.parametrize('agent_class', (ExpectimaxAgent, ExpectimaxAgentOptimized))
+@pytest.mark.parametrize('name', ('simple', 'intermediate', 'complex'))
+def test_pruning_keeps_root_move_and_value(name, agent_class, pruning):
+    heuristic = make_heuristic(name, 1, backend='table')
+    full = agent_class(depth=DEPTH, prob_threshold=PROB_THRESHOLD)
+    pruned = agent_class(depth=DEPTH, prob_threshold=PROB_THRESHOLD, pruning=pruning)
+    full.heuristic_func = pruned.heuristic_func = heuristic
+
+    total_pruned = 0
+    for key in _positions(NUM_POSITIONS):
+        expected_move, expected_value = _search(full, key)
+        assert full.pruned_nodes == 0
+        move, value = _search(pruned, key)
+        total_pruned += pruned.pruned_nodes
+        assert move == expected_move
+        assert value == pytest.approx(expected_value, rel=1e-9, abs=1e-9)
+    assert total_pruned > 0
+
+
+def test_pruning_requires_exact_chance_nodes():
+    with pytest.raises(ValueError):
+        ExpectimaxAgent(pruning='star1')
@@ -0,0 +1,58 @@
+"""
+Paridad bit a bit entre las heurísticas con kernels de numba
+(HeuristicKernels.py) y la implementación original en Python, para las
+configuraciones 1 y 2, sobre tableros al azar y sobre una partida real.
+"""
+import numpy as np
+import pytest
+
+import Heuristics
+from GameBoard import GameBoard
+
+NUM_BOARDS = 2000
+SEED = 0
+
+
+def _random_boards(num_boards: int, seed: int) -> list[GameBoard]:
+    """Tableros con densidad y ficha máxima al azar, en los dos backends."""
+    rng = np.random.default_rng(seed)
+    boards = []
+    for _ in range(num_boards):
+        density = rng.random()
+        high = int(rng.integers(2, 16))
+        grid = np.where(rng.random((4, 4)) < density, 0.0,
+                        2.0 ** rng.integers(1, high, (4, 4)))
+        for backend in ('array', 'bitboard'):
+            board = GameBoard(backend, seed=0)
+            board.grid = grid
+            boards.append(board)
+    return boards
+
+
+def _game_boards(seed: int) -> list[GameBoard]:
+    """Todos los tableros de una partida con movimientos al azar."""
+    rng = np.random.default_rng(seed)
+    board = GameBoard(seed=seed)
+    boards = []
+    done = False
+    while not done:
+        boards.append(board.clone())
+        done = board.play(int(rng.integers(0, 4)))
+    return boards
+
+
+@pytest.fixture(scope='module')
+def boards() -> list[GameBoard]:
+    return _random_boards(NUM_BOARDS, SEED) + _game_boards(SEED)
+
+
+@pytest.mark.parametrize('config', (1, 2))
+@pytest.mark.parametrize('name', sorted(Heuristics.NUMBA_HEURISTICS))
+def test_numba_matches_python(boards, name, config):
+    reference = Heuristics.HEURISTICS[name]
+    kernel_version = Heuristics.NUMBA_HEURISTICS[name]
+    for board in boards:
+        expected = np.float64(reference(board, config))
+        actual = np.float64(kernel_version(board, config))
+        assert expected.tobytes() == actual.tobytes(), (
+            f"{name} config {config}: {expected!r} != {actual!r}\n{board.grid}")
@@ -0,0 +1,79 @@
+"""
+La ventana de aspiración del iterative deepening de Minimax no cambia las
+decisiones: _aspiration_search devuelve el mismo movimiento y el mismo valor
+que la búsqueda con ventana completa, tanto si el valor cae dentro de la
+ventana como si hay que repetir la búsqueda.
+"""
+import numpy as np
+import pytest
+
+from GameBoard import GameBoard
+from Heuristics import make_heuristic
+from Minimax_Agent import MinimaxAgent, MinimaxAgentOptimized
+
+DEPTH = 3
+NUM_POSITIONS = 15
+
+
+def _positions(count: int, seed: int = 0) -> list[int]:
+    """Claves de tableros de partidas con movimientos al azar."""
+    rng = np.random.default_rng(seed)
+    keys = []
+    board = GameBoard('bitboard', seed=seed)
+    while len(keys) < count:
+        moves = board.get_available_moves()
+        if not moves:
+            board = GameBoard('bitboard', seed=seed + len(keys) + 1)
+            continue
+        # Cada tanto un tablero, para cubrir toda la partida
+        if rng.random() < 0.2:
+            keys.append(board.key())
+        board.play(int(rng.choice(moves)))
+    return keys
+
+
+def _make_agent(agent_class, aspiration=None):
+    agent = agent_class(depth=DEPTH, aspiration=aspiration)
+    agent.heuristic_func = make_heuristic('intermediate', 1)
+    return agent
+
+
+def _root(agent: MinimaxAgent, key: int) -> tuple[list, list]:
+    board = GameBoard.from_key(key, 'bitboard')
+    _, moves, children = agent._expand_node(board)
+    return children, agent._order_root_moves(children, moves)
+
+
+@pytest.mark.parametrize('agent_class', (MinimaxAgent, MinimaxAgentOptimized))
+@pytest.mark.parametrize('guess_scale', (1.0, 0.5, 2.0))
+def test_aspiration_keeps_root_move_and_value(agent_class, guess_scale):
+    researches = searches = 0
+    for key in _positions(NUM_POSITIONS):
+        full = _make_agent(agent_class)
+        children, moves = _root(full, key)
+        if not moves:
+            continue
+        expected_move, expected_values = full._search_root(children, moves, DEPTH)
+
+        # El valor de la iteración anterior, alejado con guess_scale para
+        # forzar búsquedas repetidas
+        agent = _make_agent(agent_class, aspiration=0.1)
+        move, values = agent._search_root(children, moves, DEPTH - 1)
+        guess = values[move] * guess_scale
+        move, values = agent._aspiration_search(children, moves, DEPTH, guess)
+        researches += agent.aspiration_researches
+        searches += 1
+
+        assert move == expected_move
+        assert values[move] == pytest.approx(expected_values[expected_move])
+    if guess_scale == 1.0:
+        assert researches < searches  # Alguna búsqueda terminó dentro de la ventana
+    else:
+        assert researches > 0
+
+
+def test_aspiration_is_a_constructor_argument():
+    assert MinimaxAgent().aspiration is None
+    assert MinimaxAgent(aspiration=0.2).aspiration == 0.2
+    assert MinimaxAgentOptimized().aspiration == 0.1
+    assert MinimaxAgentOptimized(aspiration=None).aspiration is None
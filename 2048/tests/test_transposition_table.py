@@ -0,0 +1,78 @@
+"""
+Reemplazo en los buckets de dos entradas de TranspositionTable: entrada
+preferida por profundidad, entrada de reemplazo siempre y envejecimiento
+por generación.
+"""
+from TranspositionTable import EXACT, LOWER, NO_MOVE, UPPER, TranspositionTable
+
+# Con capacidad 4 hay 2 buckets: las claves pares caen todas en el bucket 0
+A, B, C, D = 0, 2, 4, 6
+
+
+def test_shallower_key_goes_to_always_replace_entry():
+    table = TranspositionTable(4)
+    table.store(A, 5, 1.0)
+    table.store(B, 2, 2.0)  # No desplaza a A (más profunda, misma búsqueda)
+    assert table.probe(A, 5) == 1.0
+    assert table.probe(B, 2) == 2.0
+
+    table.store(C, 1, 3.0)  # Reemplaza a B en la entrada de reemplazo siempre
+    assert table.probe(A, 5) == 1.0
+    assert table.probe(B, 1) is None
+    assert table.probe(C, 1) == 3.0
+    assert len(table) == 2
+    assert table.evictions == 1
+
+
+def test_deeper_key_takes_preferred_entry():
+    table = TranspositionTable(4)
+    table.store(A, 3, 1.0)
+    table.store(D, 6, 4.0)
+    assert table.probe(D, 6) == 4.0
+    assert table.probe(A, 3) is None
+
+
+def test_old_generation_is_replaced_first():
+    table = TranspositionTable(4)
+    table.store(A, 5, 1.0)
+    table.new_search()
+    table.store(B, 1, 2.0)  # A quedó de la búsqueda anterior: se reemplaza
+    assert table.probe(B, 1) == 2.0
+    assert table.probe(A, 1) is None
+
+
+def test_same_key_is_updated_in_place():
+    table = TranspositionTable(4)
+    table.store(A, 5, 1.0)
+    table.store(B, 2, 2.0, LOWER, 1)
+
+    table.store(B, 1, 9.0, UPPER, 3)  # Menos profundo: se conserva el anterior
+    value, alpha, beta, move = table.probe_bounds(B, 2, -100.0, 100.0)
+    assert (value, alpha, move) == (None, 2.0, 1)
+
+    table.store(B, 3, 7.0, EXACT, 2)  # Más profundo: misma entrada
+    assert table.probe_bounds(B, 3, -100.0, 100.0) == (7.0, -100.0, 100.0, 2)
+    assert table.probe(A, 5) == 1.0
+    assert len(table) == 2
+    assert table.evictions == 0
+
+
+def test_same_key_in_both_entries_is_impossible():
+    table = TranspositionTable(4)
+    table.store(A, 5, 1.0)
+    table.store(B, 2, 2.0)
+    table.new_search()
+    # A quedó vieja, pero B ya está en el bucket: se actualiza su entrada
+    table.store(B, 1, 3.0)
+    keys = [table._keys.item(i) for i in range(2) if table._depths.item(i) >= 0]
+    assert keys.count(B) == 1
+
+
+def test_non_persistent_table_ignores_previous_searches():
+    table = TranspositionTable(4, persistent=False)
+    table.store(A, 5, 1.0, EXACT, NO_MOVE)
+    table.new_search()
+    assert table.probe(A, 1) is None
+    table.store(A, 1, 2.0)  # El valor viejo no se conserva aunque sea más profundo
+    assert table.probe(A, 1) == 2.0
+    assert len(table) == 1